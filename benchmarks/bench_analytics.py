@@ -0,0 +1,160 @@
+"""Dashboard aggregates: ORM row-by-row, SQLite GROUP BY, and DuckDB.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_analytics [positions]
+
+Builds a database with the given number of positions (default 1M) over 1000
+markets, plus a month of hourly price rollups, then times per-user P&L and
+per-market volume each way, and volatility in DuckDB. DuckDB reads Parquet
+snapshots here, since the sqlite extension needs a network download; the
+snapshot time is reported separately.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+
+from sqlalchemy import func, text
+from src.prophit.models.database import init_database, engine, get_db, Market, MarketOutcome, Position
+from src.prophit.models.outcome_totals import rebuild_outcome_totals
+from src.prophit.models.holdings import rebuild_holdings
+from src.prophit.services.analytics import AnalyticsEngine
+from src.prophit.utils.lmsr import LMSRCalculator
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+
+NUM_MARKETS = 1000
+NUM_USERS = 20000
+ROLLUP_HOURS = 24 * 30
+
+
+def populate(num_positions):
+    init_database()
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO markets (id, question, type, status, liquidity_param) VALUES (:id, :q, 'binary', 'active', 100.0)"),
+                           [{"id": i, "q": f"Market {i}"} for i in range(1, NUM_MARKETS + 1)])
+        connection.execute(text("INSERT INTO market_outcomes (market_id, outcome, label, shares, trade_count) VALUES (:m, :o, :l, 0, 0)"),
+                           [{"m": m, "o": o, "l": l} for m in range(1, NUM_MARKETS + 1) for o, l in enumerate(BINARY_OUTCOME_LABELS)])
+        batch = 200_000
+        for offset in range(0, num_positions, batch):
+            connection.execute(text(
+                "INSERT INTO positions (user_id, market_id, outcome, shares, cost, timestamp) "
+                "VALUES (:user_id, :market_id, :outcome, :shares, :cost, :timestamp)"
+            ), [
+                {
+                    "user_id": f"user{rng.randrange(NUM_USERS)}",
+                    "market_id": rng.randrange(1, NUM_MARKETS + 1),
+                    "outcome": rng.randrange(2),
+                    "shares": float(rng.randrange(1, 50)),
+                    "cost": rng.uniform(0.5, 25.0),
+                    "timestamp": (start + timedelta(seconds=offset + i)).isoformat(" ")
+                }
+                for i in range(min(batch, num_positions - offset))
+            ])
+        for market_id in range(1, NUM_MARKETS + 1):
+            price = 0.5
+            rows = []
+            for hour in range(ROLLUP_HOURS):
+                price = min(0.99, max(0.01, price + rng.gauss(0, 0.01)))
+                bucket = (start + timedelta(hours=hour)).isoformat(" ")
+                rows += [
+                    {"m": market_id, "b": bucket, "o": 1, "p": price},
+                    {"m": market_id, "b": bucket, "o": 0, "p": 1 - price},
+                ]
+            connection.execute(text(
+                "INSERT INTO price_rollups (market_id, resolution, bucket_start, outcome, open, high, low, close, count) "
+                "VALUES (:m, 3600, :b, :o, :p, :p, :p, :p, 1)"
+            ), rows)
+    with get_db() as db:
+        rebuild_outcome_totals(db)
+        rebuild_holdings(db)
+        db.commit()
+
+
+def orm_user_pnl():
+    """Naive: load every position through the ORM and aggregate in Python"""
+    with get_db() as db:
+        prices = {}
+        for market in db.query(Market):
+            calculator = LMSRCalculator(market.liquidity_param)
+            prices[market.id] = calculator.calculate_prices(calculator.get_current_shares(market.id, db))
+        pnl = defaultdict(float)
+        for position in db.query(Position):
+            pnl[position.user_id] += position.shares * prices[position.market_id][position.outcome] - position.cost
+    return sorted(pnl.items(), key=lambda item: -item[1])[:50]
+
+
+def sqlite_user_pnl():
+    """SQLite aggregates per (user, market, outcome); pricing and the final sum in Python"""
+    with get_db() as db:
+        shares = defaultdict(dict)
+        liquidity = dict(db.query(Market.id, Market.liquidity_param))
+        for market_id, outcome, total in db.query(MarketOutcome.market_id, MarketOutcome.outcome, MarketOutcome.shares):
+            shares[market_id][outcome] = total
+        prices = {
+            market_id: LMSRCalculator(liquidity[market_id]).calculate_prices([by_outcome[o] for o in sorted(by_outcome)])
+            for market_id, by_outcome in shares.items()
+        }
+        pnl = defaultdict(float)
+        for user_id, market_id, outcome, total, cost in db.query(
+            Position.user_id, Position.market_id, Position.outcome, func.sum(Position.shares), func.sum(Position.cost)
+        ).group_by(Position.user_id, Position.market_id, Position.outcome):
+            pnl[user_id] += total * prices[market_id][outcome] - cost
+    return sorted(pnl.items(), key=lambda item: -item[1])[:50]
+
+
+def sqlite_market_volume():
+    with get_db() as db:
+        return db.query(
+            Position.market_id, func.count(), func.sum(Position.shares), func.sum(Position.cost),
+            func.count(func.distinct(Position.user_id))
+        ).group_by(Position.market_id).order_by(func.sum(Position.cost).desc()).limit(50).all()
+
+
+def timed(label, fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:44s} {best * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Populating {num_positions:,} positions, {NUM_MARKETS * ROLLUP_HOURS * 2:,} hourly rollups...")
+    populate(num_positions)
+    
+    started = time.perf_counter()
+    analytics = AnalyticsEngine(source="snapshot", snapshot_dir=os.path.join(tempfile.mkdtemp(), "snapshots"))
+    analytics.wait_ready()
+    print(f"  {'DuckDB Parquet snapshot (all tables)':44s} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    
+    print("per-user P&L (top 50)")
+    orm = timed("ORM, row by row", orm_user_pnl, repeats=1)
+    sqlite = timed("SQLite GROUP BY + Python pricing", sqlite_user_pnl)
+    duck = timed("DuckDB", analytics.user_pnl)
+    top = {row["user_id"]: row["pnl"] for row in duck}
+    assert all(abs(top[user] - value) < 1e-6 for user, value in sqlite if user in top)
+    assert [user for user, _ in orm[:10]] == [user for user, _ in sqlite[:10]]
+    
+    print("market volume (top 50)")
+    timed("SQLite GROUP BY", sqlite_market_volume)
+    timed("DuckDB", analytics.market_volume)
+    
+    print("hourly volatility (top 50)")
+    timed("DuckDB", analytics.price_volatility)
+
+
+if __name__ == "__main__":
+    main()
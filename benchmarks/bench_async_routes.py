@@ -0,0 +1,152 @@
+"""Trade latency under homepage load: the sync stack against the async one.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_async_routes [seconds] [page_clients] [trade_clients]
+
+Seeds a database, then serves it with uvicorn twice: with PROPHIT_ASYNC_DB=0
+(blocking sessions on the threadpool, no route limits, as before) and with
+the default async path (aiosqlite reads, per-route concurrency limits). In
+each run page_clients hammer the homepage while trade_clients submit trades,
+and latency percentiles are reported for both.
+"""
+import http.client
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+NUM_MARKETS = 200
+SEED_TRADES = 20_000
+
+
+def seed(path):
+    """Markets with trade history, written by a child process so its engine points at path"""
+    code = f"""
+import random
+from src.prophit.models.database import init_database, get_db, Market
+from src.prophit.models.market import OrderCreate
+from src.prophit.models.outcome_totals import create_outcomes
+from src.prophit.services.trade_engine import execute_trade_batch
+from src.prophit.utils.price_series import record_price_point
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+
+init_database()
+with get_db() as db:
+    markets = [Market(question=f"Load test market {{i}}") for i in range({NUM_MARKETS})]
+    db.add_all(markets)
+    db.flush()
+    for market in markets:
+        create_outcomes(db, market.id, BINARY_OUTCOME_LABELS)
+        record_price_point(db, market.id, [0.5, 0.5])
+    db.commit()
+rng = random.Random(7)
+for _ in range({SEED_TRADES} // 1000):
+    execute_trade_batch([
+        OrderCreate(market_id=rng.randrange(1, {NUM_MARKETS} + 1), outcome=rng.randrange(2), quantity=rng.randrange(1, 20))
+        for _ in range(1000)
+    ], "seed")
+"""
+    env = dict(os.environ, PROPHIT_DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def serve(path, port, async_db):
+    env = dict(os.environ, PROPHIT_DATABASE_URL=f"sqlite:///{path}", PROPHIT_ASYNC_DB="1" if async_db else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            request(port, "GET", "/quote/1?outcome=1&quantity=1")
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def request(port, method, path, body=None, connection=None):
+    connection = connection or http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path}: {response.status}")
+    return connection
+
+
+def load(port, seconds, page_clients, trade_clients):
+    latencies = {"homepage": [], "trade": []}
+    errors = {"homepage": 0, "trade": 0}
+    deadline = time.perf_counter() + seconds
+    
+    def client(kind, seed):
+        rng = random.Random(seed)
+        connection = None
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if kind == "homepage":
+                    connection = request(port, "GET", "/", connection=connection)
+                else:
+                    body = urlencode({"outcome": rng.randrange(2), "quantity": rng.randrange(1, 20)})
+                    connection = request(port, "POST", f"/trade/{rng.randrange(1, NUM_MARKETS + 1)}", body, connection)
+            except (OSError, RuntimeError, http.client.HTTPException):
+                errors[kind] += 1
+                connection = None
+                continue
+            latencies[kind].append(time.perf_counter() - started)
+    
+    threads = [threading.Thread(target=client, args=("homepage", i)) for i in range(page_clients)]
+    threads += [threading.Thread(target=client, args=("trade", i)) for i in range(trade_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def report(label, latencies, errors, seconds):
+    for kind, samples in latencies.items():
+        samples = sorted(samples)
+        if not samples:
+            print(f"  {label:6} {kind:9} no requests completed, {errors[kind]} errors")
+            continue
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+        print(f"  {label:6} {kind:9} {len(samples) / seconds:7.1f} req/s   p50 {p50:7.1f} ms   "
+              f"p99 {p99:7.1f} ms   {errors[kind]} errors")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+    page_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    trade_clients = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    
+    directory = tempfile.mkdtemp()
+    seeded = os.path.join(directory, "seed.db")
+    seed(seeded)
+    print(f"{NUM_MARKETS} markets, {SEED_TRADES} trades; {page_clients} homepage and "
+          f"{trade_clients} trade clients for {seconds:g}s per stack")
+    
+    for port, label, async_db in ((8751, "sync", False), (8752, "async", True)):
+        path = os.path.join(directory, f"{label}.db")
+        shutil.copy(seeded, path)
+        server = serve(path, port, async_db)
+        try:
+            report(label, *load(port, seconds, page_clients, trade_clients), seconds)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Homepage card rendering with and without the rendered fragment cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_card_cache [markets] [renders] [trades_per_render]
+
+Renders a page of `markets` (default 50) cards `renders` times (default 200)
+from preloaded summaries, so only component building and HTML serialization
+are measured. Between renders `trades_per_render` (default 2) random markets
+get a new version, as trades would. Reports the time per page with the cache
+disabled and enabled, and the cache's hit/miss counters.
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+from fasthtml.common import Div, to_xml
+from src.prophit.routes.market_routes import market_list_items
+from src.prophit.services.fragment_cache import card_cache
+from src.prophit.utils.market_stats import MarketSummary
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+
+
+def run(markets, summaries, renders, trades_per_render, rng):
+    started = time.perf_counter()
+    for _ in range(renders):
+        for market_id in rng.sample(range(1, len(markets) + 1), trades_per_render):
+            summary = summaries[market_id]
+            summary.trade_count += 1
+            card_cache.invalidate(market_id)
+        to_xml(Div(*market_list_items(markets, summaries=summaries)))
+    return (time.perf_counter() - started) / renders
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    renders = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    trades_per_render = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    
+    markets = [SimpleNamespace(id=i, question=f"Will benchmark market {i} resolve Yes?", status="active")
+               for i in range(1, count + 1)]
+    summaries = {
+        m.id: MarketSummary(market_id=m.id, outcomes=list(BINARY_OUTCOME_LABELS), shares=[10.0, 20.0],
+                            prices=[0.4, 0.6], trade_count=100, total_shares=30.0)
+        for m in markets
+    }
+    
+    print(f"{count} cards per page, {trades_per_render} markets traded between renders")
+    max_bytes = card_cache.max_bytes
+    card_cache.max_bytes = 0
+    uncached = run(markets, summaries, renders, trades_per_render, random.Random(1))
+    print(f"  cache disabled  {uncached * 1000:7.2f} ms per page")
+    
+    card_cache.max_bytes = max_bytes
+    card_cache.hits = card_cache.misses = 0
+    card_cache.render_seconds = 0.0
+    cached = run(markets, summaries, renders, trades_per_render, random.Random(1))
+    print(f"  cache enabled   {cached * 1000:7.2f} ms per page ({uncached / cached:.1f}x)")
+    print(f"  {card_cache.hits:,} hits, {card_cache.misses:,} misses "
+          f"({card_cache.hits / (card_cache.hits + card_cache.misses):.1%} hit rate), "
+          f"{len(card_cache)} fragments in {card_cache.size / 1024:.0f} KiB, "
+          f"~{card_cache.saved_seconds():.2f} s of rendering saved")
+
+
+if __name__ == "__main__":
+    main()
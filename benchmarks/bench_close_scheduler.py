@@ -0,0 +1,110 @@
+"""Closing markets on time with the resolution_date heap.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_close_scheduler [markets] [closing] [seconds]
+
+Builds a database with `markets` (default 100000) open markets closing
+months from now, then brings `closing` (default 2000) of them forward to
+random times over the next `seconds` (default 5). Times rebuilding the heap from
+the partial index, then runs the scheduler and reports how late after its
+resolution_date each market was closed.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+    os.environ.setdefault("PROPHIT_DB_PROFILE", "bench")
+
+from sqlalchemy import text
+from src.prophit.models.database import init_database, engine, get_db
+from src.prophit.services import close_scheduler as scheduler_module
+from src.prophit.services.close_scheduler import MarketCloseScheduler
+from src.prophit.utils.price_series import utcnow
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+
+
+def populate(num_markets):
+    init_database()
+    rng = random.Random(42)
+    now = utcnow()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO markets (id, question, type, status, liquidity_param, resolution_date) "
+            "VALUES (:id, :q, 'binary', 'active', 100.0, :closes_at)"
+        ), [
+            {"id": m, "q": f"Market {m}", "closes_at": (now + timedelta(days=rng.uniform(30, 365))).isoformat(" ")}
+            for m in range(1, num_markets + 1)
+        ])
+        connection.execute(text("INSERT INTO market_outcomes (market_id, outcome, label, shares, trade_count) VALUES (:m, :o, :l, 0, 0)"),
+                           [{"m": m, "o": o, "l": l} for m in range(1, num_markets + 1) for o, l in enumerate(BINARY_OUTCOME_LABELS)])
+
+
+def bring_forward(closing, seconds):
+    """Move the first `closing` markets' resolution_date into the next `seconds`"""
+    rng = random.Random(7)
+    now = utcnow()
+    due = {m: now + timedelta(seconds=1 + rng.uniform(0, seconds)) for m in range(1, closing + 1)}
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE markets SET resolution_date = :closes_at WHERE id = :id"),
+                           [{"id": m, "closes_at": closes_at.isoformat(" ")} for m, closes_at in due.items()])
+    return due
+
+
+def main():
+    num_markets = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    closing = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    print(f"Populating {num_markets:,} markets, {closing:,} closing within {seconds:g} s...")
+    populate(num_markets)
+    
+    with get_db() as db:
+        plan = db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT resolution_date, id FROM markets "
+            "WHERE status = 'active' AND resolution_date IS NOT NULL ORDER BY resolution_date"
+        )).all()
+    print(f"  rebuild plan: {plan[0][-1]}")
+    
+    scheduler = MarketCloseScheduler()
+    started = time.perf_counter()
+    scheduler.load()
+    print(f"  heap of {len(scheduler):,} markets rebuilt in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    # Record when each close commits, relative to its resolution_date
+    lateness = []
+    close_market = scheduler_module.close_market
+    
+    def timed_close(market_id):
+        closed = close_market(market_id)
+        lateness.append((utcnow() - due[market_id]).total_seconds())
+        return closed
+    scheduler_module.close_market = timed_close
+    
+    due = bring_forward(closing, seconds)
+    scheduler.start()
+    deadline = time.perf_counter() + seconds + 10
+    while len(lateness) < closing and time.perf_counter() < deadline:
+        time.sleep(0.1)
+    scheduler.stop()
+    scheduler_module.close_market = close_market
+    
+    lateness.sort()
+    print(f"  {scheduler.closed:,} markets closed; lateness after resolution_date:")
+    print(f"    p50 {lateness[len(lateness) // 2] * 1000:7.2f} ms   "
+          f"p99 {lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))] * 1000:7.2f} ms   "
+          f"max {lateness[-1] * 1000:7.2f} ms")
+    with get_db() as db:
+        open_due = db.execute(text(
+            "SELECT count(*) FROM markets WHERE status = 'active' AND resolution_date <= :now"
+        ), {"now": utcnow().isoformat(" ")}).scalar()
+    print(f"  markets still open past their resolution_date: {open_due}")
+
+
+if __name__ == "__main__":
+    main()
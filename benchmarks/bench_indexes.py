@@ -0,0 +1,95 @@
+"""Query plans and latency of the hot queries before and after migration 2.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_indexes [positions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+from src.prophit.models.database import Base, Position, PriceHistory
+from src.prophit.models.migrations import _hot_query_indexes
+
+NUM_MARKETS = 1000
+NUM_USERS = 5000
+
+HOT_QUERIES = {
+    "outcome totals for a market":
+        "SELECT outcome, SUM(shares) FROM positions WHERE market_id = :market_id GROUP BY outcome",
+    "price history for a market":
+        "SELECT h.timestamp, v.outcome, v.price FROM price_history h JOIN price_history_values v ON v.point_id = h.id "
+        "WHERE h.market_id = :market_id ORDER BY h.timestamp",
+    "user holdings in a market":
+        "SELECT outcome, SUM(shares), SUM(cost) FROM positions WHERE user_id = :user_id AND market_id = :market_id GROUP BY outcome",
+}
+
+
+def populate(engine, num_positions):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Start from the pre-migration schema
+        for table in (Position.__table__, PriceHistory.__table__):
+            for index in table.indexes:
+                connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        
+        rng = random.Random(42)
+        batch = 100_000
+        for start in range(0, num_positions, batch):
+            rows = [
+                {
+                    "id": start + i + 1,
+                    "user_id": f"user{rng.randrange(NUM_USERS)}",
+                    "market_id": rng.randrange(1, NUM_MARKETS + 1),
+                    "outcome": rng.randrange(2),
+                    "shares": 10.0,
+                    "cost": 5.0,
+                    "timestamp": f"2025-01-01 00:00:{(start + i) % 60:02d}"
+                }
+                for i in range(min(batch, num_positions - start))
+            ]
+            connection.execute(text(
+                "INSERT INTO positions (user_id, market_id, outcome, shares, cost, timestamp) "
+                "VALUES (:user_id, :market_id, :outcome, :shares, :cost, :timestamp)"
+            ), rows)
+            connection.execute(text(
+                "INSERT INTO price_history (id, market_id, timestamp) "
+                "VALUES (:id, :market_id, :timestamp)"
+            ), rows)
+            connection.execute(text(
+                "INSERT INTO price_history_values (point_id, outcome, price) VALUES (:id, :outcome, 0.5)"
+            ), [{"id": row["id"], "outcome": outcome} for row in rows for outcome in range(2)])
+        connection.execute(text("ANALYZE"))
+
+
+def measure(engine, label, repeats=50):
+    print(f"\n== {label}")
+    rng = random.Random(7)
+    with engine.connect() as connection:
+        for name, sql in HOT_QUERIES.items():
+            params = {"market_id": rng.randrange(1, NUM_MARKETS + 1), "user_id": f"user{rng.randrange(NUM_USERS)}"}
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+            started = time.perf_counter()
+            for _ in range(repeats):
+                connection.execute(text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - started) / repeats
+            print(f"{name:32s} {elapsed * 1000:9.3f} ms   plan: {' | '.join(row[-1] for row in plan)}")
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        print(f"Populating {num_positions:,} positions and price points...")
+        populate(engine, num_positions)
+        measure(engine, "before (schema version 1)")
+        with engine.begin() as connection:
+            _hot_query_indexes(connection)
+            connection.execute(text("ANALYZE"))
+        measure(engine, "after (schema version 2)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Microbenchmark of the vectorized LMSR core against the original scalar one.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lmsr
+"""
+import math
+import timeit
+import numpy as np
+from src.prophit.utils.lmsr import LMSRCalculator, lmsr_prices, lmsr_trade_cost
+
+
+class ScalarLMSR:
+    """The pre-vectorization implementation, kept here as the baseline"""
+    
+    def __init__(self, b):
+        self.b = b
+    
+    def calculate_cost(self, shares):
+        return self.b * math.log(sum(math.exp(q / self.b) for q in shares))
+    
+    def calculate_prices(self, shares):
+        exp_values = [math.exp(q / self.b) for q in shares]
+        exp_sum = sum(exp_values)
+        return [v / exp_sum for v in exp_values]
+    
+    def trade_cost(self, shares, outcome, quantity):
+        after = list(shares)
+        after[outcome] += quantity
+        return self.calculate_cost(after) - self.calculate_cost(shares)
+
+
+def report(label, seconds, count):
+    print(f"{label:52s} {seconds / count * 1e6:10.2f} us/op")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    num_markets = 10_000
+    shares = rng.uniform(0, 500, size=(num_markets, 2))
+    liquidity = rng.uniform(10, 1000, size=num_markets)
+    
+    print("== single market")
+    scalar, vector = ScalarLMSR(100.0), LMSRCalculator(100.0)
+    q = [120.0, 80.0]
+    n = 20_000
+    report("original prices", timeit.timeit(lambda: scalar.calculate_prices(q), number=n), n)
+    report("stable LMSRCalculator prices", timeit.timeit(lambda: vector.calculate_prices(q), number=n), n)
+    report("original trade cost", timeit.timeit(lambda: scalar.trade_cost(q, 1, 10.0), number=n), n)
+    report("stable LMSRCalculator trade cost", timeit.timeit(lambda: vector.trade_cost(q, 1, 10.0), number=n), n)
+    
+    print(f"\n== {num_markets:,} markets, per-market b")
+    rows = shares.tolist()
+    bs = liquidity.tolist()
+    report("original prices, loop over markets",
+           timeit.timeit(lambda: [ScalarLMSR(b).calculate_prices(r) for r, b in zip(rows, bs)], number=5), 5 * num_markets)
+    report("numpy prices, one call",
+           timeit.timeit(lambda: lmsr_prices(shares, liquidity), number=5), 5 * num_markets)
+    
+    print("\n== 1,000 candidate quantities on one market")
+    candidates = np.linspace(1, 1000, 1000)
+    report("original trade cost, loop over candidates",
+           timeit.timeit(lambda: [scalar.trade_cost(q, 1, c) for c in candidates.tolist()], number=20), 20 * 1000)
+    report("numpy trade cost, one call",
+           timeit.timeit(lambda: lmsr_trade_cost(q, 100.0, 1, candidates), number=20), 20 * 1000)
+    
+    print("\n== stability at q >> b")
+    big = [1e6, 0.0]
+    try:
+        scalar.calculate_prices(big)
+        print("original prices: ok")
+    except OverflowError as e:
+        print(f"original prices: OverflowError ({e})")
+    print(f"stable prices: {vector.calculate_prices(big)}, cost of 10 more: {vector.trade_cost(big, 0, 10.0):.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Reading one user's portfolio: maintained holdings against aggregating positions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_portfolio [background_positions] [user_trades]
+
+Builds a database with `background_positions` (default 1M) positions spread
+over 20000 users and 1000 markets, seeds holdings from them, then trades
+`user_trades` (default 10000) orders for one user through the batch trade
+path, which maintains holdings incrementally. Times get_portfolio() against
+aggregating that user's positions on the fly, and checks that both agree.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+
+from sqlalchemy import func, text
+from src.prophit.models.database import init_database, engine, get_db, Position
+from src.prophit.models.holdings import check_holdings, rebuild_holdings
+from src.prophit.models.market import OrderCreate
+from src.prophit.models.outcome_totals import rebuild_outcome_totals
+from src.prophit.services.market_cache import market_cache
+from src.prophit.services.portfolio import get_portfolio
+from src.prophit.services.trade_engine import execute_trade_batch
+from src.prophit.constants import BINARY_OUTCOME_LABELS, MAX_TRADE_BATCH_SIZE
+
+NUM_MARKETS = 1000
+NUM_USERS = 20000
+USER_ID = "whale"
+
+
+def populate(num_positions):
+    init_database()
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO markets (id, question, type, status, liquidity_param) VALUES (:id, :q, 'binary', 'active', 100.0)"),
+                           [{"id": i, "q": f"Market {i}"} for i in range(1, NUM_MARKETS + 1)])
+        connection.execute(text("INSERT INTO market_outcomes (market_id, outcome, label, shares, trade_count) VALUES (:m, :o, :l, 0, 0)"),
+                           [{"m": m, "o": o, "l": l} for m in range(1, NUM_MARKETS + 1) for o, l in enumerate(BINARY_OUTCOME_LABELS)])
+        batch = 200_000
+        for offset in range(0, num_positions, batch):
+            connection.execute(text(
+                "INSERT INTO positions (user_id, market_id, outcome, shares, cost) "
+                "VALUES (:user_id, :market_id, :outcome, :shares, :cost)"
+            ), [
+                {
+                    "user_id": f"user{rng.randrange(NUM_USERS)}",
+                    "market_id": rng.randrange(1, NUM_MARKETS + 1),
+                    "outcome": rng.randrange(2),
+                    "shares": float(rng.randrange(1, 50)),
+                    "cost": rng.uniform(0.5, 25.0)
+                }
+                for _ in range(min(batch, num_positions - offset))
+            ])
+    with get_db() as db:
+        rebuild_outcome_totals(db)
+        started = time.perf_counter()
+        rebuild_holdings(db)
+        db.commit()
+        print(f"  {'seed holdings from positions (INSERT ... SELECT)':50s} {(time.perf_counter() - started) * 1000:10.1f} ms")
+
+
+def aggregate_portfolio(user_id):
+    """Without holdings: group the user's positions, then mark them at cached prices"""
+    with get_db() as db:
+        rows = db.query(
+            Position.market_id, Position.outcome, func.sum(Position.shares), func.sum(Position.cost)
+        ).filter(Position.user_id == user_id).group_by(Position.market_id, Position.outcome).all()
+        states = market_cache.get_many({row[0] for row in rows}, db)
+        value = defaultdict(float)
+        for market_id, outcome, shares, cost in rows:
+            value["market_value"] += shares * states[market_id].prices[outcome]
+            value["cost_basis"] += cost
+    return value
+
+
+def timed(label, fn, repeats=20):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:50s} {best * 1000:10.2f} ms")
+    return result
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    user_trades = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    print(f"Populating {num_positions:,} positions...")
+    populate(num_positions)
+    
+    rng = random.Random(7)
+    started = time.perf_counter()
+    for offset in range(0, user_trades, MAX_TRADE_BATCH_SIZE):
+        execute_trade_batch([
+            OrderCreate(market_id=rng.randrange(1, 501), outcome=rng.randrange(2), quantity=rng.randrange(1, 20))
+            for _ in range(min(MAX_TRADE_BATCH_SIZE, user_trades - offset))
+        ], USER_ID)
+    print(f"  {f'{user_trades:,} trades for one user (batch path)':50s} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    
+    with get_db() as db:
+        plan = db.execute(text("EXPLAIN QUERY PLAN SELECT * FROM holdings WHERE user_id = :u"), {"u": USER_ID}).all()
+        print(f"  holdings lookup plan: {plan[0][-1]}")
+    
+    print(f"portfolio of a user with {user_trades:,} trades")
+    with get_db() as db:
+        timed("query: GROUP BY the user's positions", lambda: db.execute(text(
+            "SELECT market_id, outcome, sum(shares), sum(cost) FROM positions WHERE user_id = :u GROUP BY market_id, outcome"
+        ), {"u": USER_ID}).all())
+        timed("query: the user's holdings", lambda: db.execute(text(
+            "SELECT market_id, outcome, shares, cost FROM holdings WHERE user_id = :u"
+        ), {"u": USER_ID}).all())
+    aggregated = timed("aggregate positions (GROUP BY on user index)", lambda: aggregate_portfolio(USER_ID))
+    portfolio = timed("get_portfolio (holdings range scan)", lambda: get_portfolio(USER_ID))
+    print(f"  {len(portfolio.holdings)} holdings, cost basis {portfolio.cost_basis:,.2f}, "
+          f"market value {portfolio.market_value:,.2f}, P&L {portfolio.pnl:,.2f}")
+    assert abs(portfolio.cost_basis - aggregated["cost_basis"]) < 1e-6 * portfolio.cost_basis
+    assert abs(portfolio.market_value - aggregated["market_value"]) < 1e-6 * portfolio.market_value
+    assert sum(holding.trade_count for holding in portfolio.holdings) == user_trades
+    
+    with get_db() as db:
+        mismatches = check_holdings(db)
+    print(f"  holdings vs positions: {len(mismatches)} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""SQLite size and chart reads before and after archiving old price history.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_price_archive [points_per_market]
+
+Builds 1000 markets with points_per_market price points each (default 500)
+spread over 90 days, then archives everything older than 30 days to Parquet.
+Reports the database file and price_history index sizes (after VACUUM) and
+the time to load chart series for a page of 50 markets from each layout.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+    os.environ.setdefault("PROPHIT_PRICE_ARCHIVE_DIR", os.path.join(_directory, "archive"))
+
+from sqlalchemy import text
+from src.prophit.models.database import init_database, engine, get_db
+from src.prophit.utils.price_archive import archive_price_history
+from src.prophit.utils.price_series import load_price_series
+from src.prophit.constants import PRICE_ARCHIVE_DIR
+
+NUM_MARKETS = 1000
+DAYS = 90
+PAGE = 50
+
+
+def populate(points_per_market):
+    init_database()
+    rng = random.Random(42)
+    end = datetime(2025, 6, 1)
+    step = timedelta(days=DAYS) / points_per_market
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO markets (id, question, type, status, liquidity_param) VALUES (:id, :q, 'binary', 'active', 100.0)"),
+                           [{"id": i, "q": f"Market {i}"} for i in range(1, NUM_MARKETS + 1)])
+        point_id = 0
+        for market_id in range(1, NUM_MARKETS + 1):
+            rows, values = [], []
+            price = 0.5
+            for i in range(points_per_market):
+                price = min(0.99, max(0.01, price + rng.gauss(0, 0.01)))
+                point_id += 1
+                rows.append({"id": point_id, "m": market_id, "t": (end - timedelta(days=DAYS) + step * i).isoformat(" ")})
+                values += [{"id": point_id, "o": 0, "p": 1 - price}, {"id": point_id, "o": 1, "p": price}]
+            connection.execute(text("INSERT INTO price_history (id, market_id, timestamp) VALUES (:id, :m, :t)"), rows)
+            connection.execute(text("INSERT INTO price_history_values (point_id, outcome, price) VALUES (:id, :o, :p)"), values)
+    return end
+
+
+def sizes():
+    """Database file bytes and price_history index bytes, after VACUUM"""
+    engine.dispose()
+    connection = sqlite3.connect(engine.url.database)
+    try:
+        connection.execute("VACUUM")
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        try:
+            index_pages = connection.execute(
+                "SELECT count(*) FROM dbstat WHERE name = 'ix_price_history_market_timestamp'"
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            # dbstat is a compile-time option of SQLite
+            index_pages = None
+    finally:
+        connection.close()
+    index_bytes = index_pages * page_size if index_pages is not None else None
+    return os.path.getsize(engine.url.database), index_bytes
+
+
+def chart_page(points_per_market, repeats=5):
+    """Best time to load one page of raw-tier chart series, and the series"""
+    counts = {market_id: points_per_market - 1 for market_id in range(1, PAGE + 1)}
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        with get_db() as db:
+            series = load_price_series(db, counts)
+        best = min(best, time.perf_counter() - started)
+    return best, series
+
+
+def report(label, points_per_market):
+    file_bytes, index_bytes = sizes()
+    best, series = chart_page(points_per_market)
+    index = f"{index_bytes / 1e6:8.1f} MB" if index_bytes is not None else "     n/a"
+    print(f"  {label:10} db {file_bytes / 1e6:8.1f} MB   index {index}   chart page {best * 1000:8.1f} ms")
+    return series
+
+
+def main():
+    points_per_market = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"Populating {NUM_MARKETS * points_per_market:,} price points over {DAYS} days...")
+    end = populate(points_per_market)
+    before = report("hot only", points_per_market)
+    
+    started = time.perf_counter()
+    moved = archive_price_history(cutoff=end - timedelta(days=30))
+    print(f"  archived {moved:,} rows in {time.perf_counter() - started:.1f} s to {PRICE_ARCHIVE_DIR}")
+    after = report("archived", points_per_market)
+    assert before == after, "chart series changed after archiving"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Fan-out of live prices over /prices/stream to many concurrent viewers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_price_stream [viewers] [trades] [rate]
+
+Serves a fresh database with uvicorn, opens `viewers` (default 10000) SSE
+connections watching one market, then submits `trades` (default 200) trades
+on it at `rate` per second (default 20). Reports how long connecting took,
+how many updates reached viewers, and the delay from submitting a trade to a
+viewer receiving its prices. The viewers run on one asyncio loop in this
+process, so on a small machine they compete with the server for CPU.
+"""
+import asyncio
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+PORT = 8761
+CONNECT_BATCH = 500
+
+
+def serve(path):
+    env = dict(os.environ, PROPHIT_DATABASE_URL=f"sqlite:///{path}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning",
+         "--backlog", "4096", "--timeout-keep-alive", "600"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            request("POST", "/create-market", urlencode({"question": "Fan-out market"}))
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time of a process (Linux), or None"""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError):
+        return None
+
+
+def request(method, path, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path}: {response.status}")
+
+
+async def viewer(market_id, received, connected, stop):
+    """One SSE client; records (total_shares, arrival time) for every update"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    writer.write(f"GET /prices/stream?markets={market_id} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    connected.append(1)
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            # Chunked transfer encoding: skip the size lines, keep the data lines
+            if line.startswith(b"data: "):
+                received.append((json.loads(line[6:])["total_shares"], time.perf_counter()))
+    finally:
+        writer.close()
+
+
+def trade(market_id, trades, rate, sent):
+    """Sequential unit trades; total_shares after trade k identifies its update"""
+    for k in range(1, trades + 1):
+        sent[float(k)] = time.perf_counter()
+        request("POST", f"/trade/{market_id}", urlencode({"outcome": k % 2, "quantity": 1}))
+        time.sleep(max(0.0, 1 / rate - (time.perf_counter() - sent[float(k)])))
+
+
+async def run(server, viewers, trades, rate):
+    received, connected, stop = [], [], asyncio.Event()
+    started = time.perf_counter()
+    tasks = []
+    for offset in range(0, viewers, CONNECT_BATCH):
+        tasks += [asyncio.create_task(viewer(1, received, connected, stop)) for _ in range(min(CONNECT_BATCH, viewers - offset))]
+        while len(connected) < len(tasks):
+            await asyncio.sleep(0.01)
+            failed = [task for task in tasks if task.done() and task.exception()]
+            if failed:
+                raise failed[0].exception()
+    print(f"  {viewers} viewers connected in {time.perf_counter() - started:.1f} s")
+    
+    sent = {}
+    trader = threading.Thread(target=trade, args=(1, trades, rate, sent))
+    cpu_started = cpu_seconds(server.pid)
+    started = time.perf_counter()
+    trader.start()
+    while trader.is_alive():
+        await asyncio.sleep(0.05)
+    # Let the last updates arrive
+    await asyncio.sleep(2)
+    elapsed = time.perf_counter() - started
+    cpu_used = cpu_seconds(server.pid) - cpu_started if cpu_started is not None else None
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    delays = sorted(arrival - sent[shares] for shares, arrival in received if shares in sent)
+    print(f"  {trades} trades at {rate:g}/s: {len(received):,} updates delivered "
+          f"({len(received) / elapsed:,.0f}/s, {len(received) / (viewers * trades):.1%} of trades x viewers; "
+          f"the rest were coalesced)")
+    if delays:
+        p50 = delays[len(delays) // 2] * 1000
+        p99 = delays[min(len(delays) - 1, int(len(delays) * 0.99))] * 1000
+        print(f"  trade submitted -> viewer update   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   max {delays[-1] * 1000:8.1f} ms")
+    if cpu_used is not None and received:
+        print(f"  server CPU {cpu_used:.1f} s, {cpu_used / len(received) * 1e6:.1f} us per delivered update")
+
+
+def main():
+    viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    trades = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    
+    server = serve(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    try:
+        asyncio.run(run(server, viewers, trades, rate))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
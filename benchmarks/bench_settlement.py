@@ -0,0 +1,107 @@
+"""Resolving one market with a million positions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_settlement [positions] [holders]
+
+Builds a database with `positions` (default 1M) positions in a single
+binary market, spread over `holders` (default 200000) users, and seeds
+holdings from them. Times a naive settlement that loops over every position
+in Python, then resolve_market(): an interrupted run (stopped after a few
+chunks) followed by a resumed one. Checks the payouts against positions.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+    os.environ.setdefault("PROPHIT_DB_PROFILE", "bench")
+
+from sqlalchemy import func, text
+from src.prophit.models.database import init_database, engine, get_db, Position, Settlement
+from src.prophit.models.holdings import rebuild_holdings
+from src.prophit.models.outcome_totals import rebuild_outcome_totals
+from src.prophit.services.settlement import close_market, resolve_market, settle_market
+from src.prophit.constants import BINARY_OUTCOME_LABELS, BINARY_OUTCOMES, SETTLEMENT_CHUNK_SIZE
+
+MARKET_ID = 1
+WINNER = BINARY_OUTCOMES["YES"]
+
+
+def populate(num_positions, num_holders):
+    init_database()
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO markets (id, question, type, status, liquidity_param) VALUES (1, 'Settle me', 'binary', 'active', 100.0)"))
+        connection.execute(text("INSERT INTO market_outcomes (market_id, outcome, label, shares, trade_count) VALUES (1, :o, :l, 0, 0)"),
+                           [{"o": o, "l": l} for o, l in enumerate(BINARY_OUTCOME_LABELS)])
+        batch = 200_000
+        for offset in range(0, num_positions, batch):
+            connection.execute(text(
+                "INSERT INTO positions (user_id, market_id, outcome, shares, cost) "
+                "VALUES (:user_id, 1, :outcome, :shares, :cost)"
+            ), [
+                {
+                    "user_id": f"user{rng.randrange(num_holders):07d}",
+                    "outcome": rng.randrange(2),
+                    "shares": float(rng.randrange(1, 50)),
+                    "cost": rng.uniform(0.5, 25.0)
+                }
+                for _ in range(min(batch, num_positions - offset))
+            ])
+    with get_db() as db:
+        rebuild_outcome_totals(db)
+        rebuild_holdings(db)
+        db.commit()
+
+
+def python_settlement():
+    """Naive: every position through Python, one payout per holder (not written)"""
+    payouts = defaultdict(float)
+    with get_db() as db:
+        for user_id, outcome, shares in db.query(Position.user_id, Position.outcome, Position.shares).filter(
+            Position.market_id == MARKET_ID
+        ).yield_per(10_000):
+            payouts[user_id] += shares if outcome == WINNER else 0.0
+    return payouts
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_holders = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    print(f"Populating {num_positions:,} positions in one market over {num_holders:,} users...")
+    populate(num_positions, num_holders)
+    
+    started = time.perf_counter()
+    expected = python_settlement()
+    print(f"  {'Python loop over positions (payouts only)':46s} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    
+    started = time.perf_counter()
+    close_market(MARKET_ID, WINNER)
+    partial = settle_market(MARKET_ID, max_chunks=3)
+    interrupted = time.perf_counter() - started
+    print(f"  {'close + 3 chunks, then stop':46s} {interrupted * 1000:10.1f} ms  ({partial.holders:,} holders, {partial.status})")
+    
+    started = time.perf_counter()
+    result = resolve_market(MARKET_ID, WINNER)
+    resumed = time.perf_counter() - started
+    print(f"  {'resume to completion':46s} {resumed * 1000:10.1f} ms  ({result.chunks} chunks of {SETTLEMENT_CHUNK_SIZE:,})")
+    print(f"  {'set-based settlement, total':46s} {(interrupted + resumed) * 1000:10.1f} ms")
+    print(f"  {result.holders:,} holders settled, {result.payout:,.0f} paid out, market {result.status}")
+    
+    assert result.holders == len(expected)
+    assert abs(result.payout - sum(expected.values())) < 1e-6 * result.payout
+    with get_db() as db:
+        settled = dict(db.query(Settlement.user_id, Settlement.payout).filter(Settlement.market_id == MARKET_ID))
+        assert all(abs(settled[user_id] - payout) < 1e-6 for user_id, payout in expected.items())
+        positions = db.query(func.count(Position.id)).scalar()
+    print(f"  payouts match a full scan of {positions:,} positions")
+
+
+if __name__ == "__main__":
+    main()
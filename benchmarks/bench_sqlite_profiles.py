@@ -0,0 +1,119 @@
+"""Read/write throughput of each DATABASE_PROFILES entry.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sqlite_profiles [seconds] [writers] [readers]
+
+Each profile runs in its own process against a fresh database file: first
+writer processes alone execute trades, then writer and reader processes
+(market pages with price series, cold cache) run together. That is where
+rollback-journal readers and writers block each other and WAL lets them
+overlap.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == "__main__" and "--profile-worker" in sys.argv:
+    os.environ["PROPHIT_DATABASE_URL"] = f"sqlite:///{sys.argv[sys.argv.index('--profile-worker') + 1]}"
+
+NUM_MARKETS = 50
+
+
+def work(kind, seed, seconds, market_ids):
+    """One writer or reader process; returns (completed, errors)"""
+    from src.prophit.models.database import get_db
+    from src.prophit.services.market_cache import market_cache
+    from src.prophit.services.trade_engine import execute_trade
+    from src.prophit.utils.market_listing import list_markets_page
+    from src.prophit.utils.market_stats import load_market_summaries
+    from src.prophit.utils.price_series import load_price_series
+    
+    rng = random.Random(seed)
+    completed = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if kind == "writer":
+                execute_trade(rng.choice(market_ids), rng.randrange(2), float(rng.randrange(1, 20)), f"user{seed}")
+            else:
+                # Cold cache, so every page read hits the database
+                market_cache.invalidate()
+                with get_db() as db:
+                    page, _ = list_markets_page(db)
+                    summaries = load_market_summaries([m.id for m in page], db=db)
+                    load_price_series(db, {m_id: summary.trade_count for m_id, summary in summaries.items()})
+            completed += 1
+        except Exception:
+            errors += 1
+    return completed, errors
+
+
+def run_workload(seconds, writers, readers):
+    from src.prophit.models.database import init_database, get_db, engine, async_engine, Market
+    from src.prophit.models.outcome_totals import create_outcomes
+    from src.prophit.utils.price_series import record_price_point
+    from src.prophit.constants import BINARY_OUTCOME_LABELS
+    
+    init_database()
+    with get_db() as db:
+        markets = [Market(question=f"Benchmark market {i}") for i in range(NUM_MARKETS)]
+        db.add_all(markets)
+        db.flush()
+        for market in markets:
+            create_outcomes(db, market.id, BINARY_OUTCOME_LABELS)
+            record_price_point(db, market.id, [0.5, 0.5])
+        db.commit()
+        market_ids = [m.id for m in markets]
+    # Worker processes are forked and must open their own connections
+    engine.dispose()
+    async_engine.sync_engine.dispose()
+    
+    def phase(num_writers, num_readers):
+        # Separate processes, so SQLite locking rather than the GIL decides what overlaps
+        kinds = ["writer"] * num_writers + ["reader"] * num_readers
+        with ProcessPoolExecutor(max_workers=len(kinds)) as executor:
+            results = list(executor.map(work, kinds, range(len(kinds)), [seconds] * len(kinds), [market_ids] * len(kinds)))
+        return {
+            "writes": sum(done for kind, (done, _) in zip(kinds, results) if kind == "writer") / seconds,
+            "reads": sum(done for kind, (done, _) in zip(kinds, results) if kind == "reader") / seconds,
+            "errors": sum(errors for _, errors in results),
+        }
+    
+    return {"write only": phase(writers, 0), "mixed": phase(writers, readers)}
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    seconds = float(args[0]) if len(args) > 0 else 5
+    writers = int(args[1]) if len(args) > 1 else 4
+    readers = int(args[2]) if len(args) > 2 else 4
+    
+    from src.prophit.constants import DATABASE_PROFILES
+    directory = tempfile.mkdtemp()
+    print(f"{writers} writer and {readers} reader processes, {seconds:g}s per phase")
+    print(f"  {'profile':8} {'phase':10} {'trades/s':>9} {'pages/s':>8} {'errors':>7}")
+    for profile in DATABASE_PROFILES:
+        path = os.path.join(directory, f"{profile}.db")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_profiles", str(seconds), str(writers), str(readers),
+             "--profile-worker", path],
+            env=dict(os.environ, PROPHIT_DB_PROFILE=profile),
+            capture_output=True, text=True, check=True
+        ).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        for phase, counts in results.items():
+            print(f"  {profile:8} {phase:10} {counts['writes']:9.1f} {counts['reads']:8.1f} {counts['errors']:7d}")
+
+
+if __name__ == "__main__":
+    if "--profile-worker" in sys.argv:
+        args = [a for a in sys.argv[1:sys.argv.index("--profile-worker")]]
+        print(json.dumps(run_workload(float(args[0]), int(args[1]), int(args[2]))))
+    else:
+        main()
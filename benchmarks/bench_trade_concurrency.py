@@ -0,0 +1,88 @@
+"""Concurrent trade load against the trade engine, with a mispricing check.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_trade_concurrency [workers] [trades_per_worker] [markets] [--processes]
+
+LMSR cost is path independent, so if every trade was priced against the true
+share vector the costs charged on a market sum to C(q_final) - C(0). Any trade
+priced against a stale vector breaks that identity.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+
+from sqlalchemy import func
+from src.prophit.models.database import init_database, get_db, Market, Position
+from src.prophit.models.outcome_totals import check_outcome_totals
+from src.prophit.services.trade_engine import execute_trade
+from src.prophit.utils.lmsr import LMSRCalculator
+from src.prophit.utils.price_series import read_price_history, record_price_point
+
+
+def run_worker(args):
+    seed, trades, market_ids = args
+    rng = random.Random(seed)
+    for _ in range(trades):
+        execute_trade(rng.choice(market_ids), rng.randrange(2), float(rng.randrange(1, 50)), f"user{seed}")
+    return trades
+
+
+def verify(market_ids):
+    failures = 0
+    with get_db() as db:
+        if check_outcome_totals(db):
+            print("outcome totals drifted from positions")
+            failures += 1
+        for market_id in market_ids:
+            calculator = LMSRCalculator(db.get(Market, market_id).liquidity_param)
+            shares = calculator.get_current_shares(market_id, db)
+            charged = db.query(func.coalesce(func.sum(Position.cost), 0.0)).filter(Position.market_id == market_id).scalar()
+            expected = calculator.calculate_cost(shares) - calculator.calculate_cost([0.0] * len(shares))
+            _, last = list(read_price_history(db, [market_id]))[-1]
+            if abs(charged - expected) > 1e-6 or max(abs(a - b) for a, b in zip(last.prices, calculator.calculate_prices(shares))) > 1e-9:
+                print(f"market {market_id}: charged {charged:.6f}, expected {expected:.6f}")
+                failures += 1
+    return failures
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    workers = int(args[0]) if len(args) > 0 else 8
+    trades_per_worker = int(args[1]) if len(args) > 1 else 200
+    num_markets = int(args[2]) if len(args) > 2 else 4
+    use_processes = "--processes" in sys.argv
+    
+    init_database()
+    with get_db() as db:
+        markets = [Market(question=f"Benchmark market {i}") for i in range(num_markets)]
+        db.add_all(markets)
+        db.flush()
+        for market in markets:
+            record_price_point(db, market.id, [0.5, 0.5])
+        db.commit()
+        market_ids = [m.id for m in markets]
+    
+    pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    started = time.perf_counter()
+    with pool(max_workers=workers) as executor:
+        total = sum(executor.map(run_worker, [(i, trades_per_worker, market_ids) for i in range(workers)]))
+    elapsed = time.perf_counter() - started
+    
+    kind = "processes" if use_processes else "threads"
+    print(f"{total} trades over {num_markets} markets from {workers} {kind}: "
+          f"{elapsed:.2f}s, {total / elapsed:.0f} trades/s")
+    failures = verify(market_ids)
+    print("no mispricing detected" if not failures else f"{failures} inconsistencies")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Sustained trade throughput with and without the write-ahead trade journal.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_trade_journal [workers] [trades_per_worker] [markets]
+
+Both phases run against the same database file (so the same disk): first
+every trade commits directly, then trades are acknowledged by the journal and
+applied in groups. The journal is then closed, which applies everything, and
+the same mispricing check as bench_trade_concurrency runs over both phases.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == "__main__":
+    _directory = tempfile.mkdtemp()
+    os.environ.setdefault("PROPHIT_DATABASE_URL", f"sqlite:///{os.path.join(_directory, 'bench.db')}")
+
+from src.prophit.models.database import init_database, get_db, Market
+from src.prophit.models.outcome_totals import create_outcomes
+from src.prophit.services.trade_engine import execute_trade
+from src.prophit.services.trade_journal import open_trade_journal
+from src.prophit.utils.price_series import record_price_point
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+from benchmarks.bench_trade_concurrency import verify
+
+
+def create_markets(count):
+    with get_db() as db:
+        markets = [Market(question=f"Benchmark market {i}") for i in range(count)]
+        db.add_all(markets)
+        db.flush()
+        for market in markets:
+            create_outcomes(db, market.id, BINARY_OUTCOME_LABELS)
+            record_price_point(db, market.id, [0.5, 0.5])
+        db.commit()
+        return [m.id for m in markets]
+
+
+def run_phase(workers, trades_per_worker, market_ids):
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(trades_per_worker):
+            execute_trade(rng.choice(market_ids), rng.randrange(2), float(rng.randrange(1, 50)), f"user{seed}")
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(worker, range(workers)))
+    return workers * trades_per_worker / (time.perf_counter() - started)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    trades_per_worker = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    num_markets = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    
+    init_database()
+    direct_markets = create_markets(num_markets)
+    journaled_markets = create_markets(num_markets)
+    
+    direct = run_phase(workers, trades_per_worker, direct_markets)
+    print(f"direct commits:  {direct:8.0f} trades/s")
+    
+    journal = open_trade_journal(os.path.join(tempfile.mkdtemp(), "trades.journal"))
+    journaled = run_phase(workers, trades_per_worker, journaled_markets)
+    started = time.perf_counter()
+    journal.close()
+    print(f"trade journal:   {journaled:8.0f} trades/s acknowledged "
+          f"({journal.fsyncs} fsyncs, {journal.groups_applied} apply transactions, "
+          f"{time.perf_counter() - started:.2f}s to drain on close)")
+    print(f"speedup: {journaled / direct:.1f}x")
+    
+    failures = verify(direct_markets + journaled_markets)
+    print("no mispricing detected" if not failures else f"{failures} inconsistencies")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
 from fasthtml.common import *
 from .models.database import init_database
+from .services.trade_journal import open_trade_journal
+from .services.settlement import start_settlement_resume
+from .services.close_scheduler import start_close_scheduler
+from .utils.price_archive import start_price_archiver
+from .constants import TRADE_JOURNAL_PATH, PRICE_ARCHIVE_DIR
 from .routes.market_routes import register_market_routes
+from .routes.analytics_routes import register_analytics_routes
+from .routes.stream_routes import register_stream_routes
+from .routes.portfolio_routes import register_portfolio_routes
 
 
 def create_app():
     """Create and configure the FastHTML app"""
     
-    # Initialize database
+    # Initialize database, replaying the trade journal if one is configured
     init_database()
+    if TRADE_JOURNAL_PATH:
+        open_trade_journal(TRADE_JOURNAL_PATH)
+    if PRICE_ARCHIVE_DIR:
+        start_price_archiver(PRICE_ARCHIVE_DIR)
+    start_settlement_resume()
+    start_close_scheduler()
     
     # Create app with styling
     app, rt = fast_app(
@@ -16,6 +30,142 @@ def create_app():
             Link(rel="stylesheet", href="https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600;700&display=swap"),
             Script(src="https://unpkg.com/htmx.org@1.9.6"),
             Script(src="https://cdn.jsdelivr.net/npm/chart.js"),
+            # Live prices: one EventSource for every market on the page, reopened
+            # when htmx swaps in cards for other markets. Charts load their series
+            # from /market/{id}/series as they scroll into view, then follow the
+            # same stream.
+            Script("""
+                (function() {
+                    let source = null;
+                    let subscribed = '';
+                    const charts = {};
+                    
+                    function timeLabel(seconds, span) {
+                        const date = new Date(seconds * 1000);
+                        const pad = n => String(n).padStart(2, '0');
+                        const day = `${pad(date.getMonth() + 1)}/${pad(date.getDate())}`;
+                        return span > 86400 ? day : `${day} ${pad(date.getHours())}:${pad(date.getMinutes())}`;
+                    }
+                    
+                    function decodeSeries(series) {
+                        // Undo the delta encoding: running sums of t and of each outcome's prices
+                        const times = new Float64Array(series.t.length);
+                        let t = 0;
+                        series.t.forEach((delta, i) => { t += delta; times[i] = t; });
+                        const lines = series.p.map(deltas => {
+                            const values = new Float64Array(deltas.length);
+                            let value = 0;
+                            deltas.forEach((delta, i) => { value += delta; values[i] = value / series.scale; });
+                            return values;
+                        });
+                        return { times, lines };
+                    }
+                    
+                    function drawChart(canvas, series) {
+                        const { times, lines } = decodeSeries(series);
+                        const span = times.length ? times[times.length - 1] - times[0] : 0;
+                        const id = canvas.dataset.marketId;
+                        if (charts[id]) charts[id].destroy();
+                        const font = { family: 'JetBrains Mono' };
+                        const chart = new Chart(canvas.getContext('2d'), {
+                            type: 'line',
+                            data: {
+                                labels: Array.from(times, t => timeLabel(t, span)),
+                                datasets: series.outcomes.map((outcome, i) => ({
+                                    label: `${outcome.label} Probability`,
+                                    outcome: outcome.outcome,
+                                    data: Array.from(lines[i]),
+                                    borderColor: outcome.color,
+                                    backgroundColor: `${outcome.color}1a`,
+                                    tension: 0.1
+                                }))
+                            },
+                            options: {
+                                responsive: true,
+                                maintainAspectRatio: false,
+                                plugins: {
+                                    legend: { display: true, position: 'top', labels: { color: '#e0e0e0', font } }
+                                },
+                                scales: {
+                                    x: {
+                                        display: true,
+                                        ticks: { display: true, color: '#888', font, autoSkip: true, maxTicksLimit: 10 },
+                                        grid: { color: '#444' },
+                                        title: { display: true, text: 'Time', color: '#888', font }
+                                    },
+                                    y: {
+                                        beginAtZero: true,
+                                        max: 1,
+                                        ticks: { color: '#888', font, callback: value => (value * 100).toFixed(0) + '%' },
+                                        grid: { color: '#444' }
+                                    }
+                                }
+                            }
+                        });
+                        chart.version = series.version;
+                        chart.span = span;
+                        charts[id] = chart;
+                    }
+                    
+                    const observer = new IntersectionObserver(function(entries) {
+                        entries.forEach(function(entry) {
+                            if (!entry.isIntersecting) return;
+                            observer.unobserve(entry.target);
+                            fetch(entry.target.dataset.series)
+                                .then(response => response.json())
+                                .then(series => drawChart(entry.target, series))
+                                .catch(error => console.error('Price series failed to load', error));
+                        });
+                    }, { rootMargin: '200px' });
+                    
+                    function observeCharts() {
+                        document.querySelectorAll('canvas[data-series]:not([data-observed])').forEach(function(canvas) {
+                            canvas.dataset.observed = '1';
+                            observer.observe(canvas);
+                        });
+                    }
+                    
+                    function apply(update) {
+                        const id = update.market_id;
+                        document.querySelectorAll(`.prices-container[data-market-id="${id}"] .price-display`).forEach(function(el) {
+                            const price = update.prices[+el.dataset.outcome];
+                            el.textContent = `${el.dataset.label}: ${(price * 100).toFixed(1)}%`;
+                        });
+                        document.querySelectorAll(`.volume-info[data-market-id="${id}"]`).forEach(function(el) {
+                            if (update.trade_count !== undefined) el.dataset.trades = update.trade_count;
+                            el.firstElementChild.textContent = `Total Trades: ${el.dataset.trades} (${update.total_shares.toFixed(1)} shares)`;
+                        });
+                        // Extend a drawn chart unless its series already includes this trade
+                        const chart = charts[id];
+                        if (chart && chart.canvas.isConnected && update.trade_count > chart.version) {
+                            chart.version = update.trade_count;
+                            chart.data.labels.push(timeLabel(Date.now() / 1000, chart.span));
+                            chart.data.datasets.forEach(dataset => dataset.data.push(update.prices[dataset.outcome]));
+                            chart.update('none');
+                        }
+                    }
+                    
+                    function subscribe() {
+                        const ids = [...new Set(Array.from(
+                            document.querySelectorAll('.prices-container[data-market-id]'),
+                            el => el.dataset.marketId
+                        ))].sort().join(',');
+                        if (ids === subscribed) return;
+                        subscribed = ids;
+                        if (source) source.close();
+                        source = ids ? new EventSource('/prices/stream?markets=' + ids) : null;
+                        if (source) source.onmessage = event => apply(JSON.parse(event.data));
+                    }
+                    
+                    function refresh() {
+                        observeCharts();
+                        subscribe();
+                    }
+                    
+                    document.addEventListener('DOMContentLoaded', refresh);
+                    document.addEventListener('htmx:afterSettle', refresh);
+                })();
+            """),
             Style("""
                 :root {
                     --primary: #c0392b;
@@ -123,6 +273,16 @@ def create_app():
                     border: 1px solid var(--border);
                 }
                 
+                .prices-container.categorical {
+                    flex-wrap: wrap;
+                }
+                
+                .prices-container.categorical .price-display {
+                    flex: 1 1 30%;
+                    font-size: 0.95rem;
+                    padding: 10px;
+                }
+                
                 .price-display.yes {
                     color: var(--secondary);
                     border-left: 3px solid var(--secondary);
@@ -279,6 +439,11 @@ def create_app():
                     width: 100%;
                 }
                 
+                .markets-sentinel {
+                    grid-column: 1 / -1;
+                    height: 1px;
+                }
+                
                 #market-search {
                     transition: border-color 0.2s ease;
                 }
@@ -360,5 +525,8 @@ def create_app():
     
     # Register routes
     register_market_routes(app, rt)
+    register_analytics_routes(app, rt)
+    register_stream_routes(app, rt)
+    register_portfolio_routes(app, rt)
     
     return app, rt
\ No newline at end of file
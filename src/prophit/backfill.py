@@ -0,0 +1,22 @@
+"""One-off backfill of initial price points for existing databases.
+
+Markets record a price point at their starting prices when they are created,
+and page views no longer write one on demand. Run this once against a
+database with markets from before then, so every chart has a starting point:
+
+    python -m src.prophit.backfill
+"""
+from .models.database import init_database, get_write_db
+from .utils.price_series import backfill_initial_prices
+
+
+def main():
+    init_database()
+    with get_write_db() as db:
+        count = backfill_initial_prices(db)
+        db.commit()
+    print(f"Recorded an initial price point for {count} markets")
+
+
+if __name__ == "__main__":
+    main()
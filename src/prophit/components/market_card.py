@@ -1,66 +1,113 @@
 from fasthtml.common import *
-from ..utils.lmsr import LMSRCalculator
-from ..constants import DEFAULT_TRADE_QUANTITY
-from ..models.database import get_db, Position
+from ..services.fragment_cache import card_cache
+from ..utils.market_stats import MarketSummary, load_market_summaries
+from ..constants import DEFAULT_TRADE_QUANTITY, BINARY_OUTCOMES, BINARY_OUTCOME_LABELS
 
 
-def market_card(market_id: int, question: str, status: str = "active", show_plot: bool = False):
-    """Display a market with current prices and trading interface"""
-    calculator = LMSRCalculator()
-    shares = calculator.get_current_shares(market_id)
-    prices = calculator.calculate_prices(shares)
+def market_card(market_id: int, question: str, status: str = "active", show_plot: bool = False, summary: MarketSummary = None):
+    """Display a market with current prices and trading interface
     
-    # Calculate total trade volume and total shares
-    with get_db() as db:
-        total_volume = db.query(Position).filter(Position.market_id == market_id).count()
-        if total_volume == 0:
-            total_volume = 0
-        
-        # Calculate total shares (sum of all shares across all positions)
-        total_shares_result = db.query(Position).filter(Position.market_id == market_id).all()
-        total_shares = sum(pos.shares for pos in total_shares_result) if total_shares_result else 0
+    Pass a preloaded summary (see load_market_summaries) when rendering many
+    cards; otherwise the card loads its own. The rendered HTML is cached per
+    market version (its trade count) and status, so an unchanged card is
+    served without rebuilding its component tree.
+    """
+    if summary is None:
+        summary = load_market_summaries([market_id])[market_id]
+    key = (market_id, summary.trade_count, status, show_plot)
+    return NotStr(card_cache.get_or_render(
+        key, lambda: to_xml(_market_card(market_id, question, status, show_plot, summary), indent=False)
+    ))
+
+
+def _market_card(market_id: int, question: str, status: str, show_plot: bool, summary: MarketSummary):
+    prices = summary.prices
+    total_volume = summary.trade_count
+    total_shares = summary.total_shares
     
     # Create the question display - always make it a clickable link
     question_display = H3(A(question, href=f"/market/{market_id}"))
     
     return Div(
         question_display,
-        Div(
-            Div(f"Yes: {prices[1]:.1%}", cls="price-display yes"),
-            Div(f"No: {prices[0]:.1%}", cls="price-display no"),
-            cls="prices-container"
-        ),
+        outcome_prices(summary.outcomes, prices, market_id),
         Div(
             Div(f"Total Trades: {total_volume} ({total_shares:.1f} shares)"),
-            cls="volume-info"
+            cls="volume-info",
+            **{"data-market-id": str(market_id), "data-trades": str(total_volume)}
         ),
         # Show plot if requested
         Div(
             H3("Probability Over Time"),
             Div(
-                Canvas(id=f"priceChart-{market_id}", style="width: 100%; height: 250px;"),
+                # Drawn once scrolled into view, from the series for this trade count
+                Canvas(id=f"priceChart-{market_id}", style="width: 100%; height: 250px;",
+                       **{"data-market-id": str(market_id), "data-series": f"/market/{market_id}/series?v={total_volume}"}),
                 cls="chart-container",
                 style="height: 250px; width: 100%;"
             ),
             style="margin: 20px 0;"
         ) if show_plot else None,
-        trade_form(market_id) if status == "active" else None,
+        trade_form(market_id, summary.outcomes) if status == "active" else None,
         cls="market-card"
     )
 
 
-def trade_form(market_id: int):
+def is_binary(outcomes):
+    return outcomes == BINARY_OUTCOME_LABELS
+
+
+def outcome_prices(outcomes, prices, market_id: int = None):
+    """Current price of every outcome; binary markets show Yes before No.
+    
+    With a market_id the prices are kept live from /prices/stream.
+    """
+    def price_display(label, outcome, cls="price-display"):
+        return Div(f"{label}: {prices[outcome]:.1%}", cls=cls,
+                   **{"data-outcome": str(outcome), "data-label": label})
+    
+    live = {"data-market-id": str(market_id)} if market_id is not None else {}
+    if is_binary(outcomes):
+        return Div(
+            price_display("Yes", BINARY_OUTCOMES['YES'], "price-display yes"),
+            price_display("No", BINARY_OUTCOMES['NO'], "price-display no"),
+            cls="prices-container",
+            **live
+        )
+    return Div(
+        *[price_display(label, outcome) for outcome, label in enumerate(outcomes)],
+        cls="prices-container categorical",
+        **live
+    )
+
+
+def trade_form(market_id: int, outcomes=BINARY_OUTCOME_LABELS):
     """Trading form for a market"""
-    return Form(
-        Div(
+    if is_binary(outcomes):
+        buttons = [
             Button("Yes", 
                    type="button", 
                    cls="outcome-btn yes",
-                   **{"data-market-id": str(market_id), "data-outcome": "1"}),
+                   **{"data-market-id": str(market_id), "data-outcome": str(BINARY_OUTCOMES["YES"])}),
             Button("No", 
                    type="button", 
                    cls="outcome-btn no",
-                   **{"data-market-id": str(market_id), "data-outcome": "0"}),
+                   **{"data-market-id": str(market_id), "data-outcome": str(BINARY_OUTCOMES["NO"])}),
+        ]
+        default_outcome = BINARY_OUTCOMES["YES"]
+    else:
+        buttons = [
+            Button(label, 
+                   type="button", 
+                   cls="outcome-btn",
+                   **{"data-market-id": str(market_id), "data-outcome": str(outcome)})
+            for outcome, label in enumerate(outcomes)
+        ]
+        default_outcome = 0
+    
+    return Form(
+        Div(
+            *buttons,
             Input(type="number", 
                   name="quantity", 
                   placeholder="Shares", 
@@ -69,7 +116,7 @@ def trade_form(market_id: int):
                   value=str(int(DEFAULT_TRADE_QUANTITY)),
                   cls="quantity-input"),
             Button("Buy Shares", type="submit", cls="buy-btn"),
-            Input(type="hidden", name="outcome", value="1"),
+            Input(type="hidden", name="outcome", value=str(default_outcome)),
             cls="trade-form"
         ),
         hx_post=f"/trade/{market_id}",
@@ -1,5 +1,83 @@
+import os
+
 # Database Configuration
-DATABASE_URL = "sqlite:///prophit.db"
+DATABASE_URL = os.environ.get("PROPHIT_DATABASE_URL", "sqlite:///prophit.db")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+MEMORY_DATABASE_NAME = "prophit"  # shared-cache name an in-memory DATABASE_URL is opened under
+
+# Connection settings by profile (PROPHIT_DB_PROFILE). Pragmas run on every
+# new connection; pool sizes apply per engine, per process, and should cover
+# uvicorn's threadpool (40 threads) for the sync engine under load.
+# WAL with synchronous=NORMAL stays consistent after a crash but may lose the
+# last commits on power loss; the trade journal fsyncs on its own.
+DATABASE_PROFILE = os.environ.get("PROPHIT_DB_PROFILE", "dev")
+DATABASE_PROFILES = {
+    # SQLite's own defaults: rollback journal, synchronous=FULL, 5 s busy wait
+    "legacy": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "dev": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+        },
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "prod": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 15000,
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64000,  # KiB, so 64 MB per connection
+            "temp_store": "MEMORY",
+        },
+        "pool_size": 40,
+        "max_overflow": 10,
+    },
+    # Throwaway databases only: commits are never fsynced
+    "bench": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "busy_timeout": 15000,
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64000,
+            "temp_store": "MEMORY",
+        },
+        "pool_size": 40,
+        "max_overflow": 10,
+    },
+}
+
+# Async request path: route handlers read through aiosqlite, and each route
+# group gets its own concurrency limit. Set PROPHIT_ASYNC_DB=0 to run reads on
+# the threadpool with blocking sessions instead, without route limits.
+ASYNC_DB = os.environ.get("PROPHIT_ASYNC_DB", "1") != "0"
+ROUTE_CONCURRENCY = {
+    "listing": 4,    # homepage and market pages: many cards and chart series each
+    "detail": 16,
+    "trade": 64,
+}
+
+# Trade journal: set a path to acknowledge trades once fsynced to an
+# append-only log and apply them to the database in grouped transactions.
+# Assumes this process is the only one trading against the database.
+TRADE_JOURNAL_PATH = os.environ.get("PROPHIT_TRADE_JOURNAL")
+TRADE_JOURNAL_GROUP_SIZE = 1000  # max entries applied per transaction
+TRADE_JOURNAL_MAX_BYTES = 64 * 1024 * 1024  # truncate once fully applied and this large
+
+# Analytics (DuckDB): "attach" reads SQLite live through DuckDB's sqlite
+# extension, "snapshot" reads Parquet copies refreshed every MAX_AGE seconds
+# in the background, "auto" attaches when the extension is already installed
+# (it never downloads one)
+ANALYTICS_SOURCE = os.environ.get("PROPHIT_ANALYTICS_SOURCE", "auto")
+ANALYTICS_SNAPSHOT_DIR = os.environ.get("PROPHIT_ANALYTICS_SNAPSHOT_DIR")  # default: analytics_snapshots/ beside the database
+ANALYTICS_SNAPSHOT_MAX_AGE = 300
 
 # LMSR Configuration
 DEFAULT_LIQUIDITY_PARAM = 100.0
@@ -19,23 +97,57 @@ MARKET_STATUSES = {
     "RESOLVED": "resolved"
 }
 
+# Settlement: a resolved market pays each winning share SETTLEMENT_PAYOUT_PER_SHARE;
+# payouts are written SETTLEMENT_CHUNK_SIZE holders per transaction
+SETTLEMENT_PAYOUT_PER_SHARE = 1.0
+SETTLEMENT_CHUNK_SIZE = 10_000
+
 # Trading Configuration
 MIN_TRADE_QUANTITY = 1.0
 MAX_TRADE_QUANTITY = 10000.0
 DEFAULT_TRADE_QUANTITY = 10.0
+MAX_TRADE_BATCH_SIZE = 1000  # orders per /trades/batch request
 
 # Binary Market Outcomes
 BINARY_OUTCOMES = {
     "NO": 0,
     "YES": 1
 }
+BINARY_OUTCOME_LABELS = ["No", "Yes"]  # indexed by outcome
+
+# Categorical Market Outcomes
+MIN_CATEGORICAL_OUTCOMES = 2
+MAX_CATEGORICAL_OUTCOMES = 100
 
 # User Configuration
 DEFAULT_USER_ID = "user123"  # TODO: Replace with actual authentication
 
 # UI Configuration
 MAX_MARKETS_PER_PAGE = 50
-MARKET_CARD_REFRESH_INTERVAL = 5000  # milliseconds
+
+# Live prices: cards subscribe to /prices/stream (Server-Sent Events) and are
+# pushed each committed trade's prices instead of polling
+PRICE_STREAM_KEEPALIVE = 15  # seconds between keepalive comments on an idle stream
+PRICE_STREAM_MAX_MARKETS = 1000  # markets one stream may subscribe to
+
+# Cache Configuration
+MARKET_CACHE_SIZE = 10000  # markets kept in the in-process state cache
+CARD_CACHE_MAX_BYTES = 16 * 1024 * 1024  # rendered market card HTML kept in memory
+
+# Price History Configuration
+PRICE_ROLLUP_RESOLUTIONS = [60, 3600, 86400]  # seconds, finest first
+MAX_CHART_POINTS = 200
+RAW_SERIES_LIMIT = 1000  # raw rows a chart may read before switching to rollups
+SERIES_PRICE_SCALE = 10000  # /market/{id}/series sends prices as integers in 1/10000ths
+SERIES_CACHE_MAX_AGE = 60  # seconds; series URLs carry the trade count, so a version never changes
+
+# Price history archive: rows older than PRICE_ARCHIVE_AFTER_DAYS are moved out
+# of SQLite into Parquet files under PRICE_ARCHIVE_DIR, partitioned by market
+# and month, every PRICE_ARCHIVE_INTERVAL seconds. Unset to keep it all in SQLite.
+PRICE_ARCHIVE_DIR = os.environ.get("PROPHIT_PRICE_ARCHIVE_DIR")
+PRICE_ARCHIVE_AFTER_DAYS = 30
+PRICE_ARCHIVE_INTERVAL = 3600
+PRICE_ARCHIVE_BATCH_ROWS = 100_000  # rows per market moved in one transaction
 
 # Color Scheme (Flat UI Colors)
 COLORS = {
@@ -53,6 +165,13 @@ COLORS = {
     "YELLOW": "#ffc048"         # Yellow
 }
 
+# Chart line colors per outcome: binary markets use Yes/No, categorical ones cycle the palette
+BINARY_OUTCOME_COLORS = ["#f85149", "#56d364"]  # No, Yes
+OUTCOME_PALETTE = [
+    "#56d364", "#f85149", "#58a6ff", "#d29922", "#bc8cff",
+    "#39c5cf", "#ff7b72", "#a5d6ff", "#e3b341", "#db61a2"
+]
+
 # Database Defaults
 DEFAULT_MARKET_TYPE = MARKET_TYPES["BINARY"]
 DEFAULT_MARKET_STATUS = MARKET_STATUSES["ACTIVE"]
\ No newline at end of file
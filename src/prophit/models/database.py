@@ -1,17 +1,27 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, func
+from sqlalchemy import create_engine, make_url, event, Column, Integer, String, Float, DateTime, ForeignKey, Index, func, literal_column
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from ..constants import (
     DATABASE_URL, 
+    ASYNC_DATABASE_URL,
+    ASYNC_DB,
+    DATABASE_PROFILE,
+    DATABASE_PROFILES,
+    MEMORY_DATABASE_NAME,
     DEFAULT_LIQUIDITY_PARAM, 
     DEFAULT_MARKET_TYPE, 
-    DEFAULT_MARKET_STATUS
+    DEFAULT_MARKET_STATUS,
+    MARKET_STATUSES
 )
 
 Base = declarative_base()
 
+
 class Market(Base):
     __tablename__ = 'markets'
     
@@ -26,6 +36,13 @@ class Market(Base):
     
     # Relationship to positions
     positions = relationship("Position", back_populates="market")
+    
+    __table_args__ = (
+        # Keyset pagination order; created_at mixes text formats, so index the normalized form
+        Index('ix_markets_created_at_key', func.strftime(literal_column("'%Y-%m-%d %H:%M:%f'"), created_at), id),
+        # Open markets by close time, for rebuilding the close scheduler
+        Index('ix_markets_active_resolution_date', resolution_date, sqlite_where=status == MARKET_STATUSES["ACTIVE"]),
+    )
 
 
 class Position(Base):
@@ -41,6 +58,11 @@ class Position(Base):
     
     # Relationship to market
     market = relationship("Market", back_populates="positions")
+    
+    __table_args__ = (
+        Index('ix_positions_market_outcome', 'market_id', 'outcome'),
+        Index('ix_positions_user_market', 'user_id', 'market_id'),
+    )
 
 
 class PriceHistory(Base):
@@ -48,21 +70,191 @@ class PriceHistory(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     market_id = Column(Integer, ForeignKey('markets.id'), nullable=False)
-    yes_price = Column(Float, nullable=False)
-    no_price = Column(Float, nullable=False)
     timestamp = Column(DateTime, default=func.now())
     
     # Relationship to market
     market = relationship("Market")
+    
+    __table_args__ = (
+        Index('ix_price_history_market_timestamp', 'market_id', 'timestamp'),
+    )
+
+
+class PriceHistoryValue(Base):
+    """One outcome's price at a price_history point"""
+    __tablename__ = 'price_history_values'
+    
+    point_id = Column(Integer, ForeignKey('price_history.id'), primary_key=True)
+    outcome = Column(Integer, primary_key=True)
+    price = Column(Float, nullable=False)
+    
+    # Clustered on the primary key: a point's prices are one contiguous range
+    __table_args__ = {'sqlite_with_rowid': False}
+
+
+class MarketOutcome(Base):
+    """A market's outcomes, with running share totals kept in step with positions"""
+    __tablename__ = 'market_outcomes'
+    
+    market_id = Column(Integer, ForeignKey('markets.id'), primary_key=True)
+    outcome = Column(Integer, primary_key=True)
+    label = Column(String)
+    shares = Column(Float, default=0.0, nullable=False)
+    trade_count = Column(Integer, default=0, nullable=False)
+
+
+class Holding(Base):
+    """A user's net shares and cost basis in one market outcome, kept in step with positions"""
+    __tablename__ = 'holdings'
+    
+    user_id = Column(String, primary_key=True)
+    market_id = Column(Integer, ForeignKey('markets.id'), primary_key=True)
+    outcome = Column(Integer, primary_key=True)
+    shares = Column(Float, default=0.0, nullable=False)
+    cost = Column(Float, default=0.0, nullable=False)
+    trade_count = Column(Integer, default=0, nullable=False)
+    
+    # Clustered on the primary key: a user's holdings are one contiguous range
+    __table_args__ = (
+        # A market's holders, in user order, for settlement
+        Index('ix_holdings_market_user', 'market_id', 'user_id'),
+        {'sqlite_with_rowid': False},
+    )
+
+
+class Settlement(Base):
+    """One user's payout from a resolved market, written by the settlement job"""
+    __tablename__ = 'settlements'
+    
+    market_id = Column(Integer, ForeignKey('markets.id'), primary_key=True)
+    user_id = Column(String, primary_key=True)
+    winning_shares = Column(Float, nullable=False)
+    cost = Column(Float, nullable=False)
+    payout = Column(Float, nullable=False)
+    settled_at = Column(DateTime, nullable=False)
+    
+    # Clustered by market, then user: settlement resumes after the highest user_id written
+    __table_args__ = {'sqlite_with_rowid': False}
+
+
+class PriceRollup(Base):
+    """Per-outcome OHLC price bucket at a fixed resolution, updated on every trade"""
+    __tablename__ = 'price_rollups'
+    
+    market_id = Column(Integer, ForeignKey('markets.id'), primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # bucket width in seconds
+    bucket_start = Column(DateTime, primary_key=True)
+    outcome = Column(Integer, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    count = Column(Integer, default=1, nullable=False)
+
+
+class JournalCheckpoint(Base):
+    """Highest trade journal sequence number applied to the database"""
+    __tablename__ = 'journal_checkpoints'
+    
+    name = Column(String, primary_key=True)
+    applied_seq = Column(Integer, nullable=False, default=0)
+
+
+class PriceArchiveWatermark(Base):
+    """Highest price_history id per market whose archived rows are in the Parquet archive"""
+    __tablename__ = 'price_archive_watermarks'
+    
+    market_id = Column(Integer, ForeignKey('markets.id'), primary_key=True)
+    archived_through_id = Column(Integer, nullable=False)
 
 
 # Database setup
-engine = create_engine(DATABASE_URL)
+
+
+def _install_connection_hooks(sync_engine, pragmas):
+    @event.listens_for(sync_engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        # pysqlite only opens transactions before DML; let SQLAlchemy emit BEGIN
+        # itself so DDL in migrations is transactional too
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    
+    @event.listens_for(sync_engine, "begin")
+    def _begin_transaction(connection):
+        mode = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+        connection.exec_driver_sql(f"BEGIN {mode}")
+
+
+def is_memory_url(url: str) -> bool:
+    """Whether a SQLite URL names an in-memory database"""
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = DATABASE_PROFILE, use_async: bool = False,
+                read_only: bool = False):
+    """Create a sync (or aiosqlite) engine configured by a DATABASE_PROFILES entry.
+    
+    A read_only engine's connections refuse every write (PRAGMA query_only).
+    An in-memory URL is opened as a named shared-cache database, so the sync
+    and aiosqlite engines and all their pooled connections see one database
+    (it lives as long as any of them is open). SQLAlchemy would otherwise
+    give it a SingletonThreadPool, which takes no pool sizing.
+    """
+    settings = DATABASE_PROFILES[profile]
+    pragmas = dict(settings["pragmas"], query_only="ON") if read_only else settings["pragmas"]
+    factory = create_async_engine if use_async else create_engine
+    options = {}
+    if is_memory_url(url):
+        url = make_url(url).set(
+            database=f"file:{MEMORY_DATABASE_NAME}",
+            query={"mode": "memory", "cache": "shared", "uri": "true"}
+        )
+        options = {
+            "poolclass": AsyncAdaptedQueuePool if use_async else QueuePool,
+            "connect_args": {"check_same_thread": False}
+        }
+    new_engine = factory(url, pool_size=settings["pool_size"], max_overflow=settings["max_overflow"], **options)
+    _install_connection_hooks(new_engine.sync_engine if use_async else new_engine, pragmas)
+    return new_engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessions that take SQLite's write lock when their transaction starts, so
+# whatever they read cannot change before they commit
+WriteSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine.execution_options(sqlite_begin="IMMEDIATE")
+)
+
+
+# Same database through aiosqlite, for handlers running on the event loop
+async_engine = make_engine(ASYNC_DATABASE_URL, use_async=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Page views read through engines of their own whose connections cannot
+# write: they never take the write lock, and never hold a pooled connection
+# a trade is waiting for. Under WAL their reads do not block commits either.
+# An in-memory database has no WAL to read through, so it shares the
+# write engines.
+if is_memory_url(DATABASE_URL):
+    read_engine, async_read_engine = engine, async_engine
+else:
+    read_engine = make_engine(read_only=True)
+    async_read_engine = make_engine(ASYNC_DATABASE_URL, use_async=True, read_only=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
 def init_database():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date"""
+    from .migrations import run_migrations
+    run_migrations(engine)
 
 @contextmanager
 def get_db():
@@ -71,4 +263,63 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def get_write_db():
+    """Get a session whose transaction holds the database write lock.
+    
+    Use for read-modify-write sequences; the caller still commits.
+    """
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def get_read_db():
+    """Get a read-only session; any write through it fails"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def get_async_db():
+    """Get an async (aiosqlite) database session with context manager"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _run_with_db(fn, *args, **kwargs):
+    with get_db() as db:
+        return fn(db, *args, **kwargs)
+
+
+async def run_db(fn, *args, **kwargs):
+    """Call fn(db, *args, **kwargs) with a session, without blocking the event loop.
+    
+    fn is ordinary synchronous ORM code. With ASYNC_DB it runs on an aiosqlite
+    connection (AsyncSession.run_sync), otherwise in the threadpool with a
+    blocking session. Anything fn calls that needs the database must use the
+    db it is given.
+    """
+    if ASYNC_DB:
+        async with get_async_db() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_with_db, fn, *args, **kwargs)
+
+
+def _run_with_read_db(fn, *args, **kwargs):
+    with get_read_db() as db:
+        return fn(db, *args, **kwargs)
+
+
+async def run_read_db(fn, *args, **kwargs):
+    """run_db on a read-only session, for handlers that only read"""
+    if ASYNC_DB:
+        async with AsyncReadSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_with_read_db, fn, *args, **kwargs)
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from .database import Holding, Position
+
+
+def add_holdings(db, deltas: List[Dict]):
+    """Fold (user_id, market_id, outcome, shares, cost, trade_count) deltas into holdings in one executemany"""
+    stmt = insert(Holding)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Holding.user_id, Holding.market_id, Holding.outcome],
+        set_={
+            "shares": Holding.shares + stmt.excluded.shares,
+            "cost": Holding.cost + stmt.excluded.cost,
+            "trade_count": Holding.trade_count + stmt.excluded.trade_count
+        }
+    )
+    db.execute(stmt, deltas)
+
+
+def holding_deltas(positions: List[Dict]) -> List[Dict]:
+    """Sum position rows (dicts with user_id, market_id, outcome, shares, cost) per holding"""
+    deltas = {}
+    for position in positions:
+        key = (position["user_id"], position["market_id"], position["outcome"])
+        delta = deltas.setdefault(key, {
+            "user_id": key[0],
+            "market_id": key[1],
+            "outcome": key[2],
+            "shares": 0.0,
+            "cost": 0.0,
+            "trade_count": 0
+        })
+        delta["shares"] += position["shares"]
+        delta["cost"] += position["cost"]
+        delta["trade_count"] += 1
+    return list(deltas.values())
+
+
+def _aggregate(user_id: Optional[str] = None):
+    query = select(
+        Position.user_id,
+        Position.market_id,
+        Position.outcome,
+        func.sum(Position.shares),
+        func.sum(Position.cost),
+        func.count(Position.id)
+    )
+    if user_id is not None:
+        query = query.where(Position.user_id == user_id)
+    return query.group_by(Position.user_id, Position.market_id, Position.outcome)
+
+
+def rebuild_holdings(db, user_id: Optional[str] = None):
+    """Replace holdings (of one user, or everyone) with a fresh aggregate over positions.
+    
+    Runs as one INSERT ... SELECT, so positions never pass through Python.
+    """
+    reset = db.query(Holding)
+    if user_id is not None:
+        reset = reset.filter(Holding.user_id == user_id)
+    reset.delete(synchronize_session=False)
+    db.execute(insert(Holding).from_select(
+        ["user_id", "market_id", "outcome", "shares", "cost", "trade_count"],
+        _aggregate(user_id)
+    ))
+    db.flush()
+
+
+def check_holdings(db, user_id: Optional[str] = None, tolerance: float = 1e-6, repair: bool = False):
+    """Compare stored holdings against positions.
+    
+    Returns a list of (user_id, market_id, outcome, stored_shares, actual_shares)
+    for every mismatch. With repair=True the affected users are rebuilt in the
+    caller's session.
+    """
+    stored_query = db.query(Holding)
+    if user_id is not None:
+        stored_query = stored_query.filter(Holding.user_id == user_id)
+    stored = {(row.user_id, row.market_id, row.outcome): row for row in stored_query.all()}
+    
+    mismatches = []
+    for u_id, m_id, outcome, shares, cost, trade_count in db.execute(_aggregate(user_id)):
+        row = stored.pop((u_id, m_id, outcome), None)
+        if (row is None or abs(row.shares - shares) > tolerance or abs(row.cost - cost) > tolerance
+                or row.trade_count != trade_count):
+            mismatches.append((u_id, m_id, outcome, row.shares if row else None, shares))
+    
+    # Holdings with no backing positions at all
+    for (u_id, m_id, outcome), row in stored.items():
+        mismatches.append((u_id, m_id, outcome, row.shares, 0.0))
+    
+    if repair:
+        for u_id in sorted({m[0] for m in mismatches}):
+            rebuild_holdings(db, u_id)
+    
+    return mismatches
@@ -1,9 +1,10 @@
 # SQLAlchemy models are now in database.py
 # This file can be removed or used for Pydantic schemas for API validation
 
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
+from ..constants import MAX_TRADE_BATCH_SIZE
 
 
 class MarketCreate(BaseModel):
@@ -45,4 +46,14 @@ class PositionResponse(BaseModel):
     timestamp: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderCreate(BaseModel):
+    market_id: int
+    outcome: int
+    quantity: float
+
+
+class TradeBatchRequest(BaseModel):
+    orders: List[OrderCreate] = Field(min_length=1, max_length=MAX_TRADE_BATCH_SIZE)
@@ -0,0 +1,216 @@
+from sqlalchemy import inspect, text
+import numpy as np
+from .database import Base, Market, Position, PriceHistory, PriceHistoryValue, MarketOutcome, PriceRollup, JournalCheckpoint, PriceArchiveWatermark, Holding, Settlement
+from ..constants import BINARY_OUTCOME_LABELS, MARKET_TYPES
+
+
+# Migrations are applied in order inside their own transaction and recorded in
+# SQLite's PRAGMA user_version. Never edit a released migration; append a new one.
+
+def _baseline(connection):
+    """Tables as of the first versioned release, plus their derived data"""
+    from .search_index import create_search_index
+    from .outcome_totals import rebuild_outcome_totals
+    from sqlalchemy.orm import Session
+    
+    Base.metadata.create_all(bind=connection)
+    create_search_index(connection)
+    
+    # Databases created before the derived tables existed need them seeded;
+    # price rollups are seeded by migration 9 once history has its final shape
+    db = Session(bind=connection)
+    if db.query(MarketOutcome).first() is None and db.query(Position).first() is not None:
+        rebuild_outcome_totals(db)
+    db.flush()
+
+
+def _hot_query_indexes(connection):
+    """Indexes for per-market aggregation, history reads and per-user lookups"""
+    for table in (Market.__table__, Position.__table__, PriceHistory.__table__):
+        for index in table.indexes:
+            create_index_if_missing(connection, index)
+
+
+def _categorical_outcomes(connection):
+    """Outcome rows for every market, and price history as packed vectors"""
+    add_column_if_missing(connection, "market_outcomes", "label VARCHAR")
+    
+    # Binary markets get explicit No/Yes outcome rows
+    for outcome, label in enumerate(BINARY_OUTCOME_LABELS):
+        connection.execute(text("""
+            INSERT OR IGNORE INTO market_outcomes (market_id, outcome, shares, trade_count)
+            SELECT id, :outcome, 0.0, 0 FROM markets WHERE type = :binary
+        """), {"outcome": outcome, "binary": MARKET_TYPES["BINARY"]})
+        connection.execute(text("""
+            UPDATE market_outcomes SET label = :label
+            WHERE outcome = :outcome AND label IS NULL
+              AND market_id IN (SELECT id FROM markets WHERE type = :binary)
+        """), {"outcome": outcome, "label": label, "binary": MARKET_TYPES["BINARY"]})
+    
+    # Replace yes_price/no_price with one packed prices column
+    columns = {column["name"] for column in inspect(connection).get_columns("price_history")}
+    if "yes_price" in columns:
+        connection.execute(text("""
+            CREATE TABLE price_history_new (
+                id INTEGER NOT NULL PRIMARY KEY,
+                market_id INTEGER NOT NULL REFERENCES markets (id),
+                prices BLOB NOT NULL,
+                timestamp DATETIME
+            )
+        """))
+        rows = connection.execute(text(
+            "SELECT id, market_id, no_price, yes_price, timestamp FROM price_history ORDER BY id"
+        ))
+        while True:
+            chunk = rows.fetchmany(10000)
+            if not chunk:
+                break
+            connection.execute(text(
+                "INSERT INTO price_history_new (id, market_id, prices, timestamp) "
+                "VALUES (:id, :market_id, :prices, :timestamp)"
+            ), [
+                {
+                    "id": row.id,
+                    "market_id": row.market_id,
+                    "prices": np.asarray([row.no_price, row.yes_price], dtype='<f8').tobytes(),
+                    "timestamp": row.timestamp
+                }
+                for row in chunk
+            ])
+        connection.execute(text("DROP TABLE price_history"))
+        connection.execute(text("ALTER TABLE price_history_new RENAME TO price_history"))
+        for index in PriceHistory.__table__.indexes:
+            create_index_if_missing(connection, index)
+
+
+def _journal_checkpoints(connection):
+    """Checkpoint table for the write-ahead trade journal"""
+    JournalCheckpoint.__table__.create(bind=connection, checkfirst=True)
+
+
+def _price_archive_watermarks(connection):
+    """Watermark table for price history moved to the Parquet archive"""
+    PriceArchiveWatermark.__table__.create(bind=connection, checkfirst=True)
+
+
+def _portfolio_holdings(connection):
+    """Per-user holdings table, seeded from existing positions"""
+    from sqlalchemy.orm import Session
+    from .holdings import rebuild_holdings
+    
+    Holding.__table__.create(bind=connection, checkfirst=True)
+    db = Session(bind=connection)
+    if db.query(Holding).first() is None and db.query(Position).first() is not None:
+        rebuild_holdings(db)
+    db.flush()
+
+
+def _settlements(connection):
+    """Settlement records, and the index settlement reads a market's holders through"""
+    Settlement.__table__.create(bind=connection, checkfirst=True)
+    for index in Holding.__table__.indexes:
+        create_index_if_missing(connection, index)
+
+
+def _close_schedule_index(connection):
+    """Partial index of open markets by resolution date"""
+    for index in Market.__table__.indexes:
+        create_index_if_missing(connection, index)
+
+
+def _narrow_price_history(connection):
+    """Price history as one (point, outcome, price) row per outcome instead of packed vectors"""
+    from sqlalchemy.orm import Session
+    from ..utils.price_series import rebuild_price_rollups
+    
+    PriceHistoryValue.__table__.create(bind=connection, checkfirst=True)
+    columns = {column["name"] for column in inspect(connection).get_columns("price_history")}
+    if "prices" in columns:
+        rows = connection.execute(text("SELECT id, prices FROM price_history ORDER BY id"))
+        while True:
+            chunk = rows.fetchmany(10000)
+            if not chunk:
+                break
+            connection.execute(text(
+                "INSERT INTO price_history_values (point_id, outcome, price) VALUES (:point_id, :outcome, :price)"
+            ), [
+                {"point_id": row.id, "outcome": outcome, "price": price}
+                for row in chunk
+                for outcome, price in enumerate(np.frombuffer(row.prices, dtype='<f8').tolist())
+            ])
+        connection.execute(text("""
+            CREATE TABLE price_history_new (
+                id INTEGER NOT NULL PRIMARY KEY,
+                market_id INTEGER NOT NULL REFERENCES markets (id),
+                timestamp DATETIME
+            )
+        """))
+        connection.execute(text(
+            "INSERT INTO price_history_new (id, market_id, timestamp) SELECT id, market_id, timestamp FROM price_history"
+        ))
+        connection.execute(text("DROP TABLE price_history"))
+        connection.execute(text("ALTER TABLE price_history_new RENAME TO price_history"))
+        for index in PriceHistory.__table__.indexes:
+            create_index_if_missing(connection, index)
+    
+    db = Session(bind=connection)
+    if db.query(PriceRollup).first() is None and db.query(PriceHistory).first() is not None:
+        rebuild_price_rollups(db)
+    db.flush()
+
+
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "hot query indexes", _hot_query_indexes),
+    (3, "categorical outcomes", _categorical_outcomes),
+    (4, "trade journal checkpoints", _journal_checkpoints),
+    (5, "price archive watermarks", _price_archive_watermarks),
+    (6, "portfolio holdings", _portfolio_holdings),
+    (7, "market settlements", _settlements),
+    (8, "close schedule index", _close_schedule_index),
+    (9, "narrow price history", _narrow_price_history),
+]
+
+
+def get_schema_version(connection) -> int:
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def add_column_if_missing(connection, table: str, column_ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists.
+    
+    Fresh databases get every column from the baseline create_all, so later
+    migrations that add columns must tolerate them being there already.
+    """
+    name = column_ddl.split()[0]
+    columns = {column["name"] for column in inspect(connection).get_columns(table)}
+    if name not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column_ddl}"))
+
+
+def create_index_if_missing(connection, index):
+    """Create a declared Index unless one with its name exists.
+    
+    Inspector-based checkfirst does not see expression indexes, so look the
+    name up in sqlite_master directly.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+        {"name": index.name}
+    ).first()
+    if not exists:
+        index.create(bind=connection)
+
+
+def run_migrations(engine):
+    """Apply every migration newer than the database's recorded version"""
+    with engine.connect() as connection:
+        current = get_schema_version(connection)
+    
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(text(f"PRAGMA user_version = {version}"))
+        print(f"DEBUG: Applied migration {version}: {description}")
@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from .database import MarketOutcome, Position
+from .holdings import add_holdings
+
+
+def record_position(db, position: Position):
+    """Add a position and fold it into the market's outcome totals and the
+    user's holdings.
+    
+    All writes go through the caller's session, so they commit (or roll back)
+    together.
+    """
+    db.add(position)
+    add_outcome_totals(db, [{
+        "market_id": position.market_id,
+        "outcome": position.outcome,
+        "shares": position.shares,
+        "trade_count": 1
+    }])
+    add_holdings(db, [{
+        "user_id": position.user_id,
+        "market_id": position.market_id,
+        "outcome": position.outcome,
+        "shares": position.shares,
+        "cost": position.cost,
+        "trade_count": 1
+    }])
+
+
+def add_outcome_totals(db, deltas: List[Dict]):
+    """Fold (market_id, outcome, shares, trade_count) deltas into the totals in one executemany"""
+    stmt = insert(MarketOutcome)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MarketOutcome.market_id, MarketOutcome.outcome],
+        set_={
+            "shares": MarketOutcome.shares + stmt.excluded.shares,
+            "trade_count": MarketOutcome.trade_count + stmt.excluded.trade_count
+        }
+    )
+    db.execute(stmt, deltas)
+
+
+def create_outcomes(db, market_id: int, labels: List[str]):
+    """Create a market's outcome rows, one per label, with zero shares"""
+    db.add_all([
+        MarketOutcome(market_id=market_id, outcome=outcome, label=label, shares=0.0, trade_count=0)
+        for outcome, label in enumerate(labels)
+    ])
+
+
+def aggregate_positions(db, market_id: Optional[int] = None) -> List[Tuple[int, int, float, int]]:
+    """Recompute (market_id, outcome, shares, trade_count) from the positions table"""
+    query = db.query(
+        Position.market_id,
+        Position.outcome,
+        func.sum(Position.shares),
+        func.count(Position.id)
+    )
+    if market_id is not None:
+        query = query.filter(Position.market_id == market_id)
+    return query.group_by(Position.market_id, Position.outcome).all()
+
+
+def rebuild_outcome_totals(db, market_id: Optional[int] = None):
+    """Replace stored outcome totals with a fresh aggregate over positions.
+    
+    Outcome rows (and their labels) are kept; only the totals are reset.
+    """
+    reset = db.query(MarketOutcome)
+    if market_id is not None:
+        reset = reset.filter(MarketOutcome.market_id == market_id)
+    reset.update({"shares": 0.0, "trade_count": 0}, synchronize_session=False)
+    
+    totals = aggregate_positions(db, market_id)
+    if totals:
+        stmt = insert(MarketOutcome)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MarketOutcome.market_id, MarketOutcome.outcome],
+            set_={"shares": stmt.excluded.shares, "trade_count": stmt.excluded.trade_count}
+        )
+        db.execute(stmt, [
+            {"market_id": m_id, "outcome": outcome, "shares": shares, "trade_count": trade_count}
+            for m_id, outcome, shares, trade_count in totals
+        ])
+    db.flush()
+
+
+def check_outcome_totals(db, market_id: Optional[int] = None, tolerance: float = 1e-6, repair: bool = False):
+    """Compare stored outcome totals against positions.
+    
+    Returns a list of (market_id, outcome, stored_shares, actual_shares) for every
+    mismatch. With repair=True the affected markets are rebuilt in the caller's
+    session.
+    """
+    stored_query = db.query(MarketOutcome)
+    if market_id is not None:
+        stored_query = stored_query.filter(MarketOutcome.market_id == market_id)
+    stored = {(row.market_id, row.outcome): row for row in stored_query.all()}
+    
+    mismatches = []
+    for m_id, outcome, shares, trade_count in aggregate_positions(db, market_id):
+        row = stored.pop((m_id, outcome), None)
+        if row is None or abs(row.shares - shares) > tolerance or row.trade_count != trade_count:
+            mismatches.append((m_id, outcome, row.shares if row else None, shares))
+    
+    # Totals with no backing positions at all
+    for (m_id, outcome), row in stored.items():
+        if row.shares != 0 or row.trade_count != 0:
+            mismatches.append((m_id, outcome, row.shares, 0.0))
+    
+    if repair:
+        for m_id in sorted({m[0] for m in mismatches}):
+            rebuild_outcome_totals(db, m_id)
+    
+    return mismatches
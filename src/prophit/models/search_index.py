@@ -0,0 +1,76 @@
+import re
+from typing import List, Tuple
+from sqlalchemy import text
+from .database import Market
+
+# External-content FTS5 index over markets.question; the triggers keep it in
+# step with every insert/update/delete on markets, including /create-market.
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS markets_fts USING fts5(
+        question,
+        content='markets',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS markets_fts_insert AFTER INSERT ON markets BEGIN
+        INSERT INTO markets_fts(rowid, question) VALUES (new.id, new.question);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS markets_fts_delete AFTER DELETE ON markets BEGIN
+        INSERT INTO markets_fts(markets_fts, rowid, question) VALUES ('delete', old.id, old.question);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS markets_fts_update AFTER UPDATE OF question ON markets BEGIN
+        INSERT INTO markets_fts(markets_fts, rowid, question) VALUES ('delete', old.id, old.question);
+        INSERT INTO markets_fts(rowid, question) VALUES (new.id, new.question);
+    END
+    """,
+]
+
+
+def create_search_index(connection):
+    """Create the FTS index and its triggers, backfilling it if it is new"""
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'markets_fts'"
+    )).first()
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    """Re-derive the whole index from the markets table"""
+    connection.execute(text("INSERT INTO markets_fts(markets_fts) VALUES ('rebuild')"))
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_markets(db, query: str, limit: int, offset: int = 0) -> Tuple[List[Market], bool]:
+    """Return markets matching query ranked by relevance, and whether more follow"""
+    match = to_match_query(query)
+    if not match:
+        return [], False
+    
+    statement = text("""
+        SELECT markets.*
+        FROM markets_fts
+        JOIN markets ON markets.id = markets_fts.rowid
+        WHERE markets_fts MATCH :match
+        ORDER BY bm25(markets_fts), markets.id DESC
+        LIMIT :limit OFFSET :offset
+    """)
+    markets = db.query(Market).from_statement(statement).params(
+        match=match, limit=limit + 1, offset=offset
+    ).all()
+    return markets[:limit], len(markets) > limit
@@ -0,0 +1,39 @@
+"""One-off resolution of a market, for operators.
+
+Closes the market with its winning outcome and pays out every holder:
+
+    python -m src.prophit.resolve <market_id> <outcome>
+
+Run it while the server is stopped: a running server would keep serving
+the market from its caches, and only it can apply its own trade journal.
+A journal left by a stopped server is replayed here first. If the payout
+is interrupted, the next server start (or another run) finishes it.
+"""
+import sys
+from .models.database import init_database
+from .services.trade_engine import TradeError
+from .services.trade_journal import open_trade_journal
+from .services.settlement import resolve_market
+from .constants import TRADE_JOURNAL_PATH
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python -m src.prophit.resolve <market_id> <outcome>")
+    market_id, outcome = int(sys.argv[1]), int(sys.argv[2])
+    
+    init_database()
+    journal = open_trade_journal(TRADE_JOURNAL_PATH) if TRADE_JOURNAL_PATH else None
+    try:
+        result = resolve_market(market_id, outcome)
+    except TradeError as e:
+        sys.exit(f"Market {market_id} not resolved: {e}")
+    finally:
+        if journal is not None:
+            journal.close()
+    print(f"Resolved market {result.market_id} to outcome {result.outcome}: "
+          f"paid {result.payout:g} to {result.holders} holders")
+
+
+if __name__ == "__main__":
+    main()
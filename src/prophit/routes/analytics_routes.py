@@ -0,0 +1,34 @@
+from datetime import datetime
+from fasthtml.common import *
+from ..services.analytics import get_analytics
+
+
+def _since(since: str):
+    return datetime.fromisoformat(since) if since else None
+
+
+def register_analytics_routes(app, rt):
+    """Register JSON routes serving dashboard aggregates from DuckDB"""
+    
+    @rt("/analytics/markets")
+    def get(limit: int = 50, since: str = None):
+        """Markets by traded volume"""
+        try:
+            since = _since(since)
+        except ValueError:
+            return Response("Invalid since date", status_code=400)
+        return JSONResponse(get_analytics().market_volume(limit=limit, since=since))
+    
+    @rt("/analytics/users")
+    def get(user_id: str = None, limit: int = 50):
+        """Per-user cost basis, market value and P&L"""
+        return JSONResponse(get_analytics().user_pnl(user_id=user_id, limit=limit))
+    
+    @rt("/analytics/volatility")
+    def get(resolution: int = 3600, limit: int = 50, since: str = None):
+        """Per-outcome volatility of rollup closes, or of every recorded price with resolution=0"""
+        try:
+            since = _since(since)
+        except ValueError:
+            return Response("Invalid since date", status_code=400)
+        return JSONResponse(get_analytics().price_volatility(resolution=resolution, limit=limit, since=since))
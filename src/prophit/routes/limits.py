@@ -0,0 +1,24 @@
+import asyncio
+from functools import wraps
+from ..constants import ASYNC_DB, ROUTE_CONCURRENCY
+
+
+# One semaphore per route group, so a burst of heavy page renders queues
+# behind its own limit instead of holding every connection trades need
+_semaphores = {name: asyncio.Semaphore(limit) for name, limit in ROUTE_CONCURRENCY.items()}
+
+
+def bounded(group: str):
+    """Limit how many requests of a route group run at once (async handlers only)"""
+    semaphore = _semaphores[group]
+    
+    def decorator(handler):
+        if not ASYNC_DB:
+            return handler
+        
+        @wraps(handler)
+        async def limited(*args, **kwargs):
+            async with semaphore:
+                return await handler(*args, **kwargs)
+        return limited
+    return decorator
@@ -1,180 +1,115 @@
 from fasthtml.common import *
-from ..models.database import get_db, Market, Position, PriceHistory
-from ..components.market_card import market_card
-from ..utils.lmsr import LMSRCalculator
+from ..models.database import run_db, run_read_db, Market, MarketOutcome
+from ..services.trade_engine import execute_trade, execute_trade_batch, quote_trade, MarketNotFound, TradeError
+from ..services.market_cache import market_cache
+from ..services.close_scheduler import close_scheduler
+from .limits import bounded
+from starlette.concurrency import run_in_threadpool
+from ..models.outcome_totals import create_outcomes
+from ..models.market import TradeBatchRequest
+from ..components.market_card import market_card, outcome_prices
+from ..utils.market_stats import load_market_summaries
+from ..utils.price_series import PricePoint, load_price_series, record_price_point, utcnow
+from ..utils.market_listing import list_markets_page
+from ..models.search_index import search_markets
 from ..constants import (
     DEFAULT_USER_ID, 
+    MAX_MARKETS_PER_PAGE,
+    BINARY_OUTCOME_LABELS,
+    BINARY_OUTCOME_COLORS,
+    OUTCOME_PALETTE,
+    MIN_CATEGORICAL_OUTCOMES,
+    MAX_CATEGORICAL_OUTCOMES,
     DEFAULT_TRADE_QUANTITY, 
     MARKET_TYPES, 
     MARKET_STATUSES,
-    BINARY_OUTCOMES
+    BINARY_OUTCOMES,
+    MAX_CHART_POINTS,
+    RAW_SERIES_LIMIT,
+    PRICE_ROLLUP_RESOLUTIONS,
+    SERIES_PRICE_SCALE,
+    SERIES_CACHE_MAX_AGE
 )
 import json
-from datetime import datetime
+import numpy as np
+from dataclasses import asdict
+from datetime import datetime, timezone
+from sqlalchemy import func
+from urllib.parse import urlencode
+from pydantic import ValidationError
 
 
-def generate_homepage_charts(markets):
-    """Generate JavaScript code to initialize charts for all markets on the homepage"""
-    chart_code = []
+def series_payload(history, outcomes, version: int):
+    """Compact JSON for a chart: delta-encoded timestamps and fixed-point prices.
     
-    for market in markets:
-        with get_db() as db:
-            # Get price history for this market
-            history = db.query(PriceHistory).filter(
-                PriceHistory.market_id == market.id
-            ).order_by(PriceHistory.timestamp).all()
-            
-            print(f"DEBUG: Found {len(history)} price history entries for market {market.id}")
-            for i, h in enumerate(history):
-                print(f"  Entry {i}: {h.timestamp} - yes={h.yes_price}, no={h.no_price}")
-            
-            # If no history exists, create initial history based on current prices
-            if not history:
-                print(f"DEBUG: No price history found for market {market.id}, creating initial entry")
-                from ..utils.lmsr import LMSRCalculator
-                calculator = LMSRCalculator()
-                shares = calculator.get_current_shares(market.id)
-                prices = calculator.calculate_prices(shares)
-                
-                initial_history = PriceHistory(
-                    market_id=market.id,
-                    yes_price=prices[1],
-                    no_price=prices[0]
-                )
-                db.add(initial_history)
-                db.commit()
-                
-                # Re-fetch history after creating initial entry
-                history = db.query(PriceHistory).filter(
-                    PriceHistory.market_id == market.id
-                ).order_by(PriceHistory.timestamp).all()
-                print(f"DEBUG: Created initial price history, now have {len(history)} entries")
-            
-            # Prepare chart data
-            if history:
-                chart_data = {
-                    "labels": [h.timestamp.strftime("%m/%d") for h in history],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [h.yes_price for h in history],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [h.no_price for h in history],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
-            else:
-                # No history data, show empty chart
-                chart_data = {
-                    "labels": [],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
-            
-            # Add chart initialization code for this market
-            chart_code.append(f"""
-                const canvas{market.id} = document.getElementById('priceChart-{market.id}');
-                console.log('DEBUG: Homepage canvas {market.id} found:', canvas{market.id});
-                console.log('DEBUG: Homepage chart data {market.id}:', {json.dumps(chart_data)});
-                if (canvas{market.id}) {{
-                    const ctx{market.id} = canvas{market.id}.getContext('2d');
-                    console.log('DEBUG: Homepage canvas context {market.id}:', ctx{market.id});
-                    const chart{market.id} = new Chart(ctx{market.id}, {{
-                        type: 'line',
-                        data: {json.dumps(chart_data)},
-                        options: {{
-                            responsive: true,
-                            maintainAspectRatio: false,
-                            plugins: {{
-                                legend: {{
-                                    display: true,
-                                    position: 'top',
-                                    labels: {{
-                                        color: '#e0e0e0',
-                                        font: {{
-                                            family: 'JetBrains Mono'
-                                        }}
-                                    }}
-                                }}
-                            }},
-                            scales: {{
-                                x: {{
-                                    display: true,
-                                    ticks: {{
-                                        display: true,
-                                        color: '#888',
-                                        font: {{
-                                            family: 'JetBrains Mono'
-                                        }},
-                                        autoSkip: true,
-                                        maxTicksLimit: 10
-                                    }},
-                                    grid: {{
-                                        color: '#444'
-                                    }},
-                                    title: {{
-                                        display: true,
-                                        text: 'Time',
-                                        color: '#888',
-                                        font: {{
-                                            family: 'JetBrains Mono'
-                                        }}
-                                    }}
-                                }},
-                                y: {{
-                                    beginAtZero: true,
-                                    max: 1,
-                                    ticks: {{
-                                        color: '#888',
-                                        font: {{
-                                            family: 'JetBrains Mono'
-                                        }},
-                                        callback: function(value) {{
-                                            return (value * 100).toFixed(0) + '%';
-                                        }}
-                                    }},
-                                    grid: {{
-                                        color: '#444'
-                                    }}
-                                }}
-                            }}
-                        }}
-                    }});
-                }} else {{
-                    console.error('Homepage canvas element not found: priceChart-{market.id}');
-                }}
-            """)
+    t holds the first timestamp (epoch seconds) followed by differences; each
+    list in p holds one outcome's prices times scale, the same way. Binary
+    markets list Yes before No, each outcome with its line color.
+    """
+    binary = outcomes == BINARY_OUTCOME_LABELS
+    order = [BINARY_OUTCOMES["YES"], BINARY_OUTCOMES["NO"]] if binary else list(range(len(outcomes)))
+    times = np.array([int(h.timestamp.replace(tzinfo=timezone.utc).timestamp()) for h in history], dtype=np.int64)
+    prices = np.array([
+        [h.prices[outcome] if outcome < len(h.prices) else 0.0 for outcome in order]
+        for h in history
+    ], dtype=np.float64).reshape(len(history), len(order))
+    fixed = np.rint(prices * SERIES_PRICE_SCALE).astype(np.int64)
+    return {
+        "version": version,
+        "outcomes": [
+            {
+                "outcome": outcome,
+                "label": outcomes[outcome],
+                "color": BINARY_OUTCOME_COLORS[outcome] if binary else OUTCOME_PALETTE[outcome % len(OUTCOME_PALETTE)]
+            }
+            for outcome in order
+        ],
+        "scale": SERIES_PRICE_SCALE,
+        "t": np.diff(times, prepend=0).tolist(),
+        "p": [np.diff(column, prepend=0).tolist() for column in fixed.T]
+    }
+
+
+
+def market_list_items(markets, next_url=None, query=None, summaries=None):
+    """Cards for one page of markets, plus the infinite-scroll sentinel that
+    loads the next page"""
+    if not markets and not next_url:
+        message = "No markets found matching your search." if query else "No markets yet. Create one above!"
+        return [Div(message, cls="empty-state")]
+    
+    # Charts fetch their own series from /market/{id}/series as they scroll into view
+    if summaries is None:
+        summaries = load_market_summaries([m.id for m in markets])
+    items = [
+        Div(market_card(m.id, m.question, m.status, show_plot=True, summary=summaries[m.id]), id=f"market-{m.id}", cls="market-item")
+        for m in markets
+    ]
+    
+    if next_url:
+        items.append(Div(
+            hx_get=next_url,
+            hx_trigger="revealed",
+            hx_swap="outerHTML",
+            cls="markets-sentinel"
+        ))
     
-    return '\n'.join(chart_code)
+    return items
 
 
 def register_market_routes(app, rt):
     """Register market-related routes"""
     
     @rt("/")
-    def get():
+    @bounded("listing")
+    async def get():
         """Home page with market list"""
-        with get_db() as db:
-            markets = db.query(Market).order_by(Market.created_at.desc()).all()
-            print(f"DEBUG: Homepage found {len(markets)} markets")
-            for market in markets:
-                print(f"  Market {market.id}: {market.question}")
+        def load(db):
+            markets, next_cursor = list_markets_page(db)
+            return markets, next_cursor, load_market_summaries([m.id for m in markets], db=db)
+        
+        markets, next_cursor, summaries = await run_read_db(load)
+        print(f"DEBUG: Homepage showing {len(markets)} markets")
         
         return Titled("Prophit - Prediction Markets",
                 Div(
@@ -185,6 +120,12 @@ def register_market_routes(app, rt):
                               placeholder="Will project X be completed by Q3?", 
                               required=True,
                               style="width: 100%; margin-bottom: 1rem;"),
+                        Input(type="text", 
+                              name="outcomes", 
+                              placeholder="Outcomes for a categorical market, e.g. Q1, Q2, Q3 (leave empty for Yes/No)", 
+                              style="width: 100%; margin-bottom: 1rem;"),
+                        Label("Trading closes (UTC, optional)", 
+                              Input(type="datetime-local", name="resolution_date", style="width: 100%; margin-bottom: 1rem;")),
                         Button("Create Market", type="submit"),
                         hx_post="/create-market",
                         hx_target="#markets-list",
@@ -200,19 +141,24 @@ def register_market_routes(app, rt):
                     Input(
                         type="text",
                         id="market-search",
+                        name="q",
                         placeholder="Search markets...",
+                        hx_get="/markets",
+                        hx_trigger="input changed delay:300ms, search",
+                        hx_target="#markets-list",
+                        hx_swap="innerHTML",
                         style="width: 100%; margin-bottom: 20px; padding: 12px; border: 1px solid var(--border); border-radius: 6px; background: var(--surface-2); color: var(--text); font-family: 'JetBrains Mono', monospace;"
                     ),
                     # Markets grid
                     Div(
-                        *[Div(market_card(m.id, m.question, m.status, show_plot=True), id=f"market-{m.id}", cls="market-item") for m in markets] if markets else [Div("No markets yet. Create one above!", cls="empty-state")],
+                        *market_list_items(markets, f"/markets?{urlencode({'cursor': next_cursor})}" if next_cursor else None, summaries=summaries),
                         id="markets-list",
                         cls="markets-grid"
                     ),
                     cls="markets-section"
                 ),
-                
-            
+
+
             # JavaScript for outcome selection (global event delegation)
             Script("""
                 document.addEventListener('click', function(event) {
@@ -235,576 +181,229 @@ def register_market_routes(app, rt):
                     }
                 });
             """),
-            
-            # Chart initialization for homepage
-            Script(f"""
-                // Initialize charts for all markets on homepage
-                document.fonts.ready.then(function() {{
-                    setTimeout(function() {{
-                        // Initialize charts for each market
-                        {generate_homepage_charts(markets)}
-                    }}, 100);
-                }});
-            """),
-            
-            # Search functionality
-            Script("""
-                // Market search functionality
-                document.addEventListener('DOMContentLoaded', function() {
-                    const searchInput = document.getElementById('market-search');
-                    const marketItems = document.querySelectorAll('.market-item');
-                    
-                    if (searchInput) {
-                        searchInput.addEventListener('input', function() {
-                            const searchTerm = this.value.toLowerCase().trim();
-                            let visibleCount = 0;
-                            
-                            marketItems.forEach(function(item) {
-                                const marketCard = item.querySelector('.market-card');
-                                if (marketCard) {
-                                    const questionText = marketCard.querySelector('h3').textContent.toLowerCase();
-                                    const shouldShow = questionText.includes(searchTerm);
-                                    
-                                    if (shouldShow) {
-                                        item.style.display = 'block';
-                                        visibleCount++;
-                                    } else {
-                                        item.style.display = 'none';
-                                    }
-                                }
-                            });
-                            
-                            // Show/hide empty state
-                            const emptyState = document.querySelector('.empty-state');
-                            if (emptyState) {
-                                if (visibleCount === 0 && searchTerm !== '') {
-                                    emptyState.textContent = 'No markets found matching your search.';
-                                    emptyState.style.display = 'block';
-                                } else if (visibleCount === 0 && searchTerm === '') {
-                                    emptyState.textContent = 'No markets yet. Create one above!';
-                                    emptyState.style.display = 'block';
-                                } else {
-                                    emptyState.style.display = 'none';
-                                }
-                            }
-                        });
-                    }
-                });
-            """)
         )
-
+    
+    @rt("/markets")
+    @bounded("listing")
+    async def get(cursor: str = None, q: str = None, page: int = 1):
+        """One page of market cards: newest first, or ranked search results for q"""
+        query = q.strip() if q else None
+        page = max(page, 1)
+        
+        def load(db):
+            next_url = None
+            if query:
+                markets, has_more = search_markets(
+                    db, query, limit=MAX_MARKETS_PER_PAGE, offset=(page - 1) * MAX_MARKETS_PER_PAGE
+                )
+                if has_more:
+                    next_url = f"/markets?{urlencode({'q': query, 'page': page + 1})}"
+            else:
+                markets, next_cursor = list_markets_page(db, cursor=cursor)
+                if next_cursor:
+                    next_url = f"/markets?{urlencode({'cursor': next_cursor})}"
+            return markets, next_url, load_market_summaries([m.id for m in markets], db=db)
+        
+        markets, next_url, summaries = await run_read_db(load)
+        return tuple(market_list_items(markets, next_url, query, summaries))
+    
     @rt("/create-market")
-    def post(question: str):
-        """Create a new market"""
-        with get_db() as db:
+    @bounded("trade")
+    async def post(question: str, outcomes: str = None, resolution_date: str = None):
+        """Create a new market; a comma-separated outcome list makes it categorical.
+        
+        Trading closes at resolution_date (ISO format, UTC unless it carries an offset).
+        """
+        closes_at = None
+        if resolution_date:
+            try:
+                closes_at = datetime.fromisoformat(resolution_date)
+            except ValueError:
+                return Response("Invalid resolution date", status_code=400)
+            if closes_at.tzinfo is not None:
+                closes_at = closes_at.astimezone(timezone.utc).replace(tzinfo=None)
+            if closes_at <= utcnow():
+                return Response("Resolution date must be in the future", status_code=400)
+        
+        labels = [label.strip() for label in (outcomes or "").split(",") if label.strip()]
+        if labels:
+            if len(set(labels)) != len(labels):
+                return Response("Outcomes must be distinct", status_code=400)
+            if not MIN_CATEGORICAL_OUTCOMES <= len(labels) <= MAX_CATEGORICAL_OUTCOMES:
+                return Response(f"Categorical markets need {MIN_CATEGORICAL_OUTCOMES}-{MAX_CATEGORICAL_OUTCOMES} outcomes", status_code=400)
+            market_type = MARKET_TYPES["CATEGORICAL"]
+        else:
+            labels = list(BINARY_OUTCOME_LABELS)
+            market_type = MARKET_TYPES["BINARY"]
+        
+        def create(db):
             market = Market(
                 question=question, 
-                type=MARKET_TYPES["BINARY"], 
-                status=MARKET_STATUSES["ACTIVE"]
+                type=market_type, 
+                status=MARKET_STATUSES["ACTIVE"],
+                resolution_date=closes_at
             )
             db.add(market)
+            db.flush()
+            
+            # Outcome rows and the initial (uniform) price point
+            create_outcomes(db, market.id, labels)
+            record_price_point(db, market.id, [1.0 / len(labels)] * len(labels))
             db.commit()
             db.refresh(market)
+            print(f"DEBUG: Created {market_type} market {market.id} with {len(labels)} outcomes")
             
-            # Add initial price history (50/50 probability)
-            initial_history = PriceHistory(
-                market_id=market.id,
-                yes_price=0.5,
-                no_price=0.5
-            )
-            db.add(initial_history)
-            db.commit()
-            print(f"DEBUG: Created initial price history for market {market.id}: yes={initial_history.yes_price}, no={initial_history.no_price}")
+            return market, load_market_summaries([market.id], db=db)[market.id]
         
-        # Get initial price history for chart
-        with get_db() as db:
-            history = db.query(PriceHistory).filter(
-                PriceHistory.market_id == market.id
-            ).order_by(PriceHistory.timestamp).all()
-            
-            # Prepare chart data
-            chart_data = {
-                "labels": [h.timestamp.strftime("%m/%d %H:%M") for h in history],
-                "datasets": [{
-                    "label": "Yes Probability",
-                    "data": [h.yes_price for h in history],
-                    "borderColor": "#56d364",
-                    "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                    "tension": 0.1
-                }, {
-                    "label": "No Probability", 
-                    "data": [h.no_price for h in history],
-                    "borderColor": "#f85149",
-                    "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                    "tension": 0.1
-                }]
-            }
+        market, summary = await run_db(create)
+        if closes_at is not None:
+            close_scheduler.schedule(market.id, closes_at)
         
         return Div(
-            market_card(market.id, market.question, market.status, show_plot=True),
-            # Chart initialization script for newly created market
-            Script(f"""
-                // Initialize chart for new market
-                setTimeout(function() {{
-                    const canvas = document.getElementById('priceChart-{market.id}');
-                    console.log('DEBUG: New market - Canvas element found:', canvas);
-                    console.log('DEBUG: New market - Chart data:', {json.dumps(chart_data)});
-                    if (canvas) {{
-                        const ctx = canvas.getContext('2d');
-                        console.log('DEBUG: New market - Canvas context:', ctx);
-                        
-                        // Create new chart
-                        window.chart{market.id} = new Chart(ctx, {{
-                            type: 'line',
-                            data: {json.dumps(chart_data)},
-                            options: {{
-                                responsive: true,
-                                maintainAspectRatio: false,
-                                layout: {{
-                                    padding: 0
-                                }},
-                                plugins: {{
-                                    legend: {{
-                                        display: true,
-                                        position: 'top',
-                                        labels: {{
-                                            color: '#e0e0e0',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }}
-                                        }}
-                                    }}
-                                }},
-                                scales: {{
-                                    x: {{
-                                        display: true,
-                                        ticks: {{
-                                            display: true,
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }},
-                                            autoSkip: true,
-                                            maxTicksLimit: 5,
-                                            maxRotation: 0,
-                                            minRotation: 0,
-                                            callback: function(value, index, values) {{
-                                                // Only show every nth label to limit to ~5 labels
-                                                const step = Math.max(1, Math.floor(values.length / 5));
-                                                if (index % step === 0 || index === values.length - 1) {{
-                                                    return value;
-                                                }}
-                                                return '';
-                                            }}
-                                        }},
-                                        grid: {{
-                                            color: '#444'
-                                        }},
-                                        title: {{
-                                            display: true,
-                                            text: 'Time',
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }}
-                                        }}
-                                    }},
-                                    y: {{
-                                        beginAtZero: true,
-                                        max: 1,
-                                        ticks: {{
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }},
-                                            callback: function(value) {{
-                                                return (value * 100).toFixed(0) + '%';
-                                            }}
-                                        }},
-                                        grid: {{
-                                            color: '#444'
-                                        }}
-                                    }}
-                                }}
-                            }}
-                        }});
-                    }} else {{
-                        console.error('New market - Canvas element not found: priceChart-{market.id}');
-                    }}
-                }}, 100);
-            """),
+            market_card(market.id, market.question, market.status, show_plot=True, summary=summary),
             id=f"market-{market.id}",
             cls="market-item"
         )
-
-    @rt("/trade/{market_id}")
-    def post(market_id: int, outcome: int, quantity: float):
-        """Execute a trade"""
+    
+    @rt("/quote/{market_id}")
+    def get(market_id: int, outcome: int, quantity: float = None, budget: float = None, target_price: float = None):
+        """Quote a trade by share quantity, budget or target price, without executing it"""
+        try:
+            quote = quote_trade(market_id, outcome, quantity=quantity, budget=budget, target_price=target_price)
+        except MarketNotFound as e:
+            return Response(str(e), status_code=404)
+        except TradeError as e:
+            return Response(str(e), status_code=400)
+        return JSONResponse(asdict(quote))
+    
+    @bounded("trade")
+    async def trade_batch(req):
+        """Execute a JSON batch of orders across markets, returning one fill per order"""
         user_id = DEFAULT_USER_ID  # TODO: Replace with actual user authentication
         
-        calculator = LMSRCalculator()
-        cost = calculator.calculate_trade_cost(market_id, outcome, quantity)
+        try:
+            payload = json.loads(await req.body())
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+            batch = TradeBatchRequest.model_validate(payload)
+        except (ValueError, ValidationError) as e:
+            return Response(f"Invalid batch: {e}", status_code=400)
         
-        # Record the trade
-        with get_db() as db:
-            position = Position(
-                user_id=user_id,
-                market_id=market_id,
-                outcome=outcome,
-                shares=quantity,
-                cost=cost
-            )
-            db.add(position)
-            db.commit()
-            
-            # Get updated market data
-            market = db.query(Market).filter(Market.id == market_id).first()
+        fills = await run_in_threadpool(execute_trade_batch, batch.orders, user_id)
+        print(f"DEBUG: Trade batch of {len(fills)} orders, {sum(f.error is None for f in fills)} filled")
+        return JSONResponse({"fills": [
+            {key: value for key, value in asdict(fill).items() if value is not None}
+            for fill in fills
+        ]})
+    
+    # A plain Starlette route: FastHTML parses a JSON body into form fields
+    # before any handler runs, and fails on anything but an object
+    app.add_route(Route("/trades/batch", trade_batch, methods=["POST"]))
+    
+    @rt("/trade/{market_id}")
+    @bounded("trade")
+    async def post(market_id: int, outcome: int, quantity: float):
+        """Execute a trade"""
+        user_id = DEFAULT_USER_ID  # TODO: Replace with actual user authentication
         
-        # Save price history
-        calculator = LMSRCalculator()
-        shares = calculator.get_current_shares(market.id)
-        prices = calculator.calculate_prices(shares)
+        # The trade engine serializes on threading locks, so it stays on the threadpool
+        try:
+            trade = await run_in_threadpool(execute_trade, market_id, outcome, quantity, user_id)
+        except MarketNotFound as e:
+            return Response(str(e), status_code=404)
+        except TradeError as e:
+            return Response(str(e), status_code=400)
+        print(f"DEBUG: Recorded trade on market {market_id}: cost={trade.cost}, prices={trade.prices}")
         
-        with get_db() as db:
-            price_history = PriceHistory(
-                market_id=market.id,
-                yes_price=prices[1],
-                no_price=prices[0]
-            )
-            db.add(price_history)
-            db.commit()
-            print(f"DEBUG: Created new price history for market {market.id} after trade: yes={prices[1]}, no={prices[0]}")
+        # Updated card state; its chart fetches the new series version itself
+        def load(db):
+            market = db.get(Market, market_id)
+            return market, load_market_summaries([market.id], db=db)[market.id]
         
-        # Get updated price history for chart
-        with get_db() as db:
-            history = db.query(PriceHistory).filter(
-                PriceHistory.market_id == market.id
-            ).order_by(PriceHistory.timestamp).all()
-            
-            # Prepare chart data
-            if history:
-                chart_data = {
-                    "labels": [h.timestamp.strftime("%m/%d") for h in history],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [h.yes_price for h in history],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [h.no_price for h in history],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
-            else:
-                chart_data = {
-                    "labels": [],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
+        market, summary = await run_read_db(load)
         
-        # Return the market card wrapped with the proper ID (with plot for homepage) plus chart initialization
+        # Return the market card wrapped with the proper ID (with plot for homepage)
         return Div(
-            market_card(market.id, market.question, market.status, show_plot=True),
-            # Chart initialization script for this specific market after HTMX update
-            Script(f"""
-                // Re-initialize chart after HTMX update
-                setTimeout(function() {{
-                    const canvas = document.getElementById('priceChart-{market.id}');
-                    console.log('DEBUG: HTMX update - Canvas element found:', canvas);
-                    console.log('DEBUG: HTMX update - Chart data:', {json.dumps(chart_data)});
-                    if (canvas) {{
-                        const ctx = canvas.getContext('2d');
-                        console.log('DEBUG: HTMX update - Canvas context:', ctx);
-                        
-                        // Destroy existing chart if it exists
-                        if (window.chart{market.id}) {{
-                            window.chart{market.id}.destroy();
-                        }}
-                        
-                        // Create new chart
-                        window.chart{market.id} = new Chart(ctx, {{
-                            type: 'line',
-                            data: {json.dumps(chart_data)},
-                            options: {{
-                                responsive: true,
-                                maintainAspectRatio: false,
-                                layout: {{
-                                    padding: 0
-                                }},
-                                plugins: {{
-                                    legend: {{
-                                        display: true,
-                                        position: 'top',
-                                        labels: {{
-                                            color: '#e0e0e0',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }}
-                                        }}
-                                    }}
-                                }},
-                                scales: {{
-                                    x: {{
-                                        display: true,
-                                        ticks: {{
-                                            display: true,
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }},
-                                            autoSkip: true,
-                                            maxTicksLimit: 5,
-                                            maxRotation: 0,
-                                            minRotation: 0,
-                                            callback: function(value, index, values) {{
-                                                // Only show every nth label to limit to ~5 labels
-                                                const step = Math.max(1, Math.floor(values.length / 5));
-                                                if (index % step === 0 || index === values.length - 1) {{
-                                                    return value;
-                                                }}
-                                                return '';
-                                            }}
-                                        }},
-                                        grid: {{
-                                            color: '#444'
-                                        }},
-                                        title: {{
-                                            display: true,
-                                            text: 'Time',
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }}
-                                        }}
-                                    }},
-                                    y: {{
-                                        beginAtZero: true,
-                                        max: 1,
-                                        ticks: {{
-                                            color: '#888',
-                                            font: {{
-                                                family: 'JetBrains Mono'
-                                            }},
-                                            callback: function(value) {{
-                                                return (value * 100).toFixed(0) + '%';
-                                            }}
-                                        }},
-                                        grid: {{
-                                            color: '#444'
-                                        }}
-                                    }}
-                                }}
-                            }}
-                        }});
-                    }} else {{
-                        console.error('HTMX update - Canvas element not found: priceChart-{market.id}');
-                    }}
-                }}, 100);
-            """),
+            market_card(market.id, market.question, market.status, show_plot=True, summary=summary),
             id=f"market-{market.id}",
             cls="market-item"
         )
     
     @rt("/market/{market_id}")
-    def get_market_detail(market_id: int):
+    @bounded("detail")
+    async def get_market_detail(market_id: int):
         """Market detail page with probability plot"""
-        with get_db() as db:
-            market = db.query(Market).filter(Market.id == market_id).first()
+        def load(db):
+            market = db.get(Market, market_id)
             if not market:
-                return "Market not found", 404
-            
-            # Get price history
-            history = db.query(PriceHistory).filter(
-                PriceHistory.market_id == market_id
-            ).order_by(PriceHistory.timestamp).all()
-            
-            print(f"DEBUG: Market detail page - Found {len(history)} price history entries for market {market_id}")
-            for i, h in enumerate(history):
-                print(f"  Entry {i}: {h.timestamp} - yes={h.yes_price}, no={h.no_price}")
-            
-            # If no history exists, create initial history based on current prices
-            if not history:
-                print(f"DEBUG: No price history found for market {market_id}, creating initial entry")
-                calculator = LMSRCalculator()
-                shares = calculator.get_current_shares(market_id)
-                prices = calculator.calculate_prices(shares)
+                return None, None, None
+            return market, market_cache.get(market_id, db), load_market_summaries([market_id], db=db)[market_id]
+        
+        # A pure read: the chart fetches its own series, and every market has
+        # had an initial price point since it was created
+        market, state, summary = await run_read_db(load)
+        if not market:
+            return Response("Market not found", status_code=404)
+        
+        return Div(
+            Div(
+                # Back link at the very top
+                A("← Back to Markets", href="/", cls="back-link"),
                 
-                initial_history = PriceHistory(
-                    market_id=market_id,
-                    yes_price=prices[1],
-                    no_price=prices[0]
-                )
-                db.add(initial_history)
-                db.commit()
+                # Market header
+                Div(
+                    H1(market.question),
+                    style="margin-bottom: 2rem;"
+                ),
                 
-                # Re-fetch history after creating initial entry
-                history = db.query(PriceHistory).filter(
-                    PriceHistory.market_id == market_id
-                ).order_by(PriceHistory.timestamp).all()
-                print(f"DEBUG: Created initial price history, now have {len(history)} entries")
-            
-            # Get current prices
-            calculator = LMSRCalculator()
-            shares = calculator.get_current_shares(market_id)
-            prices = calculator.calculate_prices(shares)
-            
-            # Prepare chart data
-            if history:
-                chart_data = {
-                    "labels": [h.timestamp.strftime("%m/%d") for h in history],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [h.yes_price for h in history],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [h.no_price for h in history],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
-            else:
-                # No history data, show empty chart
-                chart_data = {
-                    "labels": [],
-                    "datasets": [{
-                        "label": "Yes Probability",
-                        "data": [],
-                        "borderColor": "#56d364",
-                        "backgroundColor": "rgba(86, 211, 100, 0.1)",
-                        "tension": 0.1
-                    }, {
-                        "label": "No Probability", 
-                        "data": [],
-                        "borderColor": "#f85149",
-                        "backgroundColor": "rgba(248, 81, 73, 0.1)",
-                        "tension": 0.1
-                    }]
-                }
-            
-            return Div(
+                # Current prices section
                 Div(
-                    # Back link at the very top
-                    A("← Back to Markets", href="/", cls="back-link"),
-                    
-                    # Market header
-                    Div(
-                        H1(market.question),
-                        style="margin-bottom: 2rem;"
-                    ),
-                    
-                    # Current prices section
-                    Div(
-                        H2("Current Prices"),
-                        Div(
-                            Div(f"Yes: {prices[1]:.1%}", cls="price-display yes"),
-                            Div(f"No: {prices[0]:.1%}", cls="price-display no"),
-                            cls="prices-container"
-                        ),
-                        style="margin-bottom: 2rem;"
-                    ),
-                    
-                    # Market card with plot and trading
-                    Div(market_card(market.id, market.question, market.status, show_plot=True), id=f"market-{market.id}"),
-                    
-                    cls="container"
+                    H2("Current Prices"),
+                    outcome_prices(state.outcomes, state.prices, market.id),
+                    style="margin-bottom: 2rem;"
                 ),
                 
-                # Chart initialization script
-                Script(f"""
-                    // Wait for fonts to load before initializing chart
-                    document.fonts.ready.then(function() {{
-                        // Wait a bit more for the canvas to be fully rendered
-                        setTimeout(function() {{
-                            const canvas = document.getElementById('priceChart-{market_id}');
-                            console.log('DEBUG: Canvas element found:', canvas);
-                            console.log('DEBUG: Chart data:', {json.dumps(chart_data)});
-                            if (canvas) {{
-                                const ctx = canvas.getContext('2d');
-                                console.log('DEBUG: Canvas context:', ctx);
-                                const chart = new Chart(ctx, {{
-                                    type: 'line',
-                                    data: {json.dumps(chart_data)},
-                                    options: {{
-                                        responsive: true,
-                                        maintainAspectRatio: false,
-                                        plugins: {{
-                                            legend: {{
-                                                display: true,
-                                                position: 'top',
-                                                labels: {{
-                                                    color: '#e0e0e0',
-                                                    font: {{
-                                                        family: 'JetBrains Mono'
-                                                    }}
-                                                }}
-                                            }}
-                                        }},
-                                        scales: {{
-                                            x: {{
-                                                display: true,
-                                                ticks: {{
-                                                    display: true,
-                                                    color: '#888',
-                                                    font: {{
-                                                        family: 'JetBrains Mono'
-                                                    }},
-                                                    autoSkip: true,
-                                                    maxTicksLimit: 10
-                                                }},
-                                                grid: {{
-                                                    color: '#444'
-                                                }},
-                                                title: {{
-                                                    display: true,
-                                                    text: 'Time',
-                                                    color: '#888',
-                                                    font: {{
-                                                        family: 'JetBrains Mono'
-                                                    }}
-                                                }}
-                                            }},
-                                            y: {{
-                                                beginAtZero: true,
-                                                max: 1,
-                                                ticks: {{
-                                                    color: '#888',
-                                                    font: {{
-                                                        family: 'JetBrains Mono'
-                                                    }},
-                                                    callback: function(value) {{
-                                                        return (value * 100).toFixed(0) + '%';
-                                                    }}
-                                                }},
-                                                grid: {{
-                                                    color: '#444'
-                                                }}
-                                            }}
-                                        }}
-                                    }}
-                                }});
-                            }} else {{
-                                console.error('Canvas element not found: priceChart-{market_id}');
-                            }}
-                        }}, 100);
-                    }});
-                """)
-            )
\ No newline at end of file
+                # Market card with plot and trading
+                Div(market_card(market.id, market.question, market.status, show_plot=True, summary=summary), id=f"market-{market.id}"),
+                
+                cls="container"
+            )
+        )
+    
+    @rt("/market/{market_id}/series")
+    @bounded("detail")
+    async def get(req, market_id: int, max_points: int = MAX_CHART_POINTS, resolution: int = None):
+        """Chart series as compact JSON, versioned by the market's trade count.
+        
+        The ETag changes with every trade, so revalidating an unchanged series
+        costs one indexed query and a 304. Cards request it with ?v=<trade
+        count>, so each version is a distinct URL browsers may cache.
+        """
+        if resolution is not None and resolution not in PRICE_ROLLUP_RESOLUTIONS:
+            return Response(f"Resolution must be one of {PRICE_ROLLUP_RESOLUTIONS}", status_code=400)
+        max_points = min(max(max_points, 3), RAW_SERIES_LIMIT)
+        
+        def load(db):
+            state = market_cache.get(market_id, db)
+            if state is None:
+                return None, None
+            # Read in the same transaction as the series, so the version always matches it
+            version = db.query(func.coalesce(func.sum(MarketOutcome.trade_count), 0)).filter(
+                MarketOutcome.market_id == market_id
+            ).scalar()
+            etag = f'"{market_id}-{version}-{max_points}-{resolution or 0}"'
+            if etag in [tag.strip() for tag in req.headers.get("if-none-match", "").split(",")]:
+                return etag, None
+            history = load_price_series(db, {market_id: version}, max_points, resolution)[market_id]
+            if not history:
+                # Not backfilled yet (src/prophit/backfill.py): chart the current prices, without writing them
+                history = [PricePoint(utcnow(), state.prices)]
+            return etag, series_payload(history, state.outcomes, version)
+        
+        etag, payload = await run_read_db(load)
+        if etag is None:
+            return Response("Market not found", status_code=404)
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={SERIES_CACHE_MAX_AGE}"}
+        if payload is None:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(payload, headers=headers)
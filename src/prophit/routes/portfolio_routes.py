@@ -0,0 +1,18 @@
+from fasthtml.common import *
+from dataclasses import asdict
+from ..models.database import run_read_db
+from ..services.portfolio import get_portfolio
+from .limits import bounded
+from ..constants import DEFAULT_USER_ID
+
+
+def register_portfolio_routes(app, rt):
+    """Register per-user portfolio routes"""
+    
+    @rt("/portfolio")
+    @bounded("detail")
+    async def get(user_id: str = DEFAULT_USER_ID):
+        """A user's holdings marked to market, with cost basis and P&L"""
+        # TODO: Default to the authenticated user once there is authentication
+        portfolio = await run_read_db(lambda db: get_portfolio(user_id, db))
+        return JSONResponse(asdict(portfolio))
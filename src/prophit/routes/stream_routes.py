@@ -0,0 +1,26 @@
+from fasthtml.common import *
+from starlette.responses import StreamingResponse
+from ..services.price_feed import price_feed, price_events
+from ..constants import PRICE_STREAM_MAX_MARKETS
+
+
+def register_stream_routes(app, rt):
+    """Register the Server-Sent Events price stream"""
+    
+    @rt("/prices/stream")
+    async def get(markets: str = ""):
+        """Live prices for a comma-separated list of market ids, pushed as each trade commits"""
+        try:
+            market_ids = {int(market_id) for market_id in markets.split(",") if market_id.strip()}
+        except ValueError:
+            return Response("markets must be comma-separated market ids", status_code=400)
+        if not market_ids or len(market_ids) > PRICE_STREAM_MAX_MARKETS:
+            return Response(f"Subscribe to 1-{PRICE_STREAM_MAX_MARKETS} markets", status_code=400)
+        
+        subscription = price_feed.subscribe(market_ids)
+        return StreamingResponse(
+            price_events(subscription, price_feed),
+            media_type="text/event-stream",
+            # No caching, and no buffering by a reverse proxy in front of us
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
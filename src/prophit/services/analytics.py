@@ -0,0 +1,344 @@
+import glob
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import duckdb
+import numpy as np
+from sqlalchemy import DateTime, Float, Integer
+from ..models.database import engine, Market, Position, MarketOutcome, PriceRollup, PriceHistory, PriceHistoryValue, PriceArchiveWatermark, Holding
+from ..constants import (
+    ANALYTICS_SOURCE,
+    ANALYTICS_SNAPSHOT_DIR,
+    ANALYTICS_SNAPSHOT_MAX_AGE,
+    DEFAULT_LIQUIDITY_PARAM,
+    MARKET_STATUSES,
+    PRICE_ARCHIVE_DIR
+)
+
+
+# Tables the analytics views expose, under the same names as in SQLite
+ANALYTICS_TABLES = [
+    Market.__table__,
+    Position.__table__,
+    MarketOutcome.__table__,
+    PriceRollup.__table__,
+    PriceHistory.__table__,
+    PriceHistoryValue.__table__,
+    PriceArchiveWatermark.__table__,
+    Holding.__table__
+]
+SNAPSHOT_CHUNK_ROWS = 200_000
+
+def _duckdb_type(column) -> str:
+    if isinstance(column.type, DateTime):
+        return "TIMESTAMP"
+    if isinstance(column.type, Integer):
+        return "BIGINT"
+    if isinstance(column.type, Float):
+        return "DOUBLE"
+    return "VARCHAR"
+
+
+def _column_array(values, type_: str) -> np.ndarray:
+    """Numeric columns without NULLs as numbers, everything else as text ('' for NULL)"""
+    if None not in values:
+        if type_ == "BIGINT":
+            return np.array(values, dtype=np.int64)
+        if type_ == "DOUBLE":
+            return np.array(values, dtype=np.float64)
+    return np.array(["" if value is None else str(value) for value in values])
+
+
+def default_snapshot_dir(database_path: str) -> str:
+    """Where snapshots go unless ANALYTICS_SNAPSHOT_DIR says otherwise: beside the database file"""
+    return os.path.join(os.path.dirname(os.path.abspath(database_path)), "analytics_snapshots")
+
+
+def write_snapshot(directory: Optional[str] = ANALYTICS_SNAPSHOT_DIR, database_path: Optional[str] = None):
+    """Copy the analytics tables out of SQLite into one Parquet file each.
+    
+    Rows are streamed in chunks as NumPy columns; text and nullable columns
+    are cast to their declared types by DuckDB. Each file is written beside the old one and renamed over
+    it, so readers always see a complete snapshot.
+    """
+    import sqlite3
+    
+    database_path = database_path or engine.url.database
+    directory = directory or default_snapshot_dir(database_path)
+    os.makedirs(directory, exist_ok=True)
+    source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    target = duckdb.connect()
+    try:
+        for table in ANALYTICS_TABLES:
+            names = [column.name for column in table.columns]
+            types = [_duckdb_type(column) for column in table.columns]
+            columns = ", ".join(f"{name} {type_}" for name, type_ in zip(names, types))
+            target.execute(f"CREATE TABLE {table.name} ({columns})")
+            
+            rows = source.execute(f"SELECT {', '.join(names)} FROM {table.name}")
+            while True:
+                batch = rows.fetchmany(SNAPSHOT_CHUNK_ROWS)
+                if not batch:
+                    break
+                chunk, selects = {}, []
+                for name, type_, values in zip(names, types, zip(*batch)):
+                    chunk[name] = _column_array(values, type_)
+                    if chunk[name].dtype.kind in "if":
+                        selects.append(name)
+                    else:
+                        selects.append(f"CAST(NULLIF({name}, '') AS {type_})")
+                target.execute(f"INSERT INTO {table.name} SELECT {', '.join(selects)} FROM chunk")
+            
+            path = os.path.join(directory, f"{table.name}.parquet")
+            target.execute(f"COPY {table.name} TO '{path}.tmp' (FORMAT parquet)")
+            os.replace(f"{path}.tmp", path)
+    finally:
+        source.close()
+        target.close()
+
+
+class AnalyticsEngine:
+    """Dashboard aggregates computed by DuckDB, off the OLTP path.
+    
+    With source "attach" DuckDB reads the live SQLite file through its sqlite
+    extension (read only), installing the extension if needed. With
+    "snapshot" it reads Parquet copies written by write_snapshot. "auto"
+    attaches when the extension is already installed and falls back to
+    snapshots otherwise; it never downloads anything. Either way the views
+    are named after the SQLite tables, so the queries do not care.
+    
+    Snapshots are taken by a background thread every
+    ANALYTICS_SNAPSHOT_MAX_AGE seconds, each into a directory of its own,
+    and the views are swapped over once one is complete. Queries never wait
+    for a refresh, only for the first snapshot when none is on disk yet.
+    
+    The price_points view has one row per recorded price and outcome, from
+    price_history and from the Parquet archive (rows up to each market's
+    watermark), so it covers history wherever it lives.
+    """
+    
+    def __init__(self, source: str = ANALYTICS_SOURCE, snapshot_dir: Optional[str] = ANALYTICS_SNAPSHOT_DIR,
+                 database_path: Optional[str] = None, refresh_interval: float = ANALYTICS_SNAPSHOT_MAX_AGE):
+        self.database_path = database_path or engine.url.database
+        self.snapshot_dir = snapshot_dir or default_snapshot_dir(self.database_path)
+        self.refresh_interval = refresh_interval
+        self._connection = duckdb.connect(config={"autoinstall_known_extensions": False})
+        self._lock = threading.Lock()
+        self._archived = False
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        
+        if source in ("attach", "auto"):
+            try:
+                self._attach(install=source == "attach")
+                source = "attach"
+            except duckdb.Error as e:
+                if source == "attach":
+                    raise
+                print(f"DEBUG: DuckDB sqlite extension unavailable ({e.__class__.__name__}), using Parquet snapshots")
+                source = "snapshot"
+        self.source = source
+        if source == "snapshot":
+            # Serve the last run's snapshot, if any, until a fresh one is ready
+            snapshots = self._snapshots()
+            if snapshots:
+                self._use_snapshot(snapshots[-1])
+            self._refresher = threading.Thread(target=self._refresh_loop, name="analytics-snapshots", daemon=True)
+            self._refresher.start()
+        else:
+            self._ready.set()
+    
+    def _attach(self, install: bool):
+        if install:
+            self._connection.execute("INSTALL sqlite")
+        self._connection.execute("LOAD sqlite")
+        self._connection.execute(f"ATTACH '{self.database_path}' AS oltp (TYPE sqlite, READ_ONLY)")
+        for table in ANALYTICS_TABLES:
+            self._connection.execute(f"CREATE OR REPLACE VIEW {table.name} AS SELECT * FROM oltp.{table.name}")
+        self._create_price_points_view()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the views have something to read; False on timeout"""
+        return self._ready.wait(timeout)
+    
+    def close(self):
+        """Stop refreshing snapshots"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+    
+    def _snapshots(self) -> List[str]:
+        """Complete snapshot directories, oldest first"""
+        return sorted(glob.glob(os.path.join(self.snapshot_dir, "snapshot-*")))
+    
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._refresh_snapshot()
+            except Exception as e:
+                # The views keep pointing at the last complete snapshot
+                print(f"DEBUG: Analytics snapshot refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+    
+    def _refresh_snapshot(self):
+        """Write a new snapshot beside the current one, then point the views at it"""
+        name = f"{time.time_ns():020d}"
+        partial = os.path.join(self.snapshot_dir, f"partial-{name}")
+        write_snapshot(partial, self.database_path)
+        directory = os.path.join(self.snapshot_dir, f"snapshot-{name}")
+        os.rename(partial, directory)
+        self._use_snapshot(directory)
+        
+        # Keep the previous snapshot for queries that started before the swap
+        for stale in self._snapshots()[:-2] + glob.glob(os.path.join(self.snapshot_dir, "partial-*")):
+            if stale != partial:
+                shutil.rmtree(stale, ignore_errors=True)
+    
+    def _use_snapshot(self, directory: str):
+        with self._lock:
+            for table in ANALYTICS_TABLES:
+                path = os.path.join(directory, f"{table.name}.parquet")
+                self._connection.execute(f"CREATE OR REPLACE VIEW {table.name} AS SELECT * FROM read_parquet('{path}')")
+            self._create_price_points_view()
+        self._ready.set()
+    
+    def _archive_glob(self) -> Optional[str]:
+        if PRICE_ARCHIVE_DIR and glob.glob(os.path.join(PRICE_ARCHIVE_DIR, "market_id=*", "month=*", "*.parquet")):
+            return os.path.join(PRICE_ARCHIVE_DIR, "market_id=*", "month=*", "*.parquet")
+        return None
+    
+    def _create_price_points_view(self):
+        hot = """
+            SELECT h.market_id, h.id, h.timestamp, v.outcome, v.price
+            FROM price_history h JOIN price_history_values v ON v.point_id = h.id
+        """
+        archive = self._archive_glob()
+        if archive:
+            hot += f"""
+            UNION ALL
+            SELECT a.market_id, a.id, a.timestamp, a.outcome, a.price
+            FROM read_parquet('{archive}', hive_partitioning = true) a
+            JOIN price_archive_watermarks w ON w.market_id = a.market_id AND a.id <= w.archived_through_id
+            """
+        self._connection.execute(f"CREATE OR REPLACE VIEW price_points AS {hot}")
+        self._archived = archive is not None
+    
+    def _query(self, sql: str, params: Dict) -> List[Dict]:
+        self._ready.wait()
+        with self._lock:
+            if not self._archived and self._archive_glob():
+                # The archive only ever grows, so once its files exist the view is final
+                self._create_price_points_view()
+        # A cursor is an independent connection to the same database, safe per thread
+        cursor = self._connection.cursor()
+        try:
+            result = cursor.execute(sql, params)
+            names = [column[0] for column in result.description]
+            return [dict(zip(names, row)) for row in result.fetchall()]
+        finally:
+            cursor.close()
+    
+    def market_volume(self, limit: int = 50, since: Optional[datetime] = None) -> List[Dict]:
+        """Markets by traded volume (total cost paid), with trade, share and trader counts"""
+        return self._query("""
+            SELECT p.market_id, m.question, m.status,
+                   count(*) AS trades,
+                   sum(p.shares) AS shares,
+                   sum(p.cost) AS volume,
+                   count(DISTINCT p.user_id) AS traders
+            FROM positions p JOIN markets m ON m.id = p.market_id
+            WHERE $since IS NULL OR p.timestamp >= $since
+            GROUP BY ALL
+            ORDER BY volume DESC
+            LIMIT $limit
+        """, {"since": since, "limit": limit})
+    
+    def user_pnl(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Cost basis, mark-to-market value and P&L per user, from the
+        incrementally maintained holdings rather than every position.
+        
+        Open and closed markets are marked at their LMSR prices, resolved
+        markets at 1 for the winning outcome and 0 otherwise.
+        """
+        return self._query("""
+            WITH scaled AS (
+                SELECT o.market_id, o.outcome, m.status, m.outcome AS winner,
+                       o.shares / coalesce(m.liquidity_param, $default_b) AS x
+                FROM market_outcomes o JOIN markets m ON m.id = o.market_id
+            ), shifted AS (
+                SELECT *, exp(x - max(x) OVER (PARTITION BY market_id)) AS weight FROM scaled
+            ), prices AS (
+                SELECT market_id, outcome,
+                       CASE WHEN status = $resolved THEN CAST(outcome = winner AS DOUBLE)
+                            ELSE weight / sum(weight) OVER (PARTITION BY market_id) END AS price
+                FROM shifted
+            )
+            SELECT h.user_id,
+                   count(DISTINCT h.market_id) AS markets,
+                   sum(h.cost) AS cost_basis,
+                   sum(h.shares * p.price) AS market_value,
+                   sum(h.shares * p.price) - sum(h.cost) AS pnl
+            FROM holdings h JOIN prices p USING (market_id, outcome)
+            WHERE $user_id IS NULL OR h.user_id = $user_id
+            GROUP BY h.user_id
+            ORDER BY pnl DESC
+            LIMIT $limit
+        """, {
+            "user_id": user_id,
+            "limit": limit,
+            "default_b": DEFAULT_LIQUIDITY_PARAM,
+            "resolved": MARKET_STATUSES["RESOLVED"]
+        })
+    
+    def price_volatility(self, resolution: int = 3600, limit: int = 50, since: Optional[datetime] = None) -> List[Dict]:
+        """Standard deviation of log returns between consecutive rollup closes, per market outcome.
+        
+        Resolution 0 uses every recorded price instead, archived ones included.
+        """
+        if resolution:
+            closes = """
+                SELECT market_id, outcome, bucket_start AS t, close AS price
+                FROM price_rollups
+                WHERE resolution = $resolution AND ($since IS NULL OR bucket_start >= $since)
+            """
+        else:
+            closes = """
+                SELECT market_id, outcome, timestamp AS t, price
+                FROM price_points
+                WHERE $resolution = 0 AND ($since IS NULL OR timestamp >= $since)
+            """
+        return self._query(f"""
+            WITH steps AS (
+                SELECT market_id, outcome, price,
+                       lag(price) OVER (PARTITION BY market_id, outcome ORDER BY t) AS previous
+                FROM ({closes})
+            ), returns AS (
+                -- greatest() skips NULLs, so drop each series' first point before taking logs
+                SELECT market_id, outcome, ln(greatest(price, 1e-12) / greatest(previous, 1e-12)) AS r
+                FROM steps
+                WHERE previous IS NOT NULL
+            )
+            SELECT market_id, outcome, count(r) AS returns, stddev_samp(r) AS volatility
+            FROM returns
+            GROUP BY ALL
+            HAVING count(r) > 1
+            ORDER BY volatility DESC
+            LIMIT $limit
+        """, {"resolution": resolution, "since": since, "limit": limit})
+
+
+_analytics: Optional[AnalyticsEngine] = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> AnalyticsEngine:
+    """Process-wide analytics engine, created on first use"""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = AnalyticsEngine()
+        return _analytics
@@ -0,0 +1,106 @@
+import heapq
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+from ..models.database import get_db, Market
+from ..utils.price_series import utcnow
+from .settlement import close_market
+from ..constants import MARKET_STATUSES
+
+
+class MarketCloseScheduler:
+    """Closes markets at their resolution_date.
+    
+    A min-heap of (resolution_date, market_id) holds every open market with a
+    close time; one thread sleeps until the earliest is due, closes it and
+    waits for the next. The heap is rebuilt at startup from a partial index
+    of open markets, and new markets are pushed as they are created, so the
+    markets table is never polled. The trade engine refuses trades past a
+    market's resolution_date on its own; this only makes the status match.
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int]] = []
+        self._changed = threading.Condition()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self.closed = 0
+    
+    def load(self, db=None):
+        """Rebuild the heap from the database"""
+        if db is None:
+            with get_db() as db:
+                return self.load(db)
+        rows = db.query(Market.resolution_date, Market.id).filter(
+            Market.status == MARKET_STATUSES["ACTIVE"],
+            Market.resolution_date.isnot(None)
+        ).order_by(Market.resolution_date).all()
+        with self._changed:
+            # Already in heap order
+            self._heap = [(resolution_date, market_id) for resolution_date, market_id in rows]
+            self._changed.notify()
+        print(f"DEBUG: Scheduled {len(rows)} markets to close")
+    
+    def schedule(self, market_id: int, resolution_date: datetime):
+        """Close a market at resolution_date (naive UTC)"""
+        with self._changed:
+            heapq.heappush(self._heap, (resolution_date, market_id))
+            if self._heap[0][1] == market_id:
+                self._changed.notify()
+    
+    def next_close(self) -> Optional[Tuple[datetime, int]]:
+        with self._changed:
+            return self._heap[0] if self._heap else None
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def start(self):
+        self.load()
+        self._thread = threading.Thread(target=self._run, name="market-close-scheduler", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        with self._changed:
+            self._stop = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _due(self) -> List[int]:
+        """Wait until at least one market is due (or stop); pop and return the due ones"""
+        with self._changed:
+            while not self._stop:
+                now = utcnow()
+                if self._heap and self._heap[0][0] <= now:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        due.append(heapq.heappop(self._heap)[1])
+                    return due
+                timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+                self._changed.wait(timeout)
+            return []
+    
+    def _run(self):
+        while True:
+            due = self._due()
+            if not due:
+                return
+            for market_id in due:
+                try:
+                    if close_market(market_id):
+                        self.closed += 1
+                except Exception as e:
+                    # Trades are refused past resolution_date regardless; the next start retries
+                    print(f"DEBUG: Closing market {market_id} failed: {e}")
+
+
+close_scheduler = MarketCloseScheduler()
+
+
+def start_close_scheduler() -> MarketCloseScheduler:
+    """Start the process-wide close scheduler"""
+    if close_scheduler._thread is None:
+        close_scheduler.start()
+    return close_scheduler
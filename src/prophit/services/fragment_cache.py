@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+from ..constants import CARD_CACHE_MAX_BYTES
+
+
+class FragmentCache:
+    """Process-local LRU cache of rendered HTML fragments, bounded by their
+    total size (counted in characters, which is bytes for ASCII markup).
+    
+    Keys are tuples whose first element is the market id and which include
+    everything the fragment depends on (its version and status), so a stale
+    fragment is never served. The trade and status paths still invalidate()
+    the market, so superseded versions free their memory straight away.
+    """
+    
+    def __init__(self, max_bytes: int = CARD_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._fragments: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._keys: Dict[int, Set[Tuple]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.render_seconds = 0.0  # spent rendering misses
+    
+    def get_or_render(self, key: Tuple[Hashable, ...], render: Callable[[], str]) -> str:
+        """Cached HTML for key, rendering (outside the lock) and storing it on a miss"""
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        
+        started = time.perf_counter()
+        html = render()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.render_seconds += elapsed
+            if key not in self._fragments and len(html) <= self.max_bytes:
+                self._fragments[key] = html
+                self._keys[key[0]].add(key)
+                self.size += len(html)
+                while self.size > self.max_bytes:
+                    self._drop(next(iter(self._fragments)))
+        return html
+    
+    def _drop(self, key: Tuple):
+        self.size -= len(self._fragments.pop(key))
+        keys = self._keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys[key[0]]
+    
+    def invalidate(self, market_id: Optional[int] = None):
+        """Drop every fragment of one market (or everything)"""
+        with self._lock:
+            if market_id is None:
+                self._fragments.clear()
+                self._keys.clear()
+                self.size = 0
+                return
+            for key in list(self._keys.get(market_id, ())):
+                self._drop(key)
+    
+    def saved_seconds(self) -> float:
+        """Estimated render time saved: hits at the average cost of a miss"""
+        with self._lock:
+            return self.hits * self.render_seconds / self.misses if self.misses else 0.0
+    
+    def __len__(self):
+        return len(self._fragments)
+
+
+card_cache = FragmentCache()
@@ -0,0 +1,179 @@
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from ..models.database import get_db, Market, MarketOutcome
+from ..utils.lmsr import lmsr_prices
+from ..constants import BINARY_OUTCOME_LABELS, DEFAULT_LIQUIDITY_PARAM, MARKET_CACHE_SIZE
+
+
+@dataclass(frozen=True)
+class MarketState:
+    """Snapshot of everything needed to price and display a market"""
+    market_id: int
+    question: str
+    status: str
+    liquidity: float
+    outcomes: List[str]
+    shares: List[float]
+    trade_count: int
+    prices: List[float]
+    closes_at: Optional[datetime] = None  # resolution_date; no trades at or after it
+
+
+class MarketStateCache:
+    """Process-local LRU cache of MarketState.
+    
+    Entries are loaded lazily from SQLite and kept current by the trade path
+    (write-through after commit). Anything that changes markets or positions
+    behind the trade engine's back must call invalidate().
+    """
+    
+    def __init__(self, max_size: int = MARKET_CACHE_SIZE):
+        self.max_size = max_size
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every write; a lazy load that raced a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, market_id: int, db=None) -> Optional[MarketState]:
+        """Cached state for one market, or None if the market does not exist"""
+        return self.get_many([market_id], db).get(market_id)
+    
+    def get_many(self, market_ids: Iterable[int], db=None) -> Dict[int, MarketState]:
+        """Cached states for many markets; misses are loaded with two queries.
+        
+        Pass db to load misses through an existing session.
+        """
+        market_ids = list(market_ids)
+        found = {}
+        with self._lock:
+            for market_id in market_ids:
+                state = self._states.get(market_id)
+                if state is not None:
+                    self._states.move_to_end(market_id)
+                    found[market_id] = state
+            self.hits += len(found)
+            self.misses += len(market_ids) - len(found)
+            
+            generation = self._generation
+        
+        missing = [m_id for m_id in market_ids if m_id not in found]
+        if missing:
+            loaded = load_market_states(missing, db)
+            with self._lock:
+                if self._generation == generation:
+                    for state in loaded.values():
+                        self._put(state)
+            found.update(loaded)
+        return found
+    
+    def _put(self, state: MarketState):
+        self._states[state.market_id] = state
+        self._states.move_to_end(state.market_id)
+        while len(self._states) > self.max_size:
+            self._states.popitem(last=False)
+    
+    def apply_trade(self, market_id: int, shares: List[float], trade_count: int,
+                    prices: List[float]) -> Optional[MarketState]:
+        """Write-through for a committed trade; markets not cached stay cold.
+        
+        Takes the market's absolute state after the trade rather than a delta:
+        a lazy load between the commit and this call has already cached the
+        trade, and writing the same state again is harmless.
+        
+        Returns the updated state, or None if the market was not cached.
+        """
+        with self._lock:
+            self._generation += 1
+            state = self._states.get(market_id)
+            if state is None:
+                return None
+            state = self._states[market_id] = replace(
+                state,
+                shares=list(shares),
+                trade_count=trade_count,
+                prices=list(prices)
+            )
+            return state
+    
+    def set_status(self, market_id: int, status: str):
+        """Write-through for a status change"""
+        with self._lock:
+            self._generation += 1
+            state = self._states.get(market_id)
+            if state is not None:
+                self._states[market_id] = replace(state, status=status)
+    
+    def invalidate(self, market_id: Optional[int] = None):
+        """Drop one market (or everything) after out-of-band database changes"""
+        with self._lock:
+            self._generation += 1
+            if market_id is None:
+                self._states.clear()
+            else:
+                self._states.pop(market_id, None)
+    
+    def __len__(self):
+        return len(self._states)
+
+
+def load_market_states(market_ids: List[int], db=None) -> Dict[int, MarketState]:
+    """Read MarketState for the given markets straight from the database"""
+    if db is None:
+        with get_db() as db:
+            return load_market_states(market_ids, db)
+    
+    markets = db.query(
+        Market.id,
+        Market.question,
+        Market.status,
+        Market.liquidity_param,
+        Market.resolution_date
+    ).filter(Market.id.in_(market_ids)).all()
+    
+    outcomes = {m.id: [] for m in markets}
+    for row in db.query(MarketOutcome).filter(
+        MarketOutcome.market_id.in_(list(outcomes))
+    ).order_by(MarketOutcome.market_id, MarketOutcome.outcome):
+        outcomes[row.market_id].append(row)
+    
+    labels, shares, trade_counts = {}, {}, {}
+    for m_id, rows in outcomes.items():
+        if not rows:
+            # Legacy binary market that has never been traded
+            rows = [MarketOutcome(outcome=o, label=l, shares=0.0, trade_count=0) for o, l in enumerate(BINARY_OUTCOME_LABELS)]
+        labels[m_id] = [row.label or str(row.outcome) for row in rows]
+        shares[m_id] = [row.shares for row in rows]
+        trade_counts[m_id] = sum(row.trade_count for row in rows)
+    
+    # Price the loaded markets with one vectorized call per outcome count
+    prices = {}
+    by_width = defaultdict(list)
+    for m in markets:
+        by_width[len(shares[m.id])].append(m)
+    for group in by_width.values():
+        liquidity = [m.liquidity_param or DEFAULT_LIQUIDITY_PARAM for m in group]
+        matrix = lmsr_prices([shares[m.id] for m in group], liquidity)
+        prices.update({m.id: row.tolist() for m, row in zip(group, matrix)})
+    
+    return {
+        m.id: MarketState(
+            market_id=m.id,
+            question=m.question,
+            status=m.status,
+            liquidity=m.liquidity_param or DEFAULT_LIQUIDITY_PARAM,
+            outcomes=labels[m.id],
+            shares=shares[m.id],
+            trade_count=trade_counts[m.id],
+            prices=prices[m.id],
+            closes_at=m.resolution_date
+        )
+        for m in markets
+    }
+
+
+market_cache = MarketStateCache()
@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+import numpy as np
+from ..models.database import get_db, Holding, Market
+from .market_cache import market_cache
+from ..constants import MARKET_STATUSES
+
+
+@dataclass
+class PortfolioHolding:
+    market_id: int
+    question: str
+    status: str
+    outcome: int
+    label: str
+    shares: float
+    cost: float
+    trade_count: int
+    price: float
+    value: float
+    pnl: float
+
+
+@dataclass
+class Portfolio:
+    user_id: str
+    holdings: List[PortfolioHolding] = field(default_factory=list)
+    cost_basis: float = 0.0
+    market_value: float = 0.0
+    pnl: float = 0.0
+
+
+def get_portfolio(user_id: str, db=None) -> Portfolio:
+    """A user's holdings marked to market, with cost basis and P&L.
+    
+    Holdings are read with one primary-key range scan, however many trades
+    the user has made. Open and closed markets are marked at their cached
+    LMSR prices, resolved markets at 1 for the winning outcome and 0
+    otherwise. Journaled trades show up once the journal has applied them.
+    Pass db to read through an existing session.
+    """
+    if db is None:
+        with get_db() as db:
+            return get_portfolio(user_id, db)
+    
+    rows = db.query(
+        Holding.market_id,
+        Holding.outcome,
+        Holding.shares,
+        Holding.cost,
+        Holding.trade_count
+    ).filter(Holding.user_id == user_id).order_by(Holding.market_id, Holding.outcome).all()
+    if not rows:
+        return Portfolio(user_id=user_id)
+    
+    states = market_cache.get_many({row.market_id for row in rows}, db)
+    resolved = [m_id for m_id, state in states.items() if state.status == MARKET_STATUSES["RESOLVED"]]
+    winners: Dict[int, int] = dict(
+        db.query(Market.id, Market.outcome).filter(Market.id.in_(resolved)).all()
+    ) if resolved else {}
+    
+    def mark(row):
+        state = states[row.market_id]
+        if state.status == MARKET_STATUSES["RESOLVED"]:
+            return float(row.outcome == winners.get(row.market_id))
+        return state.prices[row.outcome]
+    
+    shares = np.array([row.shares for row in rows])
+    cost = np.array([row.cost for row in rows])
+    prices = np.array([mark(row) for row in rows])
+    value = shares * prices
+    pnl = value - cost
+    
+    holdings = [
+        PortfolioHolding(
+            market_id=row.market_id,
+            question=states[row.market_id].question,
+            status=states[row.market_id].status,
+            outcome=row.outcome,
+            label=states[row.market_id].outcomes[row.outcome],
+            shares=row.shares,
+            cost=row.cost,
+            trade_count=row.trade_count,
+            price=float(prices[i]),
+            value=float(value[i]),
+            pnl=float(pnl[i])
+        )
+        for i, row in enumerate(rows)
+    ]
+    return Portfolio(
+        user_id=user_id,
+        holdings=holdings,
+        cost_basis=float(cost.sum()),
+        market_value=float(value.sum()),
+        pnl=float(pnl.sum())
+    )
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from ..constants import PRICE_STREAM_KEEPALIVE
+
+
+class PriceSubscription:
+    """One client's view of the feed: the latest unsent message per market.
+    
+    A slow client never queues more than one message per market it watches;
+    a newer price simply replaces the one it has not read yet.
+    """
+    
+    def __init__(self, market_ids: Iterable[int]):
+        self.market_ids = set(market_ids)
+        self._pending: Dict[int, str] = {}
+        self._ready = asyncio.Event()
+    
+    def _push(self, market_id: int, message: str):
+        self._pending[market_id] = message
+        self._ready.set()
+    
+    async def next(self, timeout: float = PRICE_STREAM_KEEPALIVE) -> List[str]:
+        """Wait for updates; returns an empty list if none arrive within timeout"""
+        try:
+            # asyncio.timeout, unlike wait_for, does not wrap the wait in a new task
+            async with asyncio.timeout(timeout):
+                await self._ready.wait()
+        except TimeoutError:
+            return []
+        self._ready.clear()
+        messages, self._pending = list(self._pending.values()), {}
+        return messages
+
+
+class PriceFeed:
+    """Fan-out of committed trade prices to subscribed SSE clients.
+    
+    Subscriptions live on the server's event loop. The trade path publishes
+    from worker threads after commit; each update is serialized once and
+    handed to the loop, which fans it out to that market's subscribers only.
+    Markets with no subscribers cost a dictionary lookup.
+    """
+    
+    def __init__(self):
+        self._subscribers: Dict[int, Set[PriceSubscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+    
+    def subscribe(self, market_ids: Iterable[int]) -> PriceSubscription:
+        """Subscribe to markets; call from the event loop"""
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            subscription = PriceSubscription(market_ids)
+            for market_id in subscription.market_ids:
+                self._subscribers[market_id].add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: PriceSubscription):
+        with self._lock:
+            for market_id in subscription.market_ids:
+                subscribers = self._subscribers.get(market_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[market_id]
+    
+    def viewers(self, market_id: Optional[int] = None) -> int:
+        """Open subscriptions to one market, or to all markets"""
+        with self._lock:
+            if market_id is not None:
+                return len(self._subscribers.get(market_id, ()))
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+    
+    def publish(self, market_id: int, prices: List[float], total_shares: float, trade_count: Optional[int] = None):
+        """Broadcast a market's new state after a trade commits; safe from any thread.
+        
+        Messages carry absolute values, so a client that skipped some can
+        apply the latest one alone. trade_count is left out when unknown.
+        """
+        if market_id not in self._subscribers or self._loop is None:
+            return
+        update = {"market_id": market_id, "prices": prices, "total_shares": total_shares}
+        if trade_count is not None:
+            update["trade_count"] = trade_count
+        message = f"data: {json.dumps(update)}\n\n"
+        self.published += 1
+        try:
+            self._loop.call_soon_threadsafe(self._fan_out, market_id, message)
+        except RuntimeError:
+            # The loop has shut down; nobody is listening any more
+            pass
+    
+    def _fan_out(self, market_id: int, message: str):
+        with self._lock:
+            subscribers = list(self._subscribers.get(market_id, ()))
+        for subscription in subscribers:
+            subscription._push(market_id, message)
+        self.delivered += len(subscribers)
+
+
+async def price_events(subscription: PriceSubscription, feed: "PriceFeed"):
+    """text/event-stream body for one subscription, with keepalive comments"""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            messages = await subscription.next()
+            yield "".join(messages) if messages else ": keepalive\n\n"
+    finally:
+        feed.unsubscribe(subscription)
+
+
+price_feed = PriceFeed()
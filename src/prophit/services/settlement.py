@@ -0,0 +1,166 @@
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+from sqlalchemy import DateTime, case, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from ..models.database import get_db, get_write_db, Holding, Market, Settlement
+from ..utils.price_series import utcnow
+from .fragment_cache import card_cache
+from .market_cache import market_cache
+from .trade_engine import market_lock, MarketNotFound, TradeError
+from .trade_journal import get_trade_journal
+from ..constants import MARKET_STATUSES, SETTLEMENT_CHUNK_SIZE, SETTLEMENT_PAYOUT_PER_SHARE
+
+
+class SettlementError(TradeError):
+    """A close or resolution was rejected; the message is safe to show to the user"""
+
+
+@dataclass
+class SettlementResult:
+    market_id: int
+    outcome: int
+    status: str
+    holders: int  # settlement records written so far, over every run
+    payout: float
+    chunks: int  # transactions written by this run
+
+
+def _set_status(market_id: int, status: str):
+    """Write a committed status change through to the caches"""
+    market_cache.set_status(market_id, status)
+    card_cache.invalidate(market_id)
+
+
+def close_market(market_id: int, outcome: Optional[int] = None) -> bool:
+    """Stop trading on a market, optionally recording its winning outcome.
+    
+    Runs under the market's lock, after the trade journal has applied the
+    market's trades, so no trade is in flight and holdings are final once
+    this returns. Returns False if the market was already closed (or
+    resolved) and there was nothing to record.
+    """
+    with market_lock(market_id):
+        journal = get_trade_journal()
+        if journal is not None:
+            journal.wait_applied([market_id])
+        
+        with get_write_db() as db:
+            market = db.get(Market, market_id)
+            if market is None:
+                raise MarketNotFound("Market not found")
+            if market.status == MARKET_STATUSES["RESOLVED"]:
+                if outcome is None:
+                    return False
+                raise SettlementError("Market is already resolved")
+            if outcome is not None:
+                state = market_cache.get(market_id, db)
+                if not 0 <= outcome < len(state.outcomes):
+                    raise SettlementError("Unknown outcome")
+                if market.outcome is not None and market.outcome != outcome:
+                    raise SettlementError("Market is already being settled for another outcome")
+            if market.status == MARKET_STATUSES["CLOSED"] and (outcome is None or market.outcome == outcome):
+                return False
+            
+            market.status = MARKET_STATUSES["CLOSED"]
+            if outcome is not None:
+                market.outcome = outcome
+            db.commit()
+        _set_status(market_id, MARKET_STATUSES["CLOSED"])
+    print(f"DEBUG: Closed market {market_id}" + (f" with outcome {outcome}" if outcome is not None else ""))
+    return True
+
+
+def settle_market(market_id: int, chunk_size: int = SETTLEMENT_CHUNK_SIZE,
+                  max_chunks: Optional[int] = None) -> SettlementResult:
+    """Write payouts for a closed market whose winning outcome is recorded.
+    
+    Holders are settled in user_id order, chunk_size per transaction, each
+    chunk a single INSERT ... SELECT aggregating their holdings. A chunk
+    resumes after the highest user_id already settled, so an interrupted run
+    (or one stopped by max_chunks) carries on where it left off and no
+    holder is paid twice. The transaction that writes the last chunk marks
+    the market resolved.
+    """
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        with get_write_db() as db:
+            market = db.get(Market, market_id)
+            if market is None:
+                raise MarketNotFound("Market not found")
+            if market.status == MARKET_STATUSES["RESOLVED"]:
+                break
+            if market.status != MARKET_STATUSES["CLOSED"] or market.outcome is None:
+                raise SettlementError("Market has no winning outcome to settle")
+            
+            settled_through = db.query(func.max(Settlement.user_id)).filter(Settlement.market_id == market_id).scalar()
+            winning_shares = func.sum(case((Holding.outcome == market.outcome, Holding.shares), else_=0.0))
+            holders = select(
+                Holding.market_id,
+                Holding.user_id,
+                winning_shares,
+                func.sum(Holding.cost),
+                winning_shares * SETTLEMENT_PAYOUT_PER_SHARE,
+                literal(utcnow(), DateTime)
+            ).where(Holding.market_id == market_id)
+            if settled_through is not None:
+                holders = holders.where(Holding.user_id > settled_through)
+            holders = holders.group_by(Holding.user_id).order_by(Holding.user_id).limit(chunk_size)
+            
+            written = db.execute(insert(Settlement).from_select(
+                ["market_id", "user_id", "winning_shares", "cost", "payout", "settled_at"],
+                holders
+            )).rowcount
+            if written < chunk_size:
+                market.status = MARKET_STATUSES["RESOLVED"]
+            db.commit()
+            chunks += 1
+            if market.status == MARKET_STATUSES["RESOLVED"]:
+                _set_status(market_id, MARKET_STATUSES["RESOLVED"])
+                print(f"DEBUG: Resolved market {market_id} in {chunks} settlement chunks")
+                break
+    
+    with get_db() as db:
+        market = db.get(Market, market_id)
+        holders, payout = db.query(
+            func.count(),
+            func.coalesce(func.sum(Settlement.payout), 0.0)
+        ).filter(Settlement.market_id == market_id).one()
+        return SettlementResult(
+            market_id=market_id,
+            outcome=market.outcome,
+            status=market.status,
+            holders=holders,
+            payout=payout,
+            chunks=chunks
+        )
+
+
+def resolve_market(market_id: int, outcome: int, chunk_size: int = SETTLEMENT_CHUNK_SIZE) -> SettlementResult:
+    """Close a market with its winning outcome and pay out every holder"""
+    close_market(market_id, outcome)
+    return settle_market(market_id, chunk_size)
+
+
+def resume_settlements() -> List[SettlementResult]:
+    """Finish every settlement a previous process left part-way"""
+    with get_db() as db:
+        market_ids = [m_id for (m_id,) in db.query(Market.id).filter(
+            Market.status == MARKET_STATUSES["CLOSED"],
+            Market.outcome.isnot(None)
+        )]
+    results = []
+    for market_id in market_ids:
+        try:
+            results.append(settle_market(market_id))
+        except Exception as e:
+            # Left closed with its outcome; the next start tries again
+            print(f"DEBUG: Settlement of market {market_id} failed: {e}")
+    return results
+
+
+def start_settlement_resume() -> threading.Thread:
+    """Resume interrupted settlements in the background"""
+    thread = threading.Thread(target=resume_settlements, name="settlement-resume", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,375 @@
+import math
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import func, insert
+from ..models.database import get_write_db, Market, MarketOutcome, Position
+from ..models.outcome_totals import record_position, add_outcome_totals
+from ..models.holdings import add_holdings, holding_deltas
+from ..utils.lmsr import LMSRCalculator
+from ..utils.price_series import record_price_point, record_price_points, utcnow
+from .fragment_cache import card_cache
+from .market_cache import market_cache
+from .price_feed import price_feed
+from .trade_journal import get_trade_journal
+from ..constants import MARKET_STATUSES, MIN_TRADE_QUANTITY, MAX_TRADE_QUANTITY
+
+
+class TradeError(ValueError):
+    """A trade was rejected; the message is safe to show to the user"""
+
+
+class MarketNotFound(TradeError):
+    pass
+
+
+@dataclass
+class TradeResult:
+    position_id: Optional[int]  # None until a journaled trade is applied
+    market_id: int
+    outcome: int
+    shares: float
+    cost: float
+    prices: List[float]
+
+
+@dataclass
+class TradeQuote:
+    market_id: int
+    outcome: int
+    shares: float
+    cost: float
+    price_before: float
+    price_after: float
+    average_price: float
+    capped: bool = False  # the budget or target needed more than MAX_TRADE_QUANTITY shares
+
+
+@dataclass
+class OrderFill:
+    """Outcome of one order in a batch: a fill, or the reason it was rejected"""
+    position_id: Optional[int] = None
+    cost: Optional[float] = None
+    price: Optional[float] = None
+    error: Optional[str] = None
+
+
+# One lock per market: trades on the same market run one at a time, trades on
+# different markets only contend for SQLite's (short) write lock.
+_locks_guard = threading.Lock()
+_market_locks = defaultdict(threading.Lock)
+
+
+@contextmanager
+def market_lock(market_id: int):
+    """Serialize work on one market within this process"""
+    with _locks_guard:
+        lock = _market_locks[market_id]
+    with lock:
+        yield
+
+
+def _check_open(status: str, closes_at, now) -> Optional[str]:
+    """Why a market cannot take trades at now, or None if it can"""
+    if status != MARKET_STATUSES["ACTIVE"]:
+        return "Market is not open for trading"
+    if closes_at is not None and now >= closes_at:
+        # Past its resolution date, even if the close scheduler has not flipped it yet
+        return "Market closed for trading"
+    return None
+
+
+def _publish(market_id: int, shares: List[float], trade_count: int, prices: List[float]):
+    """Write a committed trade through to the caches and push it to live viewers"""
+    market_cache.apply_trade(market_id, shares, trade_count, prices)
+    card_cache.invalidate(market_id)
+    price_feed.publish(market_id, prices, sum(shares), trade_count)
+
+
+def _trade_count(db, market_id: int) -> int:
+    """Trades recorded on a market, read in the caller's transaction"""
+    return db.query(func.coalesce(func.sum(MarketOutcome.trade_count), 0)).filter(
+        MarketOutcome.market_id == market_id
+    ).scalar()
+
+
+def execute_trade(market_id: int, outcome: int, quantity: float, user_id: str) -> TradeResult:
+    """Price and record a trade atomically.
+    
+    The share vector is read, the position and outcome totals written and the
+    resulting price point recorded in one BEGIN IMMEDIATE transaction, under
+    the market's lock. Other processes trading the same database are held off
+    by SQLite's write lock, so no trade is priced against a stale vector.
+    """
+    if not MIN_TRADE_QUANTITY <= quantity <= MAX_TRADE_QUANTITY:
+        raise TradeError(f"Quantity must be between {MIN_TRADE_QUANTITY:g} and {MAX_TRADE_QUANTITY:g}")
+    
+    journal = get_trade_journal()
+    if journal is not None:
+        return _execute_journaled_trade(journal, market_id, outcome, quantity, user_id)
+    
+    with market_lock(market_id), get_write_db() as db:
+        market = db.get(Market, market_id)
+        if market is None:
+            raise MarketNotFound("Market not found")
+        reason = _check_open(market.status, market.resolution_date, utcnow())
+        if reason:
+            raise TradeError(reason)
+        
+        calculator = LMSRCalculator(market.liquidity_param)
+        shares = calculator.get_current_shares(market_id, db)
+        if not 0 <= outcome < len(shares):
+            raise TradeError("Unknown outcome")
+        trade_count = _trade_count(db, market_id) + 1
+        
+        cost = calculator.trade_cost(shares, outcome, quantity)
+        shares[outcome] += quantity
+        prices = calculator.calculate_prices(shares)
+        
+        position = Position(
+            user_id=user_id,
+            market_id=market_id,
+            outcome=outcome,
+            shares=quantity,
+            cost=cost
+        )
+        record_position(db, position)
+        record_price_point(db, market_id, prices)
+        db.flush()
+        position_id = position.id
+        db.commit()
+        _publish(market_id, shares, trade_count, prices)
+        
+        return TradeResult(
+            position_id=position_id,
+            market_id=market_id,
+            outcome=outcome,
+            shares=quantity,
+            cost=cost,
+            prices=prices
+        )
+
+
+def _execute_journaled_trade(journal, market_id: int, outcome: int, quantity: float, user_id: str) -> TradeResult:
+    """Price a trade in memory and return once the journal has it on disk.
+    
+    The market's share vector and trade count come from the journal while it
+    has unapplied trades on the market, and from the cache (which then
+    matches the database) otherwise. The journal is read first: read after
+    the cache, the applier could catch up in between and leave a cache entry
+    loaded while the database was behind as the only source. Only the fsync wait happens outside the market lock,
+    so concurrent trades share it.
+    """
+    with market_lock(market_id):
+        pending = journal.pending_state(market_id)
+        state = market_cache.get(market_id)
+        if state is None:
+            raise MarketNotFound("Market not found")
+        reason = _check_open(state.status, state.closes_at, utcnow())
+        if reason:
+            raise TradeError(reason)
+        
+        shares, trade_count = pending or (list(state.shares), state.trade_count)
+        trade_count += 1
+        if not 0 <= outcome < len(shares):
+            raise TradeError("Unknown outcome")
+        
+        calculator = LMSRCalculator(state.liquidity)
+        cost = calculator.trade_cost(shares, outcome, quantity)
+        shares[outcome] += quantity
+        prices = calculator.calculate_prices(shares)
+        
+        seq = journal.submit(market_id, outcome, quantity, cost, prices, shares, trade_count, user_id, utcnow())
+        # Published under the lock, like the cache write, so viewers see trades in order
+        _publish(market_id, shares, trade_count, prices)
+    
+    journal.wait_durable(seq)
+    return TradeResult(
+        position_id=None,
+        market_id=market_id,
+        outcome=outcome,
+        shares=quantity,
+        cost=cost,
+        prices=prices
+    )
+
+
+def quote_trade(market_id: int, outcome: int, quantity: Optional[float] = None,
+                budget: Optional[float] = None, target_price: Optional[float] = None) -> TradeQuote:
+    """Price a trade without executing it.
+    
+    Exactly one of quantity (shares to buy), budget (amount to spend) or
+    target_price (price to move the outcome to) is given; the other two are
+    solved in closed form. Reads cached market state only, so quoting never
+    touches the database once a market is warm.
+    
+    Every quote is for a trade /trade accepts: markets that are not open are
+    refused, a solved quantity above MAX_TRADE_QUANTITY is capped there (and
+    the quote marked capped), one below MIN_TRADE_QUANTITY is rejected.
+    """
+    if sum(arg is not None for arg in (quantity, budget, target_price)) != 1:
+        raise TradeError("Give exactly one of quantity, budget or target_price")
+    if not math.isfinite(next(arg for arg in (quantity, budget, target_price) if arg is not None)):
+        raise TradeError("Quantity, budget and target_price must be finite numbers")
+    
+    state = market_cache.get(market_id)
+    if state is None:
+        raise MarketNotFound("Market not found")
+    reason = _check_open(state.status, state.closes_at, utcnow())
+    if reason:
+        raise TradeError(reason)
+    if not 0 <= outcome < len(state.shares):
+        raise TradeError("Unknown outcome")
+    
+    calculator = LMSRCalculator(state.liquidity)
+    shares = list(state.shares)
+    if quantity is not None:
+        if not MIN_TRADE_QUANTITY <= quantity <= MAX_TRADE_QUANTITY:
+            raise TradeError(f"Quantity must be between {MIN_TRADE_QUANTITY:g} and {MAX_TRADE_QUANTITY:g}")
+        cost = calculator.trade_cost(shares, outcome, quantity)
+    elif budget is not None:
+        if budget <= 0:
+            raise TradeError("Budget must be positive")
+        quantity, cost = calculator.shares_for_budget(shares, outcome, budget), budget
+    else:
+        if not 0 < target_price < 1:
+            raise TradeError("Target price must be between 0 and 1")
+        quantity, cost = calculator.move_to_price(shares, outcome, target_price)
+        if quantity == 0:
+            raise TradeError("Price is already at or above the target")
+    
+    capped = quantity > MAX_TRADE_QUANTITY
+    if capped:
+        quantity = MAX_TRADE_QUANTITY
+        cost = calculator.trade_cost(shares, outcome, quantity)
+    elif quantity < MIN_TRADE_QUANTITY:
+        raise TradeError(f"That buys {quantity:.4g} shares; trades must be at least {MIN_TRADE_QUANTITY:g}")
+    
+    price_before = state.prices[outcome]
+    shares[outcome] += quantity
+    return TradeQuote(
+        market_id=market_id,
+        outcome=outcome,
+        shares=quantity,
+        cost=cost,
+        price_before=price_before,
+        price_after=calculator.calculate_prices(shares)[outcome],
+        average_price=cost / quantity,
+        capped=capped
+    )
+
+
+def execute_trade_batch(orders: Sequence, user_id: str) -> List[OrderFill]:
+    """Price and record many orders, across markets, in one transaction.
+    
+    orders are (market_id, outcome, quantity) records in submission order.
+    Each market's share vector is read once and the orders on it are priced
+    one after another in memory, so every fill sees the orders before it.
+    Positions, outcome totals, holdings and price points are then written
+    with a handful of executemany statements and a single commit. Invalid
+    orders are rejected individually and do not abort the batch.
+    """
+    fills = [OrderFill() for _ in orders]
+    market_ids = sorted({order.market_id for order in orders})
+    
+    # Locks are always taken in market id order, so concurrent batches cannot deadlock
+    with ExitStack() as stack:
+        for market_id in market_ids:
+            stack.enter_context(market_lock(market_id))
+        
+        # The batch reads share vectors from the database, so let the journal
+        # catch up on these markets first (before taking the write lock it needs)
+        journal = get_trade_journal()
+        if journal is not None:
+            journal.wait_applied(market_ids)
+        
+        db = stack.enter_context(get_write_db())
+        
+        markets = {
+            market.id: market
+            for market in db.query(
+                Market.id,
+                Market.status,
+                Market.liquidity_param,
+                Market.resolution_date
+            ).filter(Market.id.in_(market_ids))
+        }
+        shares: Dict[int, List[float]] = {market_id: [] for market_id in markets}
+        trade_counts: Dict[int, int] = dict.fromkeys(markets, 0)
+        for market_id, outcome, total, count in db.query(
+            MarketOutcome.market_id,
+            MarketOutcome.outcome,
+            MarketOutcome.shares,
+            MarketOutcome.trade_count
+        ).filter(MarketOutcome.market_id.in_(market_ids)).order_by(MarketOutcome.market_id, MarketOutcome.outcome):
+            shares[market_id].append(total)
+            trade_counts[market_id] += count
+        calculators = {market_id: LMSRCalculator(market.liquidity_param) for market_id, market in markets.items()}
+        
+        timestamp = utcnow()
+        filled, positions, points, totals = [], [], [], {}
+        for index, order in enumerate(orders):
+            market = markets.get(order.market_id)
+            if market is None:
+                fills[index].error = "Market not found"
+                continue
+            reason = _check_open(market.status, market.resolution_date, timestamp)
+            if reason:
+                fills[index].error = reason
+                continue
+            if not MIN_TRADE_QUANTITY <= order.quantity <= MAX_TRADE_QUANTITY:
+                fills[index].error = f"Quantity must be between {MIN_TRADE_QUANTITY:g} and {MAX_TRADE_QUANTITY:g}"
+                continue
+            market_shares = shares[order.market_id]
+            if not 0 <= order.outcome < len(market_shares):
+                fills[index].error = "Unknown outcome"
+                continue
+            
+            calculator = calculators[order.market_id]
+            cost = calculator.trade_cost(market_shares, order.outcome, order.quantity)
+            market_shares[order.outcome] += order.quantity
+            trade_counts[order.market_id] += 1
+            prices = calculator.calculate_prices(market_shares)
+            
+            fills[index].cost = cost
+            fills[index].price = prices[order.outcome]
+            filled.append((index, order, prices))
+            positions.append({
+                "user_id": user_id,
+                "market_id": order.market_id,
+                "outcome": order.outcome,
+                "shares": order.quantity,
+                "cost": cost,
+                "timestamp": timestamp
+            })
+            points.append((order.market_id, prices, timestamp))
+            total = totals.setdefault((order.market_id, order.outcome), {
+                "market_id": order.market_id,
+                "outcome": order.outcome,
+                "shares": 0.0,
+                "trade_count": 0
+            })
+            total["shares"] += order.quantity
+            total["trade_count"] += 1
+        
+        if filled:
+            position_ids = db.execute(
+                insert(Position).returning(Position.id, sort_by_parameter_order=True),
+                positions
+            ).scalars().all()
+            add_outcome_totals(db, list(totals.values()))
+            add_holdings(db, holding_deltas(positions))
+            record_price_points(db, points)
+            db.commit()
+            
+            latest = {}
+            for (index, order, prices), position_id in zip(filled, position_ids):
+                fills[index].position_id = position_id
+                latest[order.market_id] = prices
+            # One update per market: the cache and viewers only need where the batch left it
+            for market_id, prices in latest.items():
+                _publish(market_id, shares[market_id], trade_counts[market_id], prices)
+    
+    return fills
@@ -0,0 +1,319 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from ..models.database import get_db, get_write_db, JournalCheckpoint, Position
+from ..models.outcome_totals import add_outcome_totals
+from ..models.holdings import add_holdings, holding_deltas
+from ..utils.price_series import record_price_points
+from .market_cache import market_cache
+from ..constants import TRADE_JOURNAL_GROUP_SIZE, TRADE_JOURNAL_MAX_BYTES
+
+
+CHECKPOINT_NAME = "trades"
+
+
+@dataclass
+class JournalEntry:
+    seq: int
+    market_id: int
+    outcome: int
+    quantity: float
+    cost: float
+    prices: List[float]
+    user_id: str
+    timestamp: str  # ISO format, naive UTC
+
+
+class TradeJournal:
+    """Append-only write-ahead log of priced trades.
+    
+    Trades are priced in memory, appended to the log and acknowledged once an
+    fsync covers them; concurrent trades share one fsync (group commit). A
+    background thread then applies durable entries to positions, outcome
+    totals, holdings and price history, many per transaction, and records
+    the last applied sequence number in the same transaction. Entries past
+    that checkpoint are replayed when the journal is opened again.
+    
+    Until a market's entries are applied the database lags the journal, so
+    the journal keeps that market's share vector (pending_shares) and trades
+    must be priced from it.
+    """
+    
+    def __init__(self, path: str, group_size: int = TRADE_JOURNAL_GROUP_SIZE, max_bytes: int = TRADE_JOURNAL_MAX_BYTES):
+        self.path = path
+        self.group_size = group_size
+        self.max_bytes = max_bytes
+        
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # held while writing or truncating the log
+        self._pending_write = threading.Condition(self._lock)
+        self._pending_apply = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._applied = threading.Condition(self._lock)
+        
+        self._buffer: List[JournalEntry] = []
+        self._to_apply = deque()
+        self._inflight: Dict[int, list] = {}  # market_id -> [shares, trade count, unapplied entries]
+        self._next_seq = 1
+        self._durable_seq = 0
+        self._applied_seq = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._writer_done = False
+        self._file = None
+        self._writer: Optional[threading.Thread] = None
+        self._applier: Optional[threading.Thread] = None
+        self.fsyncs = 0
+        self.groups_applied = 0
+    
+    def open(self):
+        """Replay unapplied entries, then start the writer and applier threads"""
+        applied = self._checkpoint()
+        entries = list(self._read_log())
+        pending = [entry for entry in entries if entry.seq > applied]
+        for start in range(0, len(pending), self.group_size):
+            self._apply(pending[start:start + self.group_size])
+        if pending:
+            print(f"DEBUG: Replayed {len(pending)} trade journal entries")
+        market_cache.invalidate()
+        
+        last = max([applied] + [entry.seq for entry in entries])
+        self._next_seq = last + 1
+        self._durable_seq = self._applied_seq = last
+        
+        # Everything in the log is applied now; start a fresh one
+        self._file = open(self.path, "wb", buffering=0)
+        os.fsync(self._file.fileno())
+        
+        self._writer = threading.Thread(target=self._write_loop, name="trade-journal-writer", daemon=True)
+        self._applier = threading.Thread(target=self._apply_loop, name="trade-journal-applier", daemon=True)
+        self._writer.start()
+        self._applier.start()
+        return self
+    
+    def close(self):
+        """Stop accepting trades, apply everything durable and close the log"""
+        with self._lock:
+            self._closed = True
+            self._pending_write.notify_all()
+        self._writer.join()
+        with self._lock:
+            self._writer_done = True
+            self._pending_apply.notify_all()
+        self._applier.join()
+        if self._file is not None:
+            self._file.close()
+    
+    def pending_state(self, market_id: int) -> Optional[Tuple[List[float], int]]:
+        """Share vector and trade count after the market's last journaled trade, if any is unapplied"""
+        with self._lock:
+            inflight = self._inflight.get(market_id)
+            return (list(inflight[0]), inflight[1]) if inflight else None
+    
+    def submit(self, market_id: int, outcome: int, quantity: float, cost: float,
+               prices: List[float], shares: List[float], trade_count: int, user_id: str,
+               timestamp: datetime) -> int:
+        """Queue a priced trade for the log and return its sequence number.
+        
+        Call under the market's lock, with shares and trade_count the market's
+        state after the trade, then wait_durable outside it so other trades can join the same fsync.
+        """
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise RuntimeError("Trade journal is closed")
+            seq = self._next_seq
+            self._next_seq += 1
+            self._buffer.append(JournalEntry(
+                seq=seq,
+                market_id=market_id,
+                outcome=outcome,
+                quantity=quantity,
+                cost=cost,
+                prices=list(prices),
+                user_id=user_id,
+                timestamp=timestamp.isoformat()
+            ))
+            inflight = self._inflight.setdefault(market_id, [None, 0, 0])
+            inflight[0] = list(shares)
+            inflight[1] = trade_count
+            inflight[2] += 1
+            self._pending_write.notify()
+            return seq
+    
+    def wait_durable(self, seq: int):
+        """Block until the entry is fsynced"""
+        with self._lock:
+            while self._durable_seq < seq and self._error is None:
+                self._durable.wait()
+            if self._durable_seq < seq:
+                raise self._error
+    
+    def wait_applied(self, market_ids: Iterable[int]):
+        """Block until the database holds every journaled trade on these markets"""
+        market_ids = list(market_ids)
+        with self._lock:
+            while any(market_id in self._inflight for market_id in market_ids):
+                self._applied.wait()
+    
+    def drain(self):
+        """Block until every submitted entry is applied"""
+        with self._lock:
+            while self._applied_seq < self._next_seq - 1:
+                self._applied.wait()
+    
+    def _checkpoint(self) -> int:
+        with get_db() as db:
+            checkpoint = db.get(JournalCheckpoint, CHECKPOINT_NAME)
+            return checkpoint.applied_seq if checkpoint else 0
+    
+    def _read_log(self):
+        """Entries in the log, stopping at a torn final write"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as log:
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    yield JournalEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    break
+    
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closed:
+                    self._pending_write.wait()
+                if not self._buffer:
+                    return
+                batch, self._buffer = self._buffer, []
+            
+            data = "".join(json.dumps(asdict(entry)) + "\n" for entry in batch).encode()
+            with self._file_lock:
+                try:
+                    self._file.write(data)
+                    os.fsync(self._file.fileno())
+                except OSError as e:
+                    print(f"DEBUG: Trade journal write failed: {e}")
+                    with self._lock:
+                        self._error = e
+                        self._durable.notify_all()
+                    return
+                self.fsyncs += 1
+                with self._lock:
+                    self._durable_seq = batch[-1].seq
+                    self._to_apply.extend(batch)
+                    self._durable.notify_all()
+                    self._pending_apply.notify()
+    
+    def _apply_loop(self):
+        while True:
+            with self._lock:
+                while not self._to_apply and not self._writer_done:
+                    self._pending_apply.wait()
+                if not self._to_apply:
+                    return
+                group = [self._to_apply.popleft() for _ in range(min(len(self._to_apply), self.group_size))]
+            
+            try:
+                self._apply(group)
+            except Exception as e:
+                # Entries stay durable in the log; retry, and replay covers a crash
+                print(f"DEBUG: Applying trade journal entries failed, retrying: {e}")
+                with self._lock:
+                    self._to_apply.extendleft(reversed(group))
+                time.sleep(1)
+                continue
+            
+            with self._lock:
+                self._applied_seq = group[-1].seq
+                for entry in group:
+                    inflight = self._inflight[entry.market_id]
+                    inflight[2] -= 1
+                    if inflight[2] == 0:
+                        # The database has caught up; drop any state the cache
+                        # loaded from it while it was behind
+                        del self._inflight[entry.market_id]
+                        market_cache.invalidate(entry.market_id)
+                self.groups_applied += 1
+                self._applied.notify_all()
+            self._truncate_if_applied()
+    
+    def _apply(self, group: List[JournalEntry]):
+        """Write a group of entries and advance the checkpoint in one transaction"""
+        with get_write_db() as db:
+            checkpoint = db.get(JournalCheckpoint, CHECKPOINT_NAME)
+            if checkpoint is None:
+                checkpoint = JournalCheckpoint(name=CHECKPOINT_NAME, applied_seq=0)
+                db.add(checkpoint)
+            group = [entry for entry in group if entry.seq > checkpoint.applied_seq]
+            if not group:
+                return
+            
+            totals = {}
+            for entry in group:
+                total = totals.setdefault((entry.market_id, entry.outcome), {
+                    "market_id": entry.market_id,
+                    "outcome": entry.outcome,
+                    "shares": 0.0,
+                    "trade_count": 0
+                })
+                total["shares"] += entry.quantity
+                total["trade_count"] += 1
+            
+            positions = [
+                {
+                    "user_id": entry.user_id,
+                    "market_id": entry.market_id,
+                    "outcome": entry.outcome,
+                    "shares": entry.quantity,
+                    "cost": entry.cost,
+                    "timestamp": datetime.fromisoformat(entry.timestamp)
+                }
+                for entry in group
+            ]
+            db.execute(insert(Position), positions)
+            add_outcome_totals(db, list(totals.values()))
+            add_holdings(db, holding_deltas(positions))
+            record_price_points(db, [
+                (entry.market_id, entry.prices, datetime.fromisoformat(entry.timestamp))
+                for entry in group
+            ])
+            checkpoint.applied_seq = group[-1].seq
+            db.commit()
+    
+    def _truncate_if_applied(self):
+        """Start the log over once it is large and every entry in it is applied"""
+        if os.fstat(self._file.fileno()).st_size < self.max_bytes:
+            return
+        with self._file_lock:
+            with self._lock:
+                if self._applied_seq != self._durable_seq:
+                    return
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+
+
+trade_journal: Optional[TradeJournal] = None
+
+
+def open_trade_journal(path: str) -> TradeJournal:
+    """Open (replaying if needed) the process-wide trade journal"""
+    global trade_journal
+    if trade_journal is None:
+        trade_journal = TradeJournal(path).open()
+    return trade_journal
+
+
+def get_trade_journal() -> Optional[TradeJournal]:
+    """The process-wide trade journal, or None when trades commit directly"""
+    return trade_journal
@@ -1,54 +1,193 @@
 import math
-from typing import List
-from sqlalchemy import func
-from ..models.database import get_db, Position
+from typing import List, Tuple
+import numpy as np
+from ..models.database import get_db, MarketOutcome
 from ..constants import DEFAULT_LIQUIDITY_PARAM, BINARY_OUTCOMES
 
 
+# Vectorized LMSR core. Share arrays have outcomes on the last axis and any
+# number of leading axes (markets, candidate trades, ...); b broadcasts
+# against those leading axes. Everything is computed in log space, so share
+# quantities far beyond b never overflow.
+
+def _scaled(shares, b):
+    q = np.asarray(shares, dtype=float)
+    b = np.asarray(b, dtype=float)
+    return q / b[..., None], b
+
+
+def _logsumexp(x):
+    peak = x.max(axis=-1, keepdims=True)
+    return (peak + np.log(np.exp(x - peak).sum(axis=-1, keepdims=True)))[..., 0]
+
+
+def lmsr_cost(shares, b):
+    """C(q) = b * log(sum(exp(qi/b)))"""
+    scaled, b = _scaled(shares, b)
+    return b * _logsumexp(scaled)
+
+
+def lmsr_prices(shares, b):
+    """P(i) = exp(qi/b) / sum(exp(qj/b)), i.e. a softmax of q/b"""
+    scaled, _ = _scaled(shares, b)
+    weights = np.exp(scaled - scaled.max(axis=-1, keepdims=True))
+    return weights / weights.sum(axis=-1, keepdims=True)
+
+
+def lmsr_trade_cost(shares, b, outcome, quantity):
+    """C(q + quantity * e_outcome) - C(q) without cancelling large terms.
+    
+    With p the current price of outcome, the cost is
+    b * log((1 - p) + p * exp(quantity / b)), evaluated as a logaddexp of
+    log(1 - p) and log(p) + quantity / b. quantity may be an array of
+    candidate sizes.
+    """
+    log_p, log_rest, b = _log_price_split(shares, b, outcome)
+    return b * np.logaddexp(log_rest, log_p + np.asarray(quantity, dtype=float) / b)
+
+
+def _scalar_logsumexp(values: List[float]) -> float:
+    if not values:
+        return -math.inf
+    peak = max(values)
+    return peak + math.log(sum(math.exp(v - peak) for v in values))
+
+
+# Below this, log(expm1(y)) is exact enough and cannot overflow; above it,
+# y + log1p(-exp(-y)) is, and exp(-y) no longer rounds to 1
+_EXPM1_CUTOFF = 20.0
+
+
+def _log_expm1(y):
+    """log(exp(y) - 1) for y > 0, without overflow for large y or a domain error for tiny y"""
+    y = np.asarray(y, dtype=float)
+    with np.errstate(divide="ignore"):
+        # A budget that underflows to 0 gives -inf, which buys 0 shares
+        small = np.log(np.expm1(np.minimum(y, _EXPM1_CUTOFF)))
+    large = y + np.log1p(-np.exp(-np.maximum(y, _EXPM1_CUTOFF)))
+    return np.where(y < _EXPM1_CUTOFF, small, large)
+
+
+def _scalar_log_expm1(y: float) -> float:
+    if y < _EXPM1_CUTOFF:
+        return math.log(math.expm1(y))
+    return y + math.log1p(-math.exp(-y))
+
+
+def _log_price_split(shares, b, outcome):
+    """log(p) and log(1 - p) for one outcome, computed without cancellation"""
+    scaled, b = _scaled(shares, b)
+    total = _logsumexp(scaled)
+    log_p = scaled[..., outcome] - total
+    others = np.delete(scaled, outcome, axis=-1)
+    log_rest = _logsumexp(others) - total if others.shape[-1] else np.full_like(log_p, -np.inf)
+    return log_p, log_rest, b
+
+
+def lmsr_shares_for_budget(shares, b, outcome, budget):
+    """Shares of outcome that an exact spend of budget buys.
+    
+    Inverts budget = b * log((1 - p) + p * exp(x / b)):
+    x = b * (log(p + expm1(budget / b)) - log(p)).
+    """
+    log_p, _, b = _log_price_split(shares, b, outcome)
+    return b * (np.logaddexp(_log_expm1(np.asarray(budget, dtype=float) / b), log_p) - log_p)
+
+
+def lmsr_move_to_price(shares, b, outcome, target):
+    """Shares of outcome to buy, and their cost, to move its price to target.
+    
+    x = b * (logit(target) - logit(p)) and cost = b * log((1 - p) / (1 - target)).
+    Targets at or below the current price need no purchase (0, 0).
+    """
+    log_p, log_rest, b = _log_price_split(shares, b, outcome)
+    target = np.asarray(target, dtype=float)
+    log_target, log_target_rest = np.log(target), np.log1p(-target)
+    quantity = b * ((log_target - log_target_rest) - (log_p - log_rest))
+    cost = b * (log_rest - log_target_rest)
+    below = quantity <= 0
+    return np.where(below, 0.0, quantity), np.where(below, 0.0, cost)
+
+
 class LMSRCalculator:
-    """LMSR (Logarithmic Market Scoring Rule) calculator"""
+    """LMSR (Logarithmic Market Scoring Rule) calculator for one market's liquidity
+    
+    Uses the same log-space formulas as the array functions above, in plain
+    Python: for a single small share vector that beats NumPy's call overhead.
+    Price many markets or quantities at once with lmsr_* directly.
+    """
     
     def __init__(self, liquidity_param: float = DEFAULT_LIQUIDITY_PARAM):
-        self.b = liquidity_param
-    
-    def get_current_shares(self, market_id: int) -> List[float]:
-        """Get current share quantities for each outcome"""
-        with get_db() as db:
-            result = db.query(
-                Position.outcome, 
-                func.sum(Position.shares).label('total_shares')
-            ).filter(
-                Position.market_id == market_id
-            ).group_by(Position.outcome).order_by(Position.outcome).all()
+        self.b = liquidity_param or DEFAULT_LIQUIDITY_PARAM
+    
+    def get_current_shares(self, market_id: int, db=None) -> List[float]:
+        """Get current share quantities for each outcome
+        
+        Pass db to read inside an existing transaction.
+        """
+        if db is None:
+            with get_db() as db:
+                return self.get_current_shares(market_id, db)
+        
+        result = db.query(
+            MarketOutcome.outcome, 
+            MarketOutcome.shares
+        ).filter(
+            MarketOutcome.market_id == market_id
+        ).order_by(MarketOutcome.outcome).all()
         
-        # For binary markets, ensure we have both outcomes
-        shares = [0.0, 0.0]
+        # Every market has one row per outcome; fall back to an empty binary market
+        shares = [0.0] * max(len(result), len(BINARY_OUTCOMES))
         for outcome, total in result:
-            if outcome < len(shares):
-                shares[outcome] = total
+            shares[outcome] = total
         return shares
     
     def calculate_cost(self, shares: List[float]) -> float:
         """Calculate cost function C(q) = b * log(sum(exp(qi/b)))"""
-        exp_sum = sum(math.exp(q / self.b) for q in shares)
-        return self.b * math.log(exp_sum)
+        return self.b * _scalar_logsumexp([q / self.b for q in shares])
     
     def calculate_prices(self, shares: List[float]) -> List[float]:
         """Calculate prices P(i) = exp(qi/b) / sum(exp(qj/b))"""
-        exp_values = [math.exp(q / self.b) for q in shares]
-        exp_sum = sum(exp_values)
-        return [exp_val / exp_sum for exp_val in exp_values]
+        scaled = [q / self.b for q in shares]
+        peak = max(scaled)
+        weights = [math.exp(x - peak) for x in scaled]
+        total = sum(weights)
+        return [w / total for w in weights]
     
     def calculate_trade_cost(self, market_id: int, outcome: int, quantity: float) -> float:
         """Calculate cost to buy quantity shares of outcome"""
-        current_shares = self.get_current_shares(market_id)
-        
-        # Cost before trade
-        cost_before = self.calculate_cost(current_shares)
-        
-        # Cost after trade
-        new_shares = current_shares[:]
-        new_shares[outcome] += quantity
-        cost_after = self.calculate_cost(new_shares)
+        return self.trade_cost(self.get_current_shares(market_id), outcome, quantity)
+    
+    def trade_cost(self, current_shares: List[float], outcome: int, quantity: float) -> float:
+        """Calculate cost to buy quantity shares of outcome from a known share vector"""
+        log_p, log_rest = self._log_price_split(current_shares, outcome)
+        return self.b * _scalar_logsumexp([log_rest, log_p + quantity / self.b])
+    
+    def _log_price_split(self, current_shares: List[float], outcome: int):
+        scaled = [q / self.b for q in current_shares]
+        total = _scalar_logsumexp(scaled)
+        log_rest = _scalar_logsumexp(scaled[:outcome] + scaled[outcome + 1:]) - total
+        return scaled[outcome] - total, log_rest
+    
+    def shares_for_budget(self, current_shares: List[float], outcome: int, budget: float) -> float:
+        """Shares of outcome that spending exactly budget buys (inverse of trade_cost)"""
+        if budget <= 0:
+            return 0.0
+        log_p, _ = self._log_price_split(current_shares, outcome)
+        y = budget / self.b
+        if y == 0:
+            # The budget underflows to nothing at this liquidity
+            return 0.0
+        return self.b * (_scalar_logsumexp([_scalar_log_expm1(y), log_p]) - log_p)
+    
+    def move_to_price(self, current_shares: List[float], outcome: int, target: float) -> Tuple[float, float]:
+        """Shares of outcome to buy, and their cost, to move its price up to target
         
-        return cost_after - cost_before
\ No newline at end of file
+        Returns (0, 0) when the price is already at or above target.
+        """
+        log_p, log_rest = self._log_price_split(current_shares, outcome)
+        log_target, log_target_rest = math.log(target), math.log1p(-target)
+        quantity = self.b * ((log_target - log_target_rest) - (log_p - log_rest))
+        if quantity <= 0:
+            return 0.0, 0.0
+        return quantity, self.b * (log_rest - log_target_rest)
@@ -0,0 +1,53 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import func, literal_column, or_
+from ..models.database import Market
+from ..constants import MAX_MARKETS_PER_PAGE
+
+# created_at is written both by SQLite's CURRENT_TIMESTAMP (no fraction) and by
+# SQLAlchemy (microseconds), so compare on one normalized text form. The format
+# is inlined so the expression matches ix_markets_created_at_key.
+CREATED_AT_KEY = func.strftime(literal_column("'%Y-%m-%d %H:%M:%f'"), Market.created_at)
+
+
+def encode_cursor(created_at_key: str, market_id: int) -> str:
+    """Opaque keyset cursor pointing just past the given market"""
+    return f"{created_at_key}_{market_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Parse a cursor produced by encode_cursor; malformed cursors mean first page"""
+    if not cursor:
+        return None
+    try:
+        created_at_key, market_id = cursor.rsplit("_", 1)
+        return created_at_key, int(market_id)
+    except ValueError:
+        return None
+
+
+def list_markets_page(db, cursor: Optional[str] = None,
+                      limit: int = MAX_MARKETS_PER_PAGE) -> Tuple[List[Market], Optional[str]]:
+    """Return one page of markets, newest first, and the cursor for the next page.
+    
+    Pages are keyed on (created_at, id) so fetching page N is an index seek,
+    costing the same as page 1. Searching goes through models.search_index instead.
+    """
+    markets = db.query(Market, CREATED_AT_KEY)
+    
+    position = decode_cursor(cursor)
+    if position:
+        created_at_key, market_id = position
+        # key <= k bounds the index range; the OR only trims ties on k
+        markets = markets.filter(
+            CREATED_AT_KEY <= created_at_key,
+            or_(CREATED_AT_KEY < created_at_key, Market.id < market_id)
+        )
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = markets.order_by(CREATED_AT_KEY.desc(), Market.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_market, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, last_market.id)
+    return [market for market, _ in rows], next_cursor
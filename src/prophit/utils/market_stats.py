@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+from ..models.database import get_read_db
+from ..services.market_cache import market_cache
+
+
+@dataclass
+class MarketSummary:
+    """Everything a market card needs to render, loaded in bulk"""
+    market_id: int
+    outcomes: List[str]
+    shares: List[float]
+    prices: List[float]
+    trade_count: int = 0
+    total_shares: float = 0.0
+
+
+def load_market_summaries(market_ids: Iterable[int], db=None) -> Dict[int, MarketSummary]:
+    """Load prices, trade counts and share totals for many markets with a
+    fixed number of queries, regardless of how many markets or trades there
+    are; warm markets are served entirely from the state cache. Only reads,
+    so it is safe on a read-only session. Pass db to read through an
+    existing session.
+    """
+    market_ids = list(market_ids)
+    if not market_ids:
+        return {}
+    
+    if db is None:
+        with get_read_db() as db:
+            return load_market_summaries(market_ids, db)
+    
+    # Current prices and totals come from the in-process state cache
+    states = market_cache.get_many(market_ids, db)
+    market_ids = [m_id for m_id in market_ids if m_id in states]
+    shares = {m_id: list(states[m_id].shares) for m_id in market_ids}
+    trade_counts = {m_id: states[m_id].trade_count for m_id in market_ids}
+    
+    return {
+        m_id: MarketSummary(
+            market_id=m_id,
+            outcomes=list(states[m_id].outcomes),
+            shares=shares[m_id],
+            prices=list(states[m_id].prices),
+            trade_count=trade_counts[m_id],
+            total_shares=sum(shares[m_id])
+        )
+        for m_id in market_ids
+    }
@@ -0,0 +1,230 @@
+import glob
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import duckdb
+import numpy as np
+from sqlalchemy.dialects.sqlite import insert
+from ..models.database import get_db, get_write_db, PriceHistory, PriceHistoryValue, PriceArchiveWatermark
+from .price_series import PricePoint, utcnow
+from ..constants import (
+    PRICE_ARCHIVE_DIR,
+    PRICE_ARCHIVE_AFTER_DAYS,
+    PRICE_ARCHIVE_INTERVAL,
+    PRICE_ARCHIVE_BATCH_ROWS
+)
+
+
+# Archived price history lives in hive-partitioned Parquet files,
+#     {directory}/market_id={id}/month={YYYY-MM}/part-{first row id}.parquet
+# one row per (price_history id, outcome). A market's watermark is the highest
+# price_history id whose archived rows were deleted from SQLite; readers take
+# archive rows up to it and every row still in price_history, so a crash
+# between writing a file and committing the delete never shows a point twice.
+
+_duckdb = None
+_duckdb_lock = threading.Lock()
+
+
+def _cursor():
+    """A DuckDB cursor for this thread; connecting costs far more than a query"""
+    global _duckdb
+    with _duckdb_lock:
+        if _duckdb is None:
+            _duckdb = duckdb.connect()
+        return _duckdb.cursor()
+
+
+def market_archive_files(market_ids: Iterable[int], directory: Optional[str] = PRICE_ARCHIVE_DIR) -> List[str]:
+    """Parquet files archived for the given markets"""
+    if not directory:
+        return []
+    return [
+        path
+        for market_id in market_ids
+        for path in glob.glob(os.path.join(directory, f"market_id={market_id}", "month=*", "*.parquet"))
+    ]
+
+
+def get_watermarks(db, market_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """archived_through_id by market, for markets with archived history"""
+    query = db.query(PriceArchiveWatermark.market_id, PriceArchiveWatermark.archived_through_id)
+    if market_ids is not None:
+        query = query.filter(PriceArchiveWatermark.market_id.in_(list(market_ids)))
+    return dict(query.all())
+
+
+def load_archived_points(db, market_ids: Iterable[int],
+                         directory: Optional[str] = PRICE_ARCHIVE_DIR) -> Dict[int, List[PricePoint]]:
+    """Archived price points per market, ordered by timestamp.
+    
+    Markets without archived history are left out. Costs one watermark query,
+    plus one DuckDB scan of the markets' partitions when there are any.
+    """
+    watermarks = get_watermarks(db, market_ids)
+    if not watermarks:
+        return {}
+    if not directory:
+        print(f"DEBUG: {len(watermarks)} markets have archived price history but PRICE_ARCHIVE_DIR is unset")
+        return {}
+    files = market_archive_files(watermarks, directory)
+    if not files:
+        return {}
+    
+    marks = {
+        "market_id": np.array(list(watermarks), dtype=np.int64),
+        "through": np.array(list(watermarks.values()), dtype=np.int64)
+    }
+    cursor = _cursor()
+    try:
+        rows = cursor.execute("""
+            WITH archived AS (
+                SELECT DISTINCT a.market_id, a.id, a.timestamp, a.outcome, a.price
+                FROM read_parquet($files, hive_partitioning = true) a
+                JOIN marks w ON w.market_id = a.market_id AND a.id <= w.through
+            )
+            SELECT market_id, timestamp, list(price ORDER BY outcome)
+            FROM archived
+            GROUP BY market_id, id, timestamp
+            ORDER BY market_id, timestamp, id
+        """, {"files": files}).fetchall()
+    finally:
+        cursor.close()
+    
+    points = defaultdict(list)
+    for market_id, timestamp, prices in rows:
+        points[market_id].append(PricePoint(timestamp, prices))
+    return dict(points)
+
+
+def _write_partition(directory: str, market_id: int, month: str, rows: List[tuple]):
+    """Write one market-month's (id, timestamp, outcome, price) rows as a Parquet part file, replacing any earlier attempt"""
+    ids, timestamps, outcomes, prices = zip(*rows)
+    chunk = {
+        "id": np.array(ids, dtype=np.int64),
+        "timestamp": np.array(timestamps, dtype="datetime64[us]"),
+        "outcome": np.array(outcomes, dtype=np.int64),
+        "price": np.array(prices, dtype=np.float64)
+    }
+    
+    partition = os.path.join(directory, f"market_id={market_id}", f"month={month}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"part-{rows[0][0]}.parquet")
+    cursor = _cursor()
+    try:
+        cursor.execute(f"COPY (SELECT * FROM chunk ORDER BY timestamp, id, outcome) TO '{path}.tmp' (FORMAT parquet)")
+    finally:
+        cursor.close()
+    os.replace(f"{path}.tmp", path)
+
+
+def archive_market(market_id: int, cutoff: datetime, directory: str = PRICE_ARCHIVE_DIR,
+                   batch_rows: int = PRICE_ARCHIVE_BATCH_ROWS) -> int:
+    """Move one market's price history older than cutoff to the archive; returns rows moved.
+    
+    Each batch is written to Parquet first, then deleted from price_history
+    with the watermark advanced in one transaction. Rollups are untouched, so
+    long-range charts keep reading them.
+    """
+    moved = 0
+    while True:
+        with get_db() as db:
+            points = db.query(PriceHistory.id).filter(
+                PriceHistory.market_id == market_id,
+                PriceHistory.timestamp < cutoff
+            ).order_by(PriceHistory.id).limit(batch_rows).subquery()
+            rows = db.query(
+                PriceHistory.id,
+                PriceHistory.timestamp,
+                PriceHistoryValue.outcome,
+                PriceHistoryValue.price
+            ).join(
+                PriceHistoryValue, PriceHistoryValue.point_id == PriceHistory.id
+            ).filter(
+                PriceHistory.id.in_(db.query(points.c.id))
+            ).order_by(PriceHistory.id, PriceHistoryValue.outcome).all()
+        if not rows:
+            return moved
+        
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[row.timestamp.strftime("%Y-%m")].append(tuple(row))
+        for month, month_rows in by_month.items():
+            _write_partition(directory, market_id, month, month_rows)
+        
+        # New rows always get higher ids, so this deletes exactly the rows written
+        through = rows[-1].id
+        with get_write_db() as db:
+            archived = db.query(PriceHistory).filter(
+                PriceHistory.market_id == market_id,
+                PriceHistory.id <= through,
+                PriceHistory.timestamp < cutoff
+            )
+            db.query(PriceHistoryValue).filter(
+                PriceHistoryValue.point_id.in_(archived.with_entities(PriceHistory.id))
+            ).delete(synchronize_session=False)
+            moved += archived.delete(synchronize_session=False)
+            stmt = insert(PriceArchiveWatermark).values(market_id=market_id, archived_through_id=through)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[PriceArchiveWatermark.market_id],
+                set_={"archived_through_id": stmt.excluded.archived_through_id}
+            ))
+            db.commit()
+
+
+def archive_price_history(cutoff: Optional[datetime] = None, directory: str = PRICE_ARCHIVE_DIR) -> int:
+    """Archive price history older than cutoff (default PRICE_ARCHIVE_AFTER_DAYS ago) for every market"""
+    if not directory:
+        raise ValueError("PRICE_ARCHIVE_DIR is not set")
+    cutoff = cutoff or utcnow() - timedelta(days=PRICE_ARCHIVE_AFTER_DAYS)
+    with get_db() as db:
+        market_ids = [m_id for (m_id,) in db.query(PriceHistory.market_id).filter(
+            PriceHistory.timestamp < cutoff
+        ).distinct()]
+    
+    moved = sum(archive_market(market_id, cutoff, directory) for market_id in market_ids)
+    if moved:
+        print(f"DEBUG: Archived {moved} price history rows from {len(market_ids)} markets")
+    return moved
+
+
+class PriceArchiver:
+    """Background thread running archive_price_history every interval seconds"""
+    
+    def __init__(self, directory: str = PRICE_ARCHIVE_DIR, interval: float = PRICE_ARCHIVE_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="price-archiver", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                archive_price_history(directory=self.directory)
+            except Exception as e:
+                # Nothing is deleted before its file is written, so the next run retries
+                print(f"DEBUG: Price archive run failed: {e}")
+            self._stop.wait(self.interval)
+
+
+price_archiver: Optional[PriceArchiver] = None
+
+
+def start_price_archiver(directory: str = PRICE_ARCHIVE_DIR) -> PriceArchiver:
+    """Start the process-wide price archiver"""
+    global price_archiver
+    if price_archiver is None:
+        price_archiver = PriceArchiver(directory).start()
+    return price_archiver
@@ -0,0 +1,342 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.sqlite import insert
+from ..models.database import Market, MarketOutcome, PriceArchiveWatermark, PriceHistory, PriceHistoryValue, PriceRollup
+from ..constants import PRICE_ROLLUP_RESOLUTIONS, MAX_CHART_POINTS, RAW_SERIES_LIMIT
+
+
+class PricePoint(NamedTuple):
+    timestamp: datetime
+    prices: List[float]  # indexed by outcome
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, matching what SQLite's CURRENT_TIMESTAMP stores"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_start(timestamp: datetime, resolution: int) -> datetime:
+    """Start of the resolution-second bucket containing timestamp"""
+    epoch = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution, timezone.utc).replace(tzinfo=None)
+
+
+def _rollup_upsert():
+    stmt = insert(PriceRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            PriceRollup.market_id,
+            PriceRollup.resolution,
+            PriceRollup.bucket_start,
+            PriceRollup.outcome
+        ],
+        set_={
+            "high": func.max(PriceRollup.high, stmt.excluded.high),
+            "low": func.min(PriceRollup.low, stmt.excluded.low),
+            "close": stmt.excluded.close,
+            "count": PriceRollup.count + 1
+        }
+    )
+
+
+def record_price_point(db, market_id: int, prices: List[float], timestamp: Optional[datetime] = None):
+    """Append a price history row and fold it into every rollup resolution.
+    
+    Everything goes through the caller's session, so the point and its
+    rollups commit together.
+    """
+    record_price_points(db, [(market_id, prices, timestamp or utcnow())])
+
+
+def record_price_points(db, points: List[Tuple[int, List[float], datetime]]):
+    """Append many (market_id, prices, timestamp) points with three executemany calls.
+    
+    Each point is a price_history row plus one price_history_values row per
+    outcome. Points are folded into the rollups in the order given, so each
+    bucket's close is the last point written to it.
+    """
+    if not points:
+        return
+    point_ids = db.execute(
+        insert(PriceHistory).returning(PriceHistory.id, sort_by_parameter_order=True),
+        [{"market_id": market_id, "timestamp": timestamp} for market_id, _, timestamp in points]
+    ).scalars().all()
+    db.execute(insert(PriceHistoryValue), [
+        {"point_id": point_id, "outcome": outcome, "price": price}
+        for point_id, (_, prices, _) in zip(point_ids, points)
+        for outcome, price in enumerate(prices)
+    ])
+    db.execute(_rollup_upsert(), [
+        {
+            "market_id": market_id,
+            "resolution": resolution,
+            "bucket_start": bucket_start(timestamp, resolution),
+            "outcome": outcome,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "count": 1
+        }
+        for market_id, prices, timestamp in points
+        for resolution in PRICE_ROLLUP_RESOLUTIONS
+        for outcome, price in enumerate(prices)
+    ])
+
+
+def read_price_history(db, market_ids: Optional[Iterable[int]] = None,
+                       batch_size: Optional[int] = None) -> Iterator[Tuple[int, PricePoint]]:
+    """(market_id, PricePoint) for price history still in SQLite.
+    
+    Ordered by market, then timestamp, reading ix_price_history_market_timestamp
+    and each point's values by primary key. With batch_size rows are streamed
+    rather than fetched at once.
+    """
+    query = select(
+        PriceHistory.market_id,
+        PriceHistory.id,
+        PriceHistory.timestamp,
+        PriceHistoryValue.price
+    ).join(PriceHistoryValue, PriceHistoryValue.point_id == PriceHistory.id)
+    if market_ids is not None:
+        query = query.where(PriceHistory.market_id.in_(list(market_ids)))
+    query = query.order_by(PriceHistory.market_id, PriceHistory.timestamp, PriceHistory.id, PriceHistoryValue.outcome)
+    rows = db.execute(query, execution_options={"yield_per": batch_size} if batch_size else {})
+    
+    # One row per outcome; a point's rows are consecutive
+    point = None
+    for market_id, point_id, timestamp, price in rows:
+        if point is None or point_id != point_id_of:
+            if point is not None:
+                yield point_market, point
+            point, point_market, point_id_of = PricePoint(timestamp, [price]), market_id, point_id
+        else:
+            point.prices.append(price)
+    if point is not None:
+        yield point_market, point
+
+
+def backfill_initial_prices(db, batch_size: int = 1000) -> int:
+    """Give every market without any price history an initial point at its
+    current prices; returns how many markets needed one.
+    
+    Markets get that point when they are created, so only databases from
+    before that need this (see src/prophit/backfill.py). Markets with
+    archived history are left alone.
+    """
+    from ..services.market_cache import load_market_states
+    
+    missing = [m_id for (m_id,) in db.query(Market.id).filter(
+        ~exists().where(PriceHistory.market_id == Market.id),
+        ~exists().where(PriceArchiveWatermark.market_id == Market.id)
+    ).order_by(Market.id)]
+    now = utcnow()
+    for start in range(0, len(missing), batch_size):
+        states = load_market_states(missing[start:start + batch_size], db)
+        record_price_points(db, [(m_id, state.prices, now) for m_id, state in states.items()])
+    db.flush()
+    return len(missing)
+
+
+def rebuild_price_rollups(db, market_id: Optional[int] = None):
+    """Recompute rollups from raw price history, archived and hot, one market at a time"""
+    from .price_archive import get_watermarks, load_archived_points
+    
+    delete = db.query(PriceRollup)
+    if market_id is not None:
+        delete = delete.filter(PriceRollup.market_id == market_id)
+    delete.delete(synchronize_session=False)
+    
+    def flush(buckets):
+        if buckets:
+            db.execute(insert(PriceRollup), [
+                {
+                    "market_id": key[0],
+                    "resolution": key[1],
+                    "bucket_start": key[2],
+                    "outcome": key[3],
+                    "open": ohlc[0],
+                    "high": ohlc[1],
+                    "low": ohlc[2],
+                    "close": ohlc[3],
+                    "count": ohlc[4]
+                }
+                for key, ohlc in buckets.items()
+            ])
+    
+    def add(buckets, m_id, timestamp, prices):
+        for resolution in PRICE_ROLLUP_RESOLUTIONS:
+            start = bucket_start(timestamp, resolution)
+            for outcome, price in enumerate(prices):
+                ohlc = buckets.get((m_id, resolution, start, outcome))
+                if ohlc is None:
+                    buckets[(m_id, resolution, start, outcome)] = [price, price, price, price, 1]
+                else:
+                    ohlc[1] = max(ohlc[1], price)
+                    ohlc[2] = min(ohlc[2], price)
+                    ohlc[3] = price
+                    ohlc[4] += 1
+    
+    def add_archived(buckets, m_id):
+        # Archived points are older than anything left in price_history
+        for point in load_archived_points(db, [m_id]).get(m_id, []):
+            add(buckets, m_id, point.timestamp, point.prices)
+    
+    market_ids = None if market_id is None else [market_id]
+    archived = set(get_watermarks(db, market_ids))
+    buckets = {}
+    current_market = None
+    for m_id, point in read_price_history(db, market_ids, batch_size=10000):
+        if m_id != current_market:
+            flush(buckets)
+            buckets, current_market = {}, m_id
+            if m_id in archived:
+                archived.discard(m_id)
+                add_archived(buckets, m_id)
+        add(buckets, m_id, point.timestamp, point.prices)
+    flush(buckets)
+    
+    # Markets whose history is all archived
+    for m_id in sorted(archived):
+        buckets = {}
+        add_archived(buckets, m_id)
+        flush(buckets)
+
+
+def lttb(points: Sequence[PricePoint], threshold: int) -> List[PricePoint]:
+    """Largest-Triangle-Three-Buckets downsampling.
+    
+    Keeps the first and last points and, from each of threshold - 2 buckets in
+    between, the point forming the largest triangle with its neighbours. With
+    several outcomes the triangle areas of all price lines are summed.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    
+    xs = [p.timestamp.timestamp() for p in points]
+    ys = np.array([p.prices for p in points])
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = ys[next_start:next_end].mean(axis=0)
+        
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        candidate_x = np.array(xs[start:end])[:, None]
+        areas = np.abs(
+            (xs[a] - avg_x) * (ys[start:end] - ys[a]) - (xs[a] - candidate_x) * (avg_y - ys[a])
+        ).sum(axis=1)
+        a = start + int(areas.argmax())
+        sampled.append(points[a])
+    
+    sampled.append(points[-1])
+    return sampled
+
+
+def load_price_series(db, trade_counts: Dict[int, int], max_points: int = MAX_CHART_POINTS,
+                      resolution: Optional[int] = None) -> Dict[int, List[PricePoint]]:
+    """Chart series for many markets, each capped at max_points.
+    
+    trade_counts maps market_id to its number of trades. Markets with up to
+    RAW_SERIES_LIMIT points are read raw, from price_history and the Parquet
+    archive; the rest read the finest rollup resolution that fits (or the one
+    requested, which must be one of PRICE_ROLLUP_RESOLUTIONS). Anything longer than max_points is then downsampled with
+    LTTB. Costs a fixed number of queries however many markets or trades
+    there are.
+    """
+    if resolution is not None and resolution not in PRICE_ROLLUP_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution}; expected one of {PRICE_ROLLUP_RESOLUTIONS}")
+    series = {m_id: [] for m_id in trade_counts}
+    if not series:
+        return series
+    
+    # Raw history holds one row per trade plus the initial point
+    raw_limit = max(max_points, RAW_SERIES_LIMIT)
+    raw = [] if resolution else [m_id for m_id, count in trade_counts.items() if count + 1 <= raw_limit]
+    rolled = [m_id for m_id in trade_counts if m_id not in set(raw)]
+    
+    if raw:
+        from .price_archive import load_archived_points
+        
+        archived = load_archived_points(db, raw)
+        for m_id, points in archived.items():
+            series[m_id].extend(points)
+        for m_id, point in read_price_history(db, raw):
+            series[m_id].append(point)
+        # Archived and hot rows only interleave if points were written out of order
+        for m_id in archived:
+            series[m_id].sort(key=lambda point: point.timestamp)
+    
+    if rolled:
+        if resolution:
+            tiers = dict.fromkeys(rolled, resolution)
+        else:
+            bucket_counts = defaultdict(dict)
+            for m_id, res, count in db.query(
+                PriceRollup.market_id,
+                PriceRollup.resolution,
+                func.count()
+            ).filter(
+                PriceRollup.market_id.in_(rolled),
+                PriceRollup.outcome == 0
+            ).group_by(PriceRollup.market_id, PriceRollup.resolution):
+                bucket_counts[m_id][res] = count
+            tiers = {
+                m_id: next(
+                    (res for res in PRICE_ROLLUP_RESOLUTIONS if bucket_counts[m_id].get(res, 0) <= max_points),
+                    PRICE_ROLLUP_RESOLUTIONS[-1]
+                )
+                for m_id in rolled
+            }
+        
+        by_tier = defaultdict(list)
+        for m_id, res in tiers.items():
+            by_tier[res].append(m_id)
+        
+        for res, m_ids in by_tier.items():
+            closes = defaultdict(dict)
+            for m_id, start, outcome, close in db.query(
+                PriceRollup.market_id,
+                PriceRollup.bucket_start,
+                PriceRollup.outcome,
+                PriceRollup.close
+            ).filter(
+                PriceRollup.market_id.in_(m_ids),
+                PriceRollup.resolution == res
+            ).order_by(PriceRollup.market_id, PriceRollup.bucket_start):
+                closes[(m_id, start)][outcome] = close
+            for (m_id, start), prices in closes.items():
+                series[m_id].append(PricePoint(start, [prices.get(o, 0.0) for o in range(max(prices) + 1)]))
+    
+    return {m_id: lttb(points, max_points) for m_id, points in series.items()}
+
+
+def get_price_series(db, market_id: int, max_points: int = MAX_CHART_POINTS,
+                     resolution: Optional[int] = None) -> List[PricePoint]:
+    """Downsampled last-value price series for one market"""
+    trade_count = db.query(func.coalesce(func.sum(MarketOutcome.trade_count), 0)).filter(
+        MarketOutcome.market_id == market_id
+    ).scalar()
+    return load_price_series(db, {market_id: trade_count}, max_points, resolution)[market_id]
+
+
+def get_price_candles(db, market_id: int, resolution: int, outcome: int = 1,
+                      since: Optional[datetime] = None) -> List[PriceRollup]:
+    """OHLC buckets for one outcome at one of PRICE_ROLLUP_RESOLUTIONS"""
+    query = db.query(PriceRollup).filter(
+        PriceRollup.market_id == market_id,
+        PriceRollup.resolution == resolution,
+        PriceRollup.outcome == outcome
+    )
+    if since is not None:
+        query = query.filter(PriceRollup.bucket_start >= bucket_start(since, resolution))
+    return query.order_by(PriceRollup.bucket_start).all()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+# The engines are built from the environment when src.prophit.models.database
+# is first imported, so point them at a scratch database before any test does.
+_directory = tempfile.mkdtemp(prefix="prophit-tests-")
+os.environ["PROPHIT_DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ.pop("PROPHIT_TRADE_JOURNAL", None)
+os.environ.pop("PROPHIT_PRICE_ARCHIVE_DIR", None)
+
+import pytest
+from src.prophit.models.database import init_database, get_db, Market
+from src.prophit.models.outcome_totals import create_outcomes
+from src.prophit.utils.price_series import record_price_point
+from src.prophit.constants import BINARY_OUTCOME_LABELS
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_database()
+
+
+@pytest.fixture
+def create_market():
+    """Factory for open binary markets, created as /create-market would; returns the market id"""
+    def create(question="Test market", liquidity=None, resolution_date=None):
+        with get_db() as db:
+            market = Market(question=question, liquidity_param=liquidity, resolution_date=resolution_date)
+            db.add(market)
+            db.flush()
+            create_outcomes(db, market.id, BINARY_OUTCOME_LABELS)
+            record_price_point(db, market.id, [1 / len(BINARY_OUTCOME_LABELS)] * len(BINARY_OUTCOME_LABELS))
+            db.commit()
+            return market.id
+    return create
@@ -0,0 +1,74 @@
+"""Analytics snapshots refresh off the request path."""
+import os
+import threading
+import pytest
+from starlette.testclient import TestClient
+from src.prophit.services import analytics
+from src.prophit.services.analytics import AnalyticsEngine
+from src.prophit.services.trade_engine import execute_trade
+
+
+def test_auto_source_never_installs_the_sqlite_extension(tmp_path, monkeypatch):
+    installs = []
+    attach = AnalyticsEngine._attach
+    
+    def recording_attach(self, install):
+        installs.append(install)
+        return attach(self, install)
+    monkeypatch.setattr(AnalyticsEngine, "_attach", recording_attach)
+    
+    engine = AnalyticsEngine(source="auto", snapshot_dir=str(tmp_path))
+    engine.close()
+    assert installs == [False]
+
+
+def test_queries_do_not_wait_for_a_snapshot_refresh(create_market, tmp_path, monkeypatch):
+    market_id = create_market("Analytics market")
+    execute_trade(market_id, 1, 10.0, "analytics-user")
+    
+    engine = AnalyticsEngine(source="snapshot", snapshot_dir=str(tmp_path), refresh_interval=0.01)
+    try:
+        assert engine.wait_ready(timeout=60)
+        
+        # Hold the next refresh mid-write
+        writing, release = threading.Event(), threading.Event()
+        write_snapshot = analytics.write_snapshot
+        
+        def held_write_snapshot(*args, **kwargs):
+            writing.set()
+            release.wait()
+            return write_snapshot(*args, **kwargs)
+        monkeypatch.setattr(analytics, "write_snapshot", held_write_snapshot)
+        assert writing.wait(timeout=60)
+        
+        volume = {row["market_id"]: row["trades"] for row in engine.market_volume(limit=1000)}
+        assert volume[market_id] == 1
+        
+        # Trades made since show up once the held refresh swaps the views
+        execute_trade(market_id, 1, 10.0, "analytics-user")
+        writing.clear()
+        release.set()
+        assert writing.wait(timeout=60)
+        volume = {row["market_id"]: row["trades"] for row in engine.market_volume(limit=1000)}
+        assert volume[market_id] == 2
+    finally:
+        release.set()
+        engine.close()
+
+
+@pytest.mark.parametrize("path", ["/analytics/markets", "/analytics/volatility"])
+def test_invalid_since_is_a_bad_request(path):
+    from src.prophit.app import create_app
+    app, rt = create_app()
+    with TestClient(app) as client:
+        assert client.get(path, params={"since": "yesterday"}).status_code == 400
+
+
+def test_snapshots_default_to_the_database_directory():
+    engine = AnalyticsEngine(source="snapshot", refresh_interval=3600)
+    try:
+        assert engine.wait_ready(timeout=60)
+        assert os.path.dirname(engine.snapshot_dir) == os.path.dirname(os.path.abspath(engine.database_path))
+        assert os.listdir(engine.snapshot_dir)
+    finally:
+        engine.close()
@@ -0,0 +1,29 @@
+"""Engines for every supported DATABASE_URL form."""
+import os
+import subprocess
+import sys
+import pytest
+
+# The engines are built at import, so each URL gets a fresh interpreter
+MEMORY_CHECK = """
+import asyncio
+from src.prophit.models.database import init_database, get_db, get_async_db, Market
+
+init_database()
+
+async def create():
+    async with get_async_db() as db:
+        db.add(Market(question="In memory"))
+        await db.commit()
+asyncio.run(create())
+
+with get_db() as db:
+    assert db.query(Market).count() == 1
+"""
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_in_memory_database(url):
+    env = dict(os.environ, PROPHIT_DATABASE_URL=url)
+    result = subprocess.run([sys.executable, "-c", MEMORY_CHECK], env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,42 @@
+"""The market state cache must match the database after every trade."""
+from src.prophit.models.market import OrderCreate
+from src.prophit.services.market_cache import load_market_states, market_cache
+from src.prophit.services.trade_engine import execute_trade, execute_trade_batch
+
+
+def _load_during_write_through(monkeypatch):
+    """Have a page view lazily load the market between a trade's commit and its write-through"""
+    apply_trade = market_cache.apply_trade
+    
+    def racing_apply_trade(market_id, *args, **kwargs):
+        market_cache.get(market_id)
+        return apply_trade(market_id, *args, **kwargs)
+    monkeypatch.setattr(market_cache, "apply_trade", racing_apply_trade)
+
+
+def _assert_cache_matches_database(market_id):
+    cached = market_cache.get(market_id)
+    stored = load_market_states([market_id])[market_id]
+    assert cached.shares == stored.shares
+    assert cached.trade_count == stored.trade_count
+
+
+def test_lazy_load_between_commit_and_write_through(create_market, monkeypatch):
+    market_id = create_market("Cache market")
+    market_cache.invalidate(market_id)
+    _load_during_write_through(monkeypatch)
+    
+    execute_trade(market_id, 1, 10.0, "cache-user")
+    _assert_cache_matches_database(market_id)
+    assert market_cache.get(market_id).shares == [0.0, 10.0]
+    assert market_cache.get(market_id).trade_count == 1
+
+
+def test_batch_lazy_load_between_commit_and_write_through(create_market, monkeypatch):
+    market_id = create_market("Cache market")
+    market_cache.invalidate(market_id)
+    _load_during_write_through(monkeypatch)
+    
+    execute_trade_batch([OrderCreate(market_id=market_id, outcome=o, quantity=5) for o in (1, 0, 1)], "cache-user")
+    _assert_cache_matches_database(market_id)
+    assert market_cache.get(market_id).trade_count == 3
@@ -0,0 +1,76 @@
+"""Every quote must be for a trade /trade would accept."""
+from datetime import timedelta
+import pytest
+from src.prophit.models.database import get_db, Market
+from src.prophit.services.market_cache import market_cache
+from src.prophit.services.trade_engine import execute_trade, quote_trade, TradeError
+from src.prophit.utils.lmsr import LMSRCalculator, lmsr_shares_for_budget
+from src.prophit.utils.price_series import utcnow
+from src.prophit.constants import MARKET_STATUSES, MAX_TRADE_QUANTITY
+
+
+@pytest.fixture
+def market_id(create_market):
+    return create_market("Quote market")
+
+
+def test_budget_quote_is_capped_at_max_quantity(market_id):
+    quote = quote_trade(market_id, 1, budget=1e9)
+    assert quote.capped
+    assert quote.shares == MAX_TRADE_QUANTITY
+    assert quote.cost < 1e9
+    
+    trade = execute_trade(market_id, 1, quote.shares, "quote-user")
+    assert trade.cost == pytest.approx(quote.cost)
+
+
+def test_target_price_quote_is_capped_at_max_quantity(create_market):
+    # At b=1000 the price reaches 0.99 only after ~4600 shares
+    market_id = create_market(liquidity=1000.0)
+    quote = quote_trade(market_id, 1, target_price=1 - 1e-6)
+    assert quote.capped
+    assert quote.shares == MAX_TRADE_QUANTITY
+    assert quote.price_after < 1 - 1e-6
+
+
+def test_uncapped_budget_quote_spends_the_budget(market_id):
+    quote = quote_trade(market_id, 1, budget=50.0)
+    assert not quote.capped
+    assert quote.cost == pytest.approx(50.0)
+
+
+def test_quote_below_min_quantity_is_rejected(market_id):
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, budget=0.01)
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, target_price=0.4)
+
+
+@pytest.mark.parametrize("budget", [1e-300, 1e-14, 5e-324])
+def test_tiny_budget_is_rejected_not_a_math_error(market_id, budget):
+    assert 0 <= LMSRCalculator(100.0).shares_for_budget([0.0, 0.0], 1, budget) < 1e-12
+    assert 0 <= lmsr_shares_for_budget([0.0, 0.0], 100.0, 1, budget) < 1e-12
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, budget=budget)
+
+
+@pytest.mark.parametrize("argument", ["quantity", "budget", "target_price"])
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_arguments_are_rejected(market_id, argument, value):
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, **{argument: value})
+
+
+def test_closed_market_is_not_quoted(market_id):
+    with get_db() as db:
+        db.get(Market, market_id).status = MARKET_STATUSES["CLOSED"]
+        db.commit()
+    market_cache.invalidate(market_id)
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, quantity=10.0)
+
+
+def test_market_past_its_resolution_date_is_not_quoted(create_market):
+    market_id = create_market(resolution_date=utcnow() - timedelta(minutes=1))
+    with pytest.raises(TradeError):
+        quote_trade(market_id, 1, quantity=10.0)
@@ -0,0 +1,83 @@
+"""Page views and other GET routes must never write to the database."""
+import pytest
+from sqlalchemy import event, text
+from starlette.testclient import TestClient
+from src.prophit.models import database
+from src.prophit.services.fragment_cache import card_cache
+from src.prophit.services.market_cache import market_cache
+from src.prophit.constants import MARKET_STATUSES, MARKET_TYPES
+
+WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+@pytest.fixture(scope="module")
+def client():
+    from src.prophit.app import create_app
+    app, rt = create_app()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def writes():
+    """Statements that write, issued through any of the four engines"""
+    issued = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(WRITES):
+            issued.append(statement)
+    engines = [
+        database.engine,
+        database.read_engine,
+        database.async_engine.sync_engine,
+        database.async_read_engine.sync_engine
+    ]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    yield issued
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="module")
+def market_ids(client):
+    """A traded market, and a legacy market with no outcomes or price history"""
+    assert client.post("/create-market", data={"question": "Traded market?"}).status_code == 200
+    with database.get_db() as db:
+        traded = db.execute(text("SELECT max(id) FROM markets")).scalar()
+    assert client.post(f"/trade/{traded}", data={"outcome": 1, "quantity": 10}).status_code == 200
+    
+    with database.get_db() as db:
+        legacy = db.execute(text(
+            "INSERT INTO markets (question, type, status, created_at, liquidity_param) "
+            "VALUES ('Legacy market?', :type, :status, CURRENT_TIMESTAMP, 100.0) RETURNING id"
+        ), {"type": MARKET_TYPES["BINARY"], "status": MARKET_STATUSES["ACTIVE"]}).scalar()
+        db.commit()
+    return traded, legacy
+
+
+def _paths(market_id):
+    return [
+        f"/market/{market_id}",
+        f"/market/{market_id}/series",
+        f"/market/{market_id}/series?resolution=60",
+        f"/quote/{market_id}?outcome=1&quantity=10"
+    ]
+
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "warm"])
+def test_get_routes_issue_no_writes(client, market_ids, writes, cold):
+    if cold:
+        market_cache.invalidate()
+        card_cache.invalidate()
+    
+    paths = ["/", "/markets", "/portfolio"] + [path for m_id in market_ids for path in _paths(m_id)]
+    for path in paths:
+        assert client.get(path).status_code == 200, path
+    assert writes == []
+
+
+def test_write_hook_sees_writes(client, market_ids, writes):
+    traded, _ = market_ids
+    assert client.post(f"/trade/{traded}", data={"outcome": 0, "quantity": 5}).status_code == 200
+    assert any(statement.lstrip().upper().startswith("INSERT") for statement in writes)
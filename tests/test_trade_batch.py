@@ -0,0 +1,26 @@
+"""POST /trades/batch answers malformed bodies with 400, never 500."""
+import json
+import pytest
+from starlette.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client():
+    from src.prophit.app import create_app
+    app, rt = create_app()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("body", ["[1]", '"orders"', "3", "null", "{bad", "", '{"orders": []}', '{"orders": 1}'])
+def test_invalid_batch_is_a_bad_request(client, body):
+    response = client.post("/trades/batch", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_valid_batch_is_filled(client, create_market):
+    market_id = create_market("Batch market")
+    orders = [{"market_id": market_id, "outcome": 1, "quantity": 5}, {"market_id": market_id, "outcome": 0, "quantity": 5}]
+    response = client.post("/trades/batch", content=json.dumps({"orders": orders}), headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert [fill.get("error") for fill in response.json()["fills"]] == [None, None]
@@ -0,0 +1,52 @@
+"""Concurrent trades must be priced against the true share vector.
+
+LMSR cost is path independent, so if every trade was priced against the true
+share vector the costs charged on a market sum to C(q_final) - C(0). Any trade
+priced against a stale vector breaks that identity.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from src.prophit.models.database import get_db, Market, Position
+from src.prophit.models.holdings import check_holdings
+from src.prophit.models.market import OrderCreate
+from src.prophit.models.outcome_totals import check_outcome_totals
+from src.prophit.services.trade_engine import execute_trade, execute_trade_batch
+from src.prophit.utils.lmsr import LMSRCalculator
+from src.prophit.utils.price_series import read_price_history
+
+WORKERS = 6
+TRADES_PER_WORKER = 60
+NUM_MARKETS = 3
+
+
+def _trade(seed, market_ids):
+    rng = random.Random(seed)
+    user_id = f"user{seed}"
+    for i in range(TRADES_PER_WORKER):
+        if i % 10 == 9:
+            execute_trade_batch([
+                OrderCreate(market_id=rng.choice(market_ids), outcome=rng.randrange(2), quantity=rng.randrange(1, 50))
+                for _ in range(3)
+            ], user_id)
+        else:
+            execute_trade(rng.choice(market_ids), rng.randrange(2), float(rng.randrange(1, 50)), user_id)
+
+
+def test_concurrent_trades_are_priced_path_independently(create_market):
+    market_ids = [create_market(f"Concurrency market {i}") for i in range(NUM_MARKETS)]
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        list(executor.map(_trade, range(WORKERS), [market_ids] * WORKERS))
+    
+    with get_db() as db:
+        assert check_outcome_totals(db) == []
+        assert check_holdings(db) == []
+        for market_id in market_ids:
+            calculator = LMSRCalculator(db.get(Market, market_id).liquidity_param)
+            shares = calculator.get_current_shares(market_id, db)
+            charged = db.query(func.coalesce(func.sum(Position.cost), 0.0)).filter(Position.market_id == market_id).scalar()
+            expected = calculator.calculate_cost(shares) - calculator.calculate_cost([0.0] * len(shares))
+            assert abs(charged - expected) < 1e-6, f"market {market_id} charged {charged}, expected {expected}"
+            
+            _, last = list(read_price_history(db, [market_id]))[-1]
+            assert max(abs(a - b) for a, b in zip(last.prices, calculator.calculate_prices(shares))) < 1e-9
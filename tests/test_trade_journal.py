@@ -0,0 +1,59 @@
+"""Journaled trades must price against the journal's state while the database lags."""
+import os
+import threading
+import pytest
+from src.prophit.services import trade_engine, trade_journal
+from src.prophit.services.market_cache import market_cache
+from src.prophit.services.trade_engine import execute_trade
+from src.prophit.services.trade_journal import TradeJournal
+from src.prophit.utils.lmsr import LMSRCalculator
+from src.prophit.constants import DEFAULT_LIQUIDITY_PARAM
+
+
+@pytest.fixture
+def held_journal(tmp_path, monkeypatch):
+    """A process-wide journal whose applier waits until release is set"""
+    journal = TradeJournal(os.path.join(tmp_path, "trades.journal")).open()
+    release = threading.Event()
+    apply = journal._apply
+    
+    def held_apply(group):
+        release.wait()
+        return apply(group)
+    monkeypatch.setattr(journal, "_apply", held_apply)
+    monkeypatch.setattr(trade_journal, "trade_journal", journal)
+    yield journal, release
+    release.set()
+    journal.close()
+
+
+def test_applier_catching_up_during_cache_read(create_market, held_journal, monkeypatch):
+    journal, release = held_journal
+    market_id = create_market("Journal market")
+    execute_trade(market_id, 1, 10.0, "journal-user")
+    
+    # The cache entry is dropped while the first trade is unapplied, so the
+    # next read loads the database's stale vector; the applier then catches
+    # up before the second trade gets to look at the journal
+    market_cache.invalidate(market_id)
+    get = market_cache.get
+    
+    def lagging_get(m_id, db=None):
+        state = get(m_id, db)
+        release.set()
+        journal.wait_applied([m_id])
+        return state
+    monkeypatch.setattr(market_cache, "get", lagging_get)
+    
+    published = []
+    publish = trade_engine._publish
+    
+    def recording_publish(m_id, shares, trade_count, prices):
+        published.append((list(shares), trade_count))
+        return publish(m_id, shares, trade_count, prices)
+    monkeypatch.setattr(trade_engine, "_publish", recording_publish)
+    
+    trade = execute_trade(market_id, 1, 5.0, "journal-user")
+    calculator = LMSRCalculator(DEFAULT_LIQUIDITY_PARAM)
+    assert trade.cost == pytest.approx(calculator.trade_cost([0.0, 10.0], 1, 5.0))
+    assert published == [([0.0, 15.0], 2)]